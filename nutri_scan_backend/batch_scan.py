@@ -0,0 +1,275 @@
+import sys
+import os
+import glob
+import json
+import time
+import argparse
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+from config import Config
+
+# Offline batch scanner: decode + preprocess + detection + nutrition for a
+# directory, glob or manifest of images, across a pool of processes, without
+# going through HTTP. Results stream to JSONL (or Parquet) as they complete and
+# a re-run skips images already scanned successfully, e.g.
+#     python batch_scan.py uploads/ -o rescan.jsonl --detector yolo --workers 4
+
+STAGES = ('read', 'decode', 'preprocess', 'detect', 'nutrition')
+
+def collect_images(sources):
+    """Expand directories, globs and manifests (.txt: one path per line, .jsonl: {"path": ...})"""
+    extensions = {f".{ext}" for ext in Config.ALLOWED_EXTENSIONS}
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, files in os.walk(source):
+                paths.extend(os.path.join(root, name) for name in sorted(files)
+                             if os.path.splitext(name)[1].lower() in extensions
+                             and '_preprocessed.' not in name)
+        elif source.endswith(('.txt', '.jsonl')) and os.path.isfile(source):
+            with open(source) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    paths.append(json.loads(line)['path'] if source.endswith('.jsonl') else line)
+        else:
+            paths.extend(sorted(glob.glob(source, recursive=True)))
+
+    # Keep order, drop duplicates
+    return list(dict.fromkeys(os.path.abspath(p) for p in paths))
+
+# --- Scan worker process side ---
+
+_service = None
+_nutrition = None
+_detector = 'auto'
+
+def init_worker(detector, with_nutrition, workers):
+    """ProcessPoolExecutor initializer: load the model once per scan process"""
+    global _service, _nutrition, _detector
+    # Split the cores between scan processes unless a thread count is configured
+    if not Config.INFERENCE_INTRA_OP_THREADS:
+        Config.INFERENCE_INTRA_OP_THREADS = max(1, (os.cpu_count() or 1) // workers)
+    # Run YOLO in this process, not in a detection server
+    Config.DETECTION_SERVER_ADDRESS = ''
+
+    from services.food_detection import food_detection_service
+    _service = food_detection_service
+    _service.preload(force=True)
+    _service.warm_up()
+    _detector = detector
+    if with_nutrition:
+        from services.nutrition import nutrition_service
+        _nutrition = nutrition_service
+
+def scan_image(path):
+    """Scan one image file; never raises, failures are reported in the record"""
+    timings = {}
+    record = {'path': path, 'status': 'ok', 'pid': os.getpid()}
+
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+
+    try:
+        with open(path, 'rb') as f:
+            data = timed('read', f.read)
+        # Same decode/preprocess as the upload route, so batch and live scans see the same pixels
+        image = timed('decode', _service.decode_image, data, Config.UPLOAD_DECODE_EDGE)
+        if image is None:
+            raise ValueError("Could not decode image")
+        image = timed('preprocess', _service.preprocess_array, image, Config.UPLOAD_DECODE_EDGE)
+
+        if _detector == 'yolo':
+            detections = timed('detect', _service._detect_with_yolo, image)
+            info = {'mode': 'yolo', 'winner': 'yolo'}
+        else:
+            detections, info = timed('detect', _service.detect, image)
+        record['detected_foods'] = detections
+        record['detection'] = {'mode': info.get('mode'), 'winner': info.get('winner')}
+        record['model_versions'] = _service.model_versions
+
+        if _nutrition is not None:
+            record['total_nutrition'] = timed('nutrition', _nutrition.get_multiple_foods_nutrition, detections)
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+
+    record['timings_ms'] = timings
+    record['scanned_at'] = datetime.utcnow().isoformat()
+    return record
+
+# --- Output writers ---
+
+class JsonlWriter:
+    """Appends one JSON record per line, flushed as each result arrives"""
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def done_paths(self):
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A partial last line from an interrupted run
+                    continue
+                if record.get('status') == 'ok':
+                    done.add(record['path'])
+        return done
+
+    def write(self, record):
+        if self._file is None:
+            self._file = open(self.path, 'a')
+        self._file.write(json.dumps(record, default=str) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+class ParquetWriter:
+    """
+    Writes records as a Parquet dataset (requires pyarrow): `path` is a
+    directory of part files, one per row group. Each part is written to a
+    temporary file and renamed into place when complete, so a crash loses at
+    most the rows not yet flushed and a re-run resumes from the parts on disk.
+    Read it back with pyarrow.parquet.read_table(path). Nested fields are
+    stored as JSON strings.
+    """
+    COLUMNS = ('path', 'status', 'error', 'pid', 'scanned_at', 'detected_foods',
+               'detection', 'model_versions', 'total_nutrition', 'timings_ms')
+    NESTED = ('detected_foods', 'detection', 'model_versions', 'total_nutrition', 'timings_ms')
+
+    def __init__(self, path, row_group_size=256):
+        import pyarrow as pa
+        if os.path.isfile(path):
+            raise ValueError(f"{path} is a file; Parquet output is a directory of part files")
+        self.pa = pa
+        self.path = path
+        self.row_group_size = row_group_size
+        self.schema = pa.schema([(name, pa.int64() if name == 'pid' else pa.string()) for name in self.COLUMNS])
+        self._rows = []
+
+    def _parts(self):
+        return sorted(glob.glob(os.path.join(self.path, 'part-*.parquet')))
+
+    def done_paths(self):
+        import pyarrow.parquet as pq
+        done = set()
+        for part in self._parts():
+            rows = pq.read_table(part, columns=['path', 'status']).to_pylist()
+            done.update(row['path'] for row in rows if row['status'] == 'ok')
+        return done
+
+    def write(self, record):
+        row = {name: record.get(name) for name in self.COLUMNS}
+        for name in self.NESTED:
+            if row[name] is not None:
+                row[name] = json.dumps(row[name], default=str)
+        self._rows.append(row)
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow.parquet as pq
+        if not self._rows:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        parts = self._parts()
+        index = int(os.path.basename(parts[-1])[5:-8]) + 1 if parts else 0
+        part = os.path.join(self.path, f"part-{index:05d}.parquet")
+        pq.write_table(self.pa.Table.from_pylist(self._rows, schema=self.schema), part + '.tmp')
+        os.replace(part + '.tmp', part)
+        self._rows = []
+
+    def close(self):
+        self._flush()
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def print_report(records, elapsed):
+    ok = [r for r in records if r['status'] == 'ok']
+    failed = [r for r in records if r['status'] != 'ok']
+    print("\n--- Batch Scan Report ---")
+    print(f"Images: {len(records)} ({len(ok)} ok, {len(failed)} failed) in {elapsed:.1f}s "
+          f"-> {len(records) / elapsed if elapsed else 0:.2f} img/s")
+    print(f"{'stage':>10} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for stage in STAGES:
+        values = [r['timings_ms'][stage] for r in ok if stage in r['timings_ms']]
+        if values:
+            print(f"{stage:>10} {sum(values) / len(values):>8.1f} {percentile(values, 0.5):>8.1f} "
+                  f"{percentile(values, 0.95):>8.1f}")
+    for r in failed[:20]:
+        print(f"FAILED {r['path']}: {r['error']}")
+    if len(failed) > 20:
+        print(f"... and {len(failed) - 20} more failures")
+
+def main():
+    parser = argparse.ArgumentParser(description='Scan a directory, glob or manifest of food images offline')
+    parser.add_argument('sources', nargs='+', help='Image directories, glob patterns or .txt/.jsonl manifests')
+    parser.add_argument('-o', '--output', default='batch_scan.jsonl',
+                        help='Output .jsonl file, or .parquet directory of part files')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--detector', choices=('auto', 'yolo'), default='auto',
+                        help="'auto' follows DETECTION_MODE (Gemini when configured); 'yolo' re-runs local models only")
+    parser.add_argument('--no-nutrition', action='store_true', help='Skip the nutrition lookup')
+    parser.add_argument('--no-resume', action='store_true', help='Re-scan images already in the output')
+    args = parser.parse_args()
+
+    writer = ParquetWriter(args.output) if args.output.endswith('.parquet') else JsonlWriter(args.output)
+    paths = collect_images(args.sources)
+    done = set() if args.no_resume else writer.done_paths()
+    pending = [p for p in paths if p not in done]
+    print(f"{len(paths)} images found, {len(paths) - len(pending)} already scanned, {len(pending)} to scan "
+          f"with {args.workers} workers")
+    if not pending:
+        return
+
+    # spawn: scan processes start clean and load the model themselves
+    context = multiprocessing.get_context('spawn')
+    records = []
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=args.workers, mp_context=context, initializer=init_worker,
+                                   initargs=(args.detector, not args.no_nutrition, args.workers))
+    try:
+        futures = {executor.submit(scan_image, path): path for path in pending}
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                # The scan process itself died (e.g. out of memory)
+                record = {'path': futures[future], 'status': 'error', 'error': f"{type(e).__name__}: {e}",
+                          'timings_ms': {}, 'scanned_at': datetime.utcnow().isoformat()}
+            writer.write(record)
+            records.append(record)
+            if len(records) % 50 == 0:
+                rate = len(records) / (time.perf_counter() - start)
+                print(f"{len(records)}/{len(pending)} scanned ({rate:.2f} img/s)", flush=True)
+        executor.shutdown()
+    except KeyboardInterrupt:
+        # Drop the queued scans instead of waiting for all of them
+        executor.shutdown(wait=False, cancel_futures=True)
+        print("Interrupted; re-run the same command to resume.")
+    finally:
+        writer.close()
+
+    print_report(records, time.perf_counter() - start)
+
+if __name__ == '__main__':
+    main()
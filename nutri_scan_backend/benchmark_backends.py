@@ -0,0 +1,93 @@
+import sys
+import os
+import glob
+import time
+import argparse
+import numpy as np
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+from config import Config
+from services.detection_backends import create_backend
+from services.food_detection import FoodDetectionService
+
+def load_images(image_dir, count):
+    """Real photos from image_dir, or synthetic noise if none are given"""
+    import cv2
+    files = sorted(f for ext in ('jpg', 'jpeg', 'png') for f in glob.glob(os.path.join(image_dir or '', f'*.{ext}')))
+    if files:
+        return [cv2.imread(f) for f in files[:count]]
+    print("No --images directory given: using synthetic images (latency only, accuracy delta is meaningless).")
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(count)]
+
+def time_backend(model, images):
+    """Per-image latency (ms) and detections for each image"""
+    model([images[0]], conf=Config.YOLO_CONFIDENCE, imgsz=Config.YOLO_IMGSZ, verbose=False)  # warm-up
+    latencies, results = [], []
+    for img in images:
+        start = time.perf_counter()
+        result = model([img], conf=Config.YOLO_CONFIDENCE, imgsz=Config.YOLO_IMGSZ, verbose=False)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(result)
+    return np.array(latencies), results
+
+def iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0
+
+def compare(service, reference, candidate):
+    """Match food detections (same class, IoU >= 0.5) between the torch and candidate backends"""
+    matched = missed = extra = 0
+    conf_delta = []
+    for ref, cand in zip(reference, candidate):
+        ref_items = service._parse_yolo_result(ref)
+        cand_items = service._parse_yolo_result(cand)
+        used = set()
+        for r in ref_items:
+            best = None
+            for j, c in enumerate(cand_items):
+                if j not in used and c['name'] == r['name'] and iou(r['bbox'], c['bbox']) >= 0.5:
+                    best = j
+                    break
+            if best is None:
+                missed += 1
+            else:
+                used.add(best)
+                matched += 1
+                conf_delta.append(abs(r['confidence'] - cand_items[best]['confidence']))
+        extra += len(cand_items) - len(used)
+    return matched, missed, extra, (float(np.mean(conf_delta)) if conf_delta else 0.0)
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency and accuracy delta of an inference backend against torch')
+    parser.add_argument('--backend', default=Config.DETECTION_BACKEND if Config.DETECTION_BACKEND != 'torch' else 'onnxruntime')
+    parser.add_argument('--images', default='', help='directory of food photos')
+    parser.add_argument('--count', type=int, default=50)
+    args = parser.parse_args()
+
+    service = FoodDetectionService()
+    images = load_images(args.images, args.count)
+
+    torch_model = create_backend('torch', service.model_name)
+    candidate = create_backend(args.backend, service.model_name, build=True)
+
+    torch_lat, torch_results = time_backend(torch_model, images)
+    cand_lat, cand_results = time_backend(candidate, images)
+
+    label = args.backend + (' int8' if Config.QUANTIZE_INT8 else '')
+    print(f"\n--- Backend Benchmark ({len(images)} images, {service.model_name}) ---")
+    for name, lat in (('torch', torch_lat), (label, cand_lat)):
+        print(f"{name:18s} mean {lat.mean():7.1f} ms  p50 {np.percentile(lat, 50):7.1f} ms  p95 {np.percentile(lat, 95):7.1f} ms")
+    print(f"Speed-up: {torch_lat.mean() / cand_lat.mean():.2f}x")
+
+    matched, missed, extra, conf_delta = compare(service, torch_results, cand_results)
+    print(f"\nFood detections vs torch: {matched} matched, {missed} missed, {extra} extra, "
+          f"mean |confidence delta| {conf_delta:.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+from config import Config
+from services.food_detection import FoodDetectionService, InferenceBatcher
+
+def make_synthetic_images(count, width=1280, height=960, seed=0):
+    """Random noise images shaped like downscaled phone photos"""
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+def run(batcher, images, concurrency):
+    """Fire all images through the batcher from `concurrency` client threads"""
+    latencies = []
+
+    def one(img):
+        start = time.perf_counter()
+        batcher.predict(img)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, images))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'images_per_sec': len(images) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'batches': batcher.get_stats()['batches'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare batch-1 and micro-batched YOLO throughput')
+    parser.add_argument('--images', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=8, help='simulated concurrent requests')
+    parser.add_argument('--batch-size', type=int, default=Config.YOLO_MAX_BATCH_SIZE)
+    parser.add_argument('--wait-ms', type=float, default=Config.YOLO_MAX_BATCH_WAIT_MS)
+    args = parser.parse_args()
+
+    service = FoodDetectionService()
+    if not service.model:
+        print("FAILURE: Model failed to load.")
+        sys.exit(1)
+
+    images = make_synthetic_images(args.images)
+
+    # Warm up so neither run pays graph initialisation
+    service._predict_batch(images[:1])
+
+    # Batch-1: every request is its own forward pass. Calls are serialised
+    # (max_batch_size=1 runs inline) with a single client, as in a sync worker.
+    single = InferenceBatcher(service._predict_batch, max_batch_size=1)
+    baseline = run(single, images, concurrency=1)
+
+    batched = InferenceBatcher(service._predict_batch, max_batch_size=args.batch_size, max_wait_ms=args.wait_ms)
+    result = run(batched, images, concurrency=args.concurrency)
+
+    print(f"\n--- YOLO Throughput ({args.images} images, model {service.model_name}) ---")
+    print(f"batch-1:        {baseline['images_per_sec']:.1f} img/s  p50 {baseline['p50_ms']:.1f} ms  p99 {baseline['p99_ms']:.1f} ms")
+    print(f"batched (<= {args.batch_size}, {args.wait_ms} ms): "
+          f"{result['images_per_sec']:.1f} img/s  p50 {result['p50_ms']:.1f} ms  p99 {result['p99_ms']:.1f} ms  "
+          f"({result['batches']} batches)")
+    print(f"Speed-up: {result['images_per_sec'] / baseline['images_per_sec']:.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+from config import Config
+from services.gemini_client import GeminiVisionClient
+from gemini_stub_server import start_server
+
+def synthetic_photo(width=4032, height=3024, seed=0):
+    """Smooth gradients plus noise: compresses roughly like a phone photo"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([(x * 255 // width), (y * 255 // height), ((x + y) * 255 // (width + height))], axis=-1)
+    noise = rng.integers(-20, 20, (height, width, 3))
+    return np.clip(base + noise, 0, 255).astype(np.uint8)
+
+def run(client, image, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.generate("benchmark", image)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return client.get_stats()['bytes_sent'] / count, np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description='Bytes sent and latency of Gemini requests, original vs bounded encoding')
+    parser.add_argument('--endpoint', default='', help='Gemini base URL (default: start the local stub)')
+    parser.add_argument('--image', default='', help='photo to send (default: synthetic 12 MP image)')
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--bandwidth-kbps', type=float, default=8000)
+    args = parser.parse_args()
+
+    if args.image:
+        import cv2
+        image = cv2.imread(args.image)
+    else:
+        image = synthetic_photo()
+
+    server = None
+    endpoint = args.endpoint
+    if not endpoint:
+        server = start_server(port=8089, bandwidth_kbps=args.bandwidth_kbps)
+        endpoint = 'http://127.0.0.1:8089'
+
+    api_key = Config.GEMINI_API_KEY or 'stub'
+    model = Config.GEMINI_VISION_MODEL
+    variants = [
+        ('original (q95, full size)', GeminiVisionClient(api_key, model, endpoint, max_edge=0, quality=95)),
+        (f"bounded ({Config.GEMINI_IMAGE_FORMAT} q{Config.GEMINI_IMAGE_QUALITY}, {Config.GEMINI_IMAGE_MAX_EDGE}px)",
+         GeminiVisionClient(api_key, model, endpoint, max_edge=Config.GEMINI_IMAGE_MAX_EDGE,
+                            image_format=Config.GEMINI_IMAGE_FORMAT, quality=Config.GEMINI_IMAGE_QUALITY)),
+    ]
+
+    print(f"\n--- Gemini request size/latency ({image.shape[1]}x{image.shape[0]}, {endpoint}) ---")
+    for name, client in variants:
+        avg_bytes, lat = run(client, image, args.count)
+        print(f"{name:40s} {avg_bytes / 1024:8.1f} KB  mean {lat.mean():7.0f} ms  p95 {np.percentile(lat, 95):7.0f} ms")
+
+    if server:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
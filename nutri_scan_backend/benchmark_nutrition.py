@@ -0,0 +1,69 @@
+import sys
+import os
+import time
+import argparse
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+from config import Config
+
+# Names the local table does not know, so every item needs a provider
+DISHES = [
+    'Paneer Butter Masala', 'Jeera Rice', 'Garlic Naan', 'Dal Makhani', 'Mixed Raita',
+    'Gulab Jamun', 'Chole Bhature', 'Masala Dosa', 'Sambar', 'Coconut Chutney',
+]
+
+def per_item(service, items):
+    """The old path: one provider round-trip per item, one after another"""
+    for item in items:
+        service.get_nutrition_data(item['name'], item['quantity'])
+
+def fan_out(service, items):
+    """Per-item lookups run concurrently (the path for items that cannot be batched)"""
+    list(service._resolve_items(items, {}))
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Meal nutrition latency: sequential, concurrent and batched Groq lookups')
+    parser.add_argument('--endpoint', default='', help='Groq base URL (default: start the local stub)')
+    parser.add_argument('--sizes', default='3,5,10', help='meal sizes (items) to compare')
+    args = parser.parse_args()
+
+    server = None
+    if not args.endpoint:
+        from nutrition_stub_server import start_server
+        server = start_server(port=8090)
+        args.endpoint = 'http://127.0.0.1:8090'
+    Config.GROQ_API_BASE = args.endpoint
+    Config.GROQ_API_KEY = Config.GROQ_API_KEY or 'stub'
+    Config.NUTRITION_CACHE_MONGO = False
+
+    from services.nutrition import NutritionService
+    from services.nutrition_cache import nutrition_cache
+    service = NutritionService()
+
+    print(f"--- Meal nutrition lookups against {args.endpoint} ---")
+    print(f"{'items':>5} {'sequential ms':>14} {'concurrent ms':>14} {'batched ms':>11} {'saved ms':>9}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        items = [{'name': DISHES[i % len(DISHES)], 'quantity': 100 + 10 * i} for i in range(size)]
+
+        nutrition_cache.clear()
+        sequential_ms = timed(per_item, service, items)
+        nutrition_cache.clear()
+        concurrent_ms = timed(fan_out, service, items)
+        nutrition_cache.clear()
+        batched_ms = timed(service.get_multiple_foods_nutrition, items)
+
+        print(f"{size:>5} {sequential_ms:>14.0f} {concurrent_ms:>14.0f} {batched_ms:>11.0f} "
+              f"{sequential_ms - batched_ms:>9.0f}")
+
+    if server:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+from config import Config
+from services.http_client import ProviderHTTPClient
+from nutrition_stub_server import start_server
+
+def run(fetch, names, concurrency):
+    """Fetch every name from `concurrency` threads; returns (ok count, latencies ms)"""
+    def one(name):
+        start = time.perf_counter()
+        try:
+            ok = fetch(name).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return ok, (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, names))
+    return sum(ok for ok, _ in results), np.array([ms for _, ms in results])
+
+def main():
+    parser = argparse.ArgumentParser(description='Edamam lookups: fresh connections vs the pooled, retrying client')
+    parser.add_argument('--endpoint', default='', help='Edamam base URL (default: start the local stub)')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--fail-rate', type=float, default=0.05)
+    parser.add_argument('--slow-rate', type=float, default=0.02)
+    args = parser.parse_args()
+
+    server = None
+    if not args.endpoint:
+        server = start_server(port=8091, fail_rate=args.fail_rate, slow_rate=args.slow_rate, slow_ms=5000)
+        args.endpoint = 'http://127.0.0.1:8091'
+    url = f"{args.endpoint}/api/food-database/v2/parser"
+    names = [f"food {i % 50}" for i in range(args.requests)]
+
+    def fresh(name):
+        # The old path: new connection per call, one 10 s timeout, no retries
+        return requests.get(url, params={'q': name}, timeout=10)
+
+    client = ProviderHTTPClient(
+        'edamam', pool_size=args.concurrency,
+        connect_timeout=Config.PROVIDER_CONNECT_TIMEOUT, read_timeout=1.0,
+        max_retries=Config.PROVIDER_MAX_RETRIES, backoff=Config.PROVIDER_RETRY_BACKOFF
+    )
+
+    def pooled(name):
+        return client.get(url, params={'q': name})
+
+    print(f"--- {args.requests} Edamam lookups, {args.concurrency} threads, "
+          f"{args.fail_rate:.0%} failing / {args.slow_rate:.0%} hanging ---")
+    for label, fetch in (('fresh requests.get', fresh), ('pooled client', pooled)):
+        start = time.perf_counter()
+        ok, latencies = run(fetch, names, args.concurrency)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>18}: {ok}/{len(names)} ok, p50 {np.percentile(latencies, 50):.0f} ms, "
+              f"p95 {np.percentile(latencies, 95):.0f} ms, {len(names) / elapsed:.1f} req/s")
+    print(f"Pooled client stats: {client.get_stats()}")
+
+    if server:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+def memory_kb(pid='self'):
+    """Rss / Pss / Private memory of a process in kB (Linux /proc)"""
+    stats = {}
+    path = f"/proc/{pid}/smaps_rollup"
+    if not os.path.exists(path):
+        return stats
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:', 'Private_Clean:', 'Private_Dirty:'):
+                stats[parts[0].rstrip(':')] = int(parts[1])
+    stats['Private'] = stats.pop('Private_Clean', 0) + stats.pop('Private_Dirty', 0)
+    return stats
+
+def fmt(stats):
+    return ", ".join(f"{k} {v / 1024:.0f} MB" for k, v in stats.items()) or "n/a (no /proc)"
+
+def fork_worker(boot):
+    """Fork a simulated gunicorn worker, run boot() in it and time its first request"""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        start = time.perf_counter()
+        service = boot()
+        boot_time = time.perf_counter() - start
+        start = time.perf_counter()
+        service._predict_batch([np.zeros((480, 640, 3), dtype=np.uint8)])
+        first_request = time.perf_counter() - start
+        os.write(write_fd, f"{boot_time} {first_request}\n".encode())
+        os.close(write_fd)
+        time.sleep(1)  # let the parent read /proc/<pid>
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as r:
+        boot_time, first_request = map(float, r.readline().split())
+    memory = memory_kb(pid)
+    os.waitpid(pid, 0)
+    return boot_time, first_request, memory
+
+def main():
+    print("--- Model Lifecycle: startup time and per-worker memory ---")
+
+    start = time.perf_counter()
+    import app  # noqa: F401  (lazy: must not load YOLO)
+    from services.food_detection import FoodDetectionService, food_detection_service
+    print(f"Import app.py:        {time.perf_counter() - start:.2f}s  "
+          f"(model loaded: {food_detection_service._model is not None})")
+
+    # Before: every worker loads its own copy and pays graph init on its first request
+    def own_copy():
+        service = FoodDetectionService()
+        service.preload()
+        return service
+    boot, first, memory = fork_worker(own_copy)
+    print("\nBefore (each worker loads its own model, no warm-up):")
+    print(f"  worker boot {boot:.2f}s, first request {first * 1000:.0f} ms")
+    print(f"  worker memory: {fmt(memory)}")
+
+    # After: weights preloaded in the master, warm-up in each worker after fork
+    start = time.perf_counter()
+    food_detection_service.preload()
+    print(f"\nPreload in master:    {time.perf_counter() - start:.2f}s  ({fmt(memory_kb())})")
+
+    def shared():
+        food_detection_service.warm_up()
+        return food_detection_service
+    boot, first, memory = fork_worker(shared)
+    print("After (preloaded in master, warmed up per worker):")
+    print(f"  worker boot {boot:.2f}s, first request {first * 1000:.0f} ms")
+    print(f"  worker memory: {fmt(memory)}")
+    print("\n'Private' is what each additional worker costs; the rest of Rss is shared with the master.")
+
+if __name__ == '__main__':
+    main()
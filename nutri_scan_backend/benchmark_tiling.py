@@ -0,0 +1,50 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+from config import Config
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare single-pass and tiled YOLO latency')
+    parser.add_argument('--images', type=int, default=16)
+    parser.add_argument('--edge', type=int, default=Config.TILE_SOURCE_EDGE, help='Long edge of the test images')
+    parser.add_argument('--grid', type=int, default=Config.TILE_GRID)
+    args = parser.parse_args()
+
+    # Force tiling on every image so the ratio reflects the worst case
+    Config.TILED_INFERENCE = True
+    Config.TILE_GRID = args.grid
+    Config.TILE_MIN_EDGE = 0
+    Config.TILE_LARGE_EDGE = 1
+    Config.DETECTION_SERVER_ADDRESS = ''
+
+    from services.food_detection import FoodDetectionService
+    service = FoodDetectionService()
+    service.preload(force=True)
+    service.warm_up()
+
+    rng = np.random.default_rng(0)
+    height = args.edge * 3 // 4
+    images = [rng.integers(0, 255, (height, args.edge, 3), dtype=np.uint8) for _ in range(args.images)]
+    service._detect_with_yolo_local(images[0])  # warm-up for the tile batch shape
+    service.tile_stats = dict.fromkeys(service.tile_stats, 0)
+
+    start = time.perf_counter()
+    for img in images:
+        service._detect_with_yolo_local(img)
+    elapsed = time.perf_counter() - start
+
+    stats = service.get_tile_stats()
+    print(f"--- Tiled inference ({args.edge}x{height}, {args.grid}x{args.grid} tiles, {Config.DETECTION_BACKEND}) ---")
+    print(f"Single pass:  {stats['avg_full_pass_ms']:.1f} ms/img")
+    print(f"Tile batch:   {stats['avg_tile_pass_ms']:.1f} ms/img")
+    print(f"Tiled total:  {elapsed * 1000 / len(images):.1f} ms/img "
+          f"({stats['tiled_cost_ratio']:.2f}x a single pass)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+import sys
+import os
+import time
+import argparse
+import itertools
+import numpy as np
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+from config import Config
+from services.detection_backends import TorchBackend
+
+def measure(backend, images, repeats):
+    """Mean per-image latency in ms (after one warm-up pass)"""
+    backend([images[0]], conf=Config.YOLO_CONFIDENCE, imgsz=Config.YOLO_IMGSZ)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for img in images:
+            backend([img], conf=Config.YOLO_CONFIDENCE, imgsz=Config.YOLO_IMGSZ)
+    return (time.perf_counter() - start) * 1000 / (repeats * len(images))
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep torch CPU inference settings and print the best profile for this host')
+    parser.add_argument('--model', default='yolov8n.pt')
+    parser.add_argument('--images', type=int, default=8)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    thread_options = sorted({t for t in (1, 2, 4, 8, 16, cores) if t <= cores})
+    rng = np.random.default_rng(0)
+    # Mixed aspect ratios, as from real uploads
+    images = [rng.integers(0, 255, (480 if i % 2 else 640, 640 if i % 2 else 480, 3), dtype=np.uint8)
+              for i in range(args.images)]
+
+    print(f"--- Torch CPU tuning sweep ({args.model}, {cores} cores) ---")
+    print(f"{'threads':>7} {'workers':>7} {'fuse':>5} {'ch_last':>7} {'fixed':>5} {'ms/img':>8} {'host img/s':>10}")
+
+    results = []
+    for fuse, channels_last, fixed_shape in itertools.product((False, True), repeat=3):
+        backend = TorchBackend(args.model, intra_op_threads=1, inter_op_threads=1,
+                               fuse=fuse, channels_last=channels_last, fixed_shape=fixed_shape)
+        for threads in thread_options:
+            backend.intra_op_threads = threads
+            backend._configure_threads()
+            latency = measure(backend, images, args.repeats)
+            # Workers that fit on this host at this thread count, each serving one image at a time
+            workers = max(1, cores // threads)
+            throughput = workers * 1000 / latency
+            results.append((throughput, latency, threads, workers, fuse, channels_last, fixed_shape))
+            print(f"{threads:>7} {workers:>7} {str(fuse):>5} {str(channels_last):>7} {str(fixed_shape):>5} "
+                  f"{latency:>8.1f} {throughput:>10.1f}")
+
+    throughput, latency, threads, workers, fuse, channels_last, fixed_shape = max(results)
+    print("\nBest configuration for this host:")
+    print(f"  WEB_CONCURRENCY={workers}")
+    print(f"  INFERENCE_INTRA_OP_THREADS={threads}")
+    print(f"  TORCH_FUSE={str(fuse).lower()}")
+    print(f"  TORCH_CHANNELS_LAST={str(channels_last).lower()}")
+    print(f"  YOLO_FIXED_SHAPE={str(fixed_shape).lower()}")
+    print(f"  -> {latency:.1f} ms/img per worker, ~{throughput:.1f} img/s for the host")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+import sys
+import os
+import time
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+from config import Config
+from services.food_detection import food_detection_service
+
+# Builds the ONNX (and, with QUANTIZE_INT8=true, INT8) models that the
+# onnxruntime / openvino backends load, e.g. as a deploy build step:
+#     DETECTION_BACKEND=onnxruntime QUANTIZE_INT8=true python build_detection_models.py
+# gunicorn runs the same build in the master (on_starting) if it is missing.
+
+def main():
+    if Config.DETECTION_BACKEND == 'torch':
+        print("DETECTION_BACKEND=torch needs no build step.")
+        return
+    start = time.perf_counter()
+    for path in food_detection_service.build_models():
+        print(f"Ready: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -11,7 +11,158 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 86400))
     NUTRITION_API_KEY = os.getenv('NUTRITION_API_KEY', '')
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+    # Groq base URL override (e.g. nutrition_stub_server.py for offline benchmarks)
+    GROQ_API_BASE = os.getenv('GROQ_API_BASE', '')
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+    GEMINI_VISION_MODEL = os.getenv('GEMINI_VISION_MODEL', 'gemini-flash-latest')
+    # Point at a local stand-in (gemini_stub_server.py) for offline benchmarks
+    GEMINI_API_BASE = os.getenv('GEMINI_API_BASE', 'https://generativelanguage.googleapis.com')
+    GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', 30))
+    # Images sent to Gemini are downscaled to this long edge and re-encoded
+    GEMINI_IMAGE_MAX_EDGE = int(os.getenv('GEMINI_IMAGE_MAX_EDGE', 1024))
+    GEMINI_IMAGE_FORMAT = os.getenv('GEMINI_IMAGE_FORMAT', 'jpeg').lower()
+    GEMINI_IMAGE_QUALITY = int(os.getenv('GEMINI_IMAGE_QUALITY', 85))
     UPLOAD_FOLDER = 'uploads'
     MAX_UPLOAD_SIZE = 16 * 1024 * 1024  # 16MB
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+    # YOLO inference
+    YOLO_CONFIDENCE = float(os.getenv('YOLO_CONFIDENCE', 0.15))
+    # Model input size; uploads are decoded/resized straight to this long edge
+    YOLO_IMGSZ = int(os.getenv('YOLO_IMGSZ', 640))
+    # Micro-batching: concurrent requests are collected for up to MAX_WAIT_MS
+    # and run as a single forward pass of at most MAX_BATCH_SIZE images.
+    # Set YOLO_MAX_BATCH_SIZE=1 to run every request inline (batch-1).
+    YOLO_MAX_BATCH_SIZE = int(os.getenv('YOLO_MAX_BATCH_SIZE', 8))
+    YOLO_MAX_BATCH_WAIT_MS = float(os.getenv('YOLO_MAX_BATCH_WAIT_MS', 5))
+
+    # Keep a copy of each original upload in UPLOAD_FOLDER (written off the request path)
+    ARCHIVE_UPLOADS = os.getenv('ARCHIVE_UPLOADS', 'true').lower() == 'true'
+
+    # Model lifecycle under gunicorn (see gunicorn.conf.py)
+    YOLO_PRELOAD = os.getenv('YOLO_PRELOAD', 'true').lower() == 'true'
+    YOLO_WARMUP = os.getenv('YOLO_WARMUP', 'true').lower() == 'true'
+
+    # Inference backend: torch (ultralytics), onnxruntime or openvino
+    DETECTION_BACKEND = os.getenv('DETECTION_BACKEND', 'torch').lower()
+    # Static INT8 quantization for the ONNX backends, calibrated on images in CALIBRATION_DIR
+    QUANTIZE_INT8 = os.getenv('QUANTIZE_INT8', 'false').lower() == 'true'
+    CALIBRATION_DIR = os.getenv('CALIBRATION_DIR', 'calibration_images')
+    # Runtime thread pools per inference process (0 = cores / inference processes)
+    INFERENCE_INTRA_OP_THREADS = int(os.getenv('INFERENCE_INTRA_OP_THREADS', 0))
+    INFERENCE_INTER_OP_THREADS = int(os.getenv('INFERENCE_INTER_OP_THREADS', 1))
+
+    # Content-addressed detection cache (in-process LRU + optional shared MongoDB tier)
+    DETECTION_CACHE_SIZE = int(os.getenv('DETECTION_CACHE_SIZE', 1024))
+    DETECTION_CACHE_MONGO = os.getenv('DETECTION_CACHE_MONGO', 'false').lower() == 'true'
+    DETECTION_CACHE_TTL_DAYS = int(os.getenv('DETECTION_CACHE_TTL_DAYS', 30))
+
+    # Near-duplicate meal recognition (per-user dHash BK-tree over food_logs)
+    NEAR_DUPLICATE_ENABLED = os.getenv('NEAR_DUPLICATE_ENABLED', 'true').lower() == 'true'
+    NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv('NEAR_DUPLICATE_MAX_DISTANCE', 6))
+    MEAL_INDEX_MAX_USERS = int(os.getenv('MEAL_INDEX_MAX_USERS', 1000))
+    MEAL_INDEX_REFRESH_SECONDS = int(os.getenv('MEAL_INDEX_REFRESH_SECONDS', 300))
+
+    # Async scan jobs (POST /api/food/upload?async=1)
+    SCAN_JOB_WORKERS = int(os.getenv('SCAN_JOB_WORKERS', 2))
+    SCAN_JOB_QUEUE_LIMIT = int(os.getenv('SCAN_JOB_QUEUE_LIMIT', 16))
+    SCAN_JOB_TIMEOUT_SECONDS = int(os.getenv('SCAN_JOB_TIMEOUT_SECONDS', 300))
+
+    # Detection strategy: 'sequential' (Gemini, then YOLO on failure) or 'hedged'
+    # (Gemini and YOLO in parallel; Gemini wins only within GEMINI_DEADLINE_MS)
+    DETECTION_MODE = os.getenv('DETECTION_MODE', 'sequential').lower()
+    GEMINI_DEADLINE_MS = float(os.getenv('GEMINI_DEADLINE_MS', 2500))
+    GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', 8))
+
+    # YOLO cascade: run the nano model on every image and escalate to CASCADE_MODEL
+    # (e.g. yolov8s.pt / yolov8m.pt / yolov8x.pt) only when no food box reaches
+    # CASCADE_CONFIDENCE or the top boxes disagree. Empty = disabled.
+    CASCADE_MODEL = os.getenv('CASCADE_MODEL', '')
+    CASCADE_CONFIDENCE = float(os.getenv('CASCADE_CONFIDENCE', 0.5))
+    CASCADE_DISAGREEMENT_MARGIN = float(os.getenv('CASCADE_DISAGREEMENT_MARGIN', 0.1))
+
+    # Out-of-process detection (detection_server.py). When set, web workers hand
+    # frames to the detection pool through shared memory instead of loading YOLO.
+    DETECTION_SERVER_ADDRESS = os.getenv('DETECTION_SERVER_ADDRESS', '')
+    # Required with DETECTION_SERVER_ADDRESS: the connection unpickles what it
+    # receives, so the key must be a private secret (no default)
+    DETECTION_SERVER_AUTHKEY = os.getenv('DETECTION_SERVER_AUTHKEY', '')
+    DETECTION_SERVER_TIMEOUT = float(os.getenv('DETECTION_SERVER_TIMEOUT', 30))
+    DETECTION_WORKERS = int(os.getenv('DETECTION_WORKERS', 0))  # 0 = one per core
+    DETECTION_RING_SLOTS = int(os.getenv('DETECTION_RING_SLOTS', 8))
+
+    # gunicorn worker count (also used to split CPU threads between workers)
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 2))
+    # Request threads per gunicorn worker (gthread). YOLO micro-batching only
+    # forms batches larger than 1 when a worker serves concurrent requests.
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 4))
+
+    # Torch CPU tuning profile (see benchmark_torch_tuning.py)
+    TORCH_FUSE = os.getenv('TORCH_FUSE', 'true').lower() == 'true'
+    TORCH_CHANNELS_LAST = os.getenv('TORCH_CHANNELS_LAST', 'false').lower() == 'true'
+    # Always letterbox to YOLO_IMGSZ x YOLO_IMGSZ so input shapes stay constant
+    YOLO_FIXED_SHAPE = os.getenv('YOLO_FIXED_SHAPE', 'true').lower() == 'true'
+
+    # Sliced (tiled) inference for large multi-dish plates. When enabled, uploads
+    # are kept at TILE_SOURCE_EDGE and YOLO also runs on a TILE_GRID x TILE_GRID
+    # grid of overlapping tiles, batched, when the first pass looks incomplete.
+    TILED_INFERENCE = os.getenv('TILED_INFERENCE', 'false').lower() == 'true'
+    TILE_SOURCE_EDGE = int(os.getenv('TILE_SOURCE_EDGE', 1280))
+    TILE_GRID = int(os.getenv('TILE_GRID', 2))
+    TILE_OVERLAP = float(os.getenv('TILE_OVERLAP', 0.2))
+    # Cost guard: never tile below TILE_MIN_EDGE; tile when the first pass finds
+    # fewer than TILE_MIN_ITEMS food items, or always from TILE_LARGE_EDGE (0 = off)
+    TILE_MIN_EDGE = int(os.getenv('TILE_MIN_EDGE', 960))
+    TILE_MIN_ITEMS = int(os.getenv('TILE_MIN_ITEMS', 3))
+    TILE_LARGE_EDGE = int(os.getenv('TILE_LARGE_EDGE', 0))
+    TILE_NMS_IOU = float(os.getenv('TILE_NMS_IOU', 0.5))
+    # Long edge uploads are decoded/resized to before detection
+    DETECTION_INPUT_EDGE = max(YOLO_IMGSZ, TILE_SOURCE_EDGE) if TILED_INFERENCE else YOLO_IMGSZ
+    # Uploads are decoded at a size that also serves the Gemini path; YOLO gets
+    # its own copy resized to DETECTION_INPUT_EDGE
+    UPLOAD_DECODE_EDGE = max(DETECTION_INPUT_EDGE, GEMINI_IMAGE_MAX_EDGE) if GEMINI_API_KEY else DETECTION_INPUT_EDGE
+
+    # Local memory-mapped nutrient database (built by import_nutrient_db.py)
+    NUTRIENT_DB_PATH = os.getenv('NUTRIENT_DB_PATH', os.path.join('data', 'nutrients.ndb'))
+
+    # Food-name resolution (services/food_names.py): matches at or above
+    # FOOD_NAME_MIN_CONFIDENCE are answered locally without any provider call;
+    # the fallback path accepts weaker matches before the generic default.
+    FOOD_NAME_MIN_CONFIDENCE = float(os.getenv('FOOD_NAME_MIN_CONFIDENCE', 0.8))
+    FOOD_NAME_FALLBACK_CONFIDENCE = float(os.getenv('FOOD_NAME_FALLBACK_CONFIDENCE', 0.6))
+
+    # Per-100g nutrition cache (in-process LRU with TTL + optional shared MongoDB tier)
+    NUTRITION_CACHE_SIZE = int(os.getenv('NUTRITION_CACHE_SIZE', 4096))
+    NUTRITION_CACHE_TTL_SECONDS = int(os.getenv('NUTRITION_CACHE_TTL_SECONDS', 7 * 86400))
+    NUTRITION_CACHE_MONGO = os.getenv('NUTRITION_CACHE_MONGO', 'false').lower() == 'true'
+
+    # Concurrent per-item nutrition lookups: pool size per worker and the most
+    # in-flight calls allowed to each provider
+    NUTRITION_FANOUT_WORKERS = int(os.getenv('NUTRITION_FANOUT_WORKERS', 8))
+    NUTRITION_GROQ_CONCURRENCY = int(os.getenv('NUTRITION_GROQ_CONCURRENCY', 4))
+    NUTRITION_EDAMAM_CONCURRENCY = int(os.getenv('NUTRITION_EDAMAM_CONCURRENCY', 4))
+
+    # Nutrition provider HTTP (services/http_client.py): keep-alive pools per
+    # worker (0 = NUTRITION_FANOUT_WORKERS connections per host), split
+    # timeouts and jittered retries for idempotent failures
+    EDAMAM_API_BASE = os.getenv('EDAMAM_API_BASE', 'https://api.edamam.com')
+    PROVIDER_POOL_SIZE = int(os.getenv('PROVIDER_POOL_SIZE', 0))
+    PROVIDER_CONNECT_TIMEOUT = float(os.getenv('PROVIDER_CONNECT_TIMEOUT', 3.05))
+    PROVIDER_READ_TIMEOUT = float(os.getenv('PROVIDER_READ_TIMEOUT', 10))
+    PROVIDER_MAX_RETRIES = int(os.getenv('PROVIDER_MAX_RETRIES', 2))
+    PROVIDER_RETRY_BACKOFF = float(os.getenv('PROVIDER_RETRY_BACKOFF', 0.2))
+
+    # Nutrition provider router: per-lookup latency budget, rolling window size
+    # and circuit breaker (opens after N consecutive failures or at an error rate)
+    NUTRITION_LATENCY_BUDGET_MS = float(os.getenv('NUTRITION_LATENCY_BUDGET_MS', 4000))
+    PROVIDER_WINDOW_SIZE = int(os.getenv('PROVIDER_WINDOW_SIZE', 50))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+    BREAKER_ERROR_RATE = float(os.getenv('BREAKER_ERROR_RATE', 0.5))
+    BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', 30))
+
+    # Single-flight provider lookups (services/single_flight.py): concurrent
+    # lookups of one food share a call; with the MongoDB cache tier, workers
+    # coordinate through a lease in `nutrition_leases` and poll for the result
+    NUTRITION_SINGLE_FLIGHT_MONGO = os.getenv('NUTRITION_SINGLE_FLIGHT_MONGO', 'true').lower() == 'true'
+    NUTRITION_LEASE_SECONDS = float(os.getenv('NUTRITION_LEASE_SECONDS', 6))
+    NUTRITION_LEASE_POLL_MS = float(os.getenv('NUTRITION_LEASE_POLL_MS', 50))
@@ -1,22 +1,30 @@
 from pymongo import MongoClient
 from config import Config
 import os
+import threading
 
 class Database:
+    """
+    MongoDB handle shared by the app. The client is created on first use in
+    each process: PyMongo clients are not fork-safe, so a gunicorn master that
+    preloads the app must not hand its client to the forked workers.
+    """
     _instance = None
     _client = None
     _db = None
+    _pid = None
+    _lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(Database, cls).__new__(cls)
-            cls._instance._connect()
         return cls._instance
 
     def _connect(self):
         try:
             self._client = MongoClient(Config.MONGODB_URI)
             self._db = self._client[Config.DATABASE_NAME]
+            self._pid = os.getpid()
             print(f"Connected to MongoDB: {Config.DATABASE_NAME}")
         except Exception as e:
             print(f"Error connecting to MongoDB: {e}")
@@ -24,31 +32,54 @@ class Database:
 
     @property
     def db(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    # A client inherited across fork is abandoned, not closed (closing it could disturb the parent's sockets)
+                    self._connect()
         return self._db
 
     @property
     def users(self):
-        return self._db.users
+        return self.db.users
 
     @property
     def profiles(self):
-        return self._db.profiles
+        return self.db.profiles
 
     @property
     def food_logs(self):
-        return self._db.food_logs
+        return self.db.food_logs
 
     @property
     def daily_reports(self):
-        return self._db.daily_reports
+        return self.db.daily_reports
 
     @property
     def diet_plans(self):
-        return self._db.diet_plans
+        return self.db.diet_plans
+
+    @property
+    def detection_cache(self):
+        return self.db.detection_cache
+
+    @property
+    def scan_jobs(self):
+        return self.db.scan_jobs
+
+    @property
+    def nutrition_cache(self):
+        return self.db.nutrition_cache
+
+    @property
+    def nutrition_leases(self):
+        return self.db.nutrition_leases
 
     def close(self):
-        if self._client:
+        if self._client and self._pid == os.getpid():
             self._client.close()
+        self._client = None
+        self._db = None
 
-# Initialize database connection
+# Database handle (connects lazily, once per process)
 db = Database()
@@ -0,0 +1,63 @@
+import sys
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import Listener
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+from config import Config
+from services.detection_workers import parse_address, require_authkey, init_worker, detect_in_worker
+
+# Dedicated YOLO detection pool.
+# Web workers (with DETECTION_SERVER_ADDRESS set) copy decoded frames into their
+# shared-memory rings and send (ring, offset, shape); a pool of DETECTION_WORKERS
+# processes, each holding the model, runs the detection.
+#     DETECTION_SERVER_ADDRESS=/tmp/nutri_detect.sock DETECTION_SERVER_AUTHKEY=<secret> python detection_server.py
+
+def serve_connection(conn, executor):
+    """One web-worker slot connection: requests are handled strictly in order"""
+    with conn:
+        while True:
+            try:
+                command, ring_name, offset, shape = conn.recv()
+            except (EOFError, OSError):
+                return
+            if command != 'detect':
+                conn.send(('error', f"Unknown command {command}"))
+                continue
+            try:
+                detections = executor.submit(detect_in_worker, ring_name, offset, shape).result()
+                conn.send(('ok', detections))
+            except Exception as e:
+                conn.send(('error', str(e)))
+
+def main():
+    try:
+        authkey = require_authkey(Config.DETECTION_SERVER_AUTHKEY)
+    except ValueError as e:
+        sys.exit(str(e))
+    address = Config.DETECTION_SERVER_ADDRESS or '/tmp/nutri_detect.sock'
+    workers = Config.DETECTION_WORKERS or os.cpu_count() or 1
+    parsed = parse_address(address)
+    if isinstance(parsed, str) and os.path.exists(parsed):
+        os.remove(parsed)
+
+    # spawn: detection processes start clean instead of inheriting this process's state
+    context = multiprocessing.get_context('spawn')
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker)
+
+    with Listener(parsed, authkey=authkey) as listener:
+        print(f"Detection server listening on {address} with {workers} worker processes")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                print(f"Rejected detection client: {e}")
+                continue
+            threading.Thread(target=serve_connection, args=(conn, executor), daemon=True).start()
+
+if __name__ == '__main__':
+    main()
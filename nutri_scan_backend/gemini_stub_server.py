@@ -0,0 +1,57 @@
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the Gemini generateContent endpoint.
+# Latency = fixed model time + upload time at a simulated bandwidth, so the
+# effect of smaller image payloads can be measured offline:
+#     python gemini_stub_server.py --port 8089
+#     GEMINI_API_BASE=http://127.0.0.1:8089 GEMINI_API_KEY=stub python app.py
+
+CANNED_ITEMS = [
+    {"name": "Rice", "quantity": 150},
+    {"name": "Chicken Curry", "quantity": 200},
+    {"name": "Cucumber Slice", "quantity": 20}
+]
+
+def make_handler(model_ms, bandwidth_kbps):
+    class GeminiStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            self.rfile.read(length)
+            upload_seconds = (length * 8 / 1000) / bandwidth_kbps if bandwidth_kbps else 0
+            time.sleep(model_ms / 1000 + upload_seconds)
+
+            body = json.dumps({
+                'candidates': [{'content': {'parts': [{'text': json.dumps(CANNED_ITEMS)}]}}]
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return GeminiStubHandler
+
+def start_server(port=8089, model_ms=400, bandwidth_kbps=8000):
+    """Start the stub in a background thread; returns the server (call shutdown() to stop)"""
+    import threading
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(model_ms, bandwidth_kbps))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local Gemini generateContent stand-in')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--model-ms', type=float, default=400, help='simulated model latency')
+    parser.add_argument('--bandwidth-kbps', type=float, default=8000, help='simulated uplink bandwidth')
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(args.model_ms, args.bandwidth_kbps))
+    print(f"Gemini stub listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
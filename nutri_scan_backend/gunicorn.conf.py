@@ -0,0 +1,34 @@
+import os
+from config import Config
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = Config.WEB_CONCURRENCY
+# Threaded workers: concurrent requests in one worker share the YOLO batcher,
+# which can only form batches from requests that are in flight together
+worker_class = 'gthread'
+threads = Config.WEB_THREADS
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Import the app (and the YOLO weights) once in the master so forked
+# workers share the weight pages copy-on-write. Nothing opens a MongoDB
+# client at import time: each worker connects on first use (database.py).
+preload_app = Config.YOLO_PRELOAD
+
+def on_starting(server):
+    """Load YOLO weights and nutrition lookup tables in the master before any worker is forked"""
+    from services.food_detection import food_detection_service
+    # ONNX export / INT8 calibration happen here, once, never inside a request
+    food_detection_service.build_models()
+    if not Config.YOLO_PRELOAD:
+        return
+    food_detection_service.preload()
+    from services.nutrition import nutrition_service
+    # Maps the nutrient database and builds the food-name index once, shared copy-on-write
+    nutrition_service.name_index
+
+def post_fork(server, worker):
+    """Warm up inference in each worker (torch thread pools must start after fork)"""
+    if not Config.YOLO_WARMUP:
+        return
+    from services.food_detection import food_detection_service
+    food_detection_service.warm_up()
@@ -0,0 +1,102 @@
+import sys
+import os
+import csv
+import json
+import time
+import argparse
+
+# Add current directory to path so imports work
+sys.path.append(os.getcwd())
+
+from config import Config
+from services.nutrient_db import FDC_NUTRIENT_IDS, NutrientDatabase, write_database
+
+# Builds the memory-mapped nutrient database (Config.NUTRIENT_DB_PATH) from a
+# USDA FoodData Central download, either the CSV release directory
+# (food.csv + food_nutrient.csv) or a JSON release file, e.g.
+#     python import_nutrient_db.py FoodData_Central_csv_2024-04-18/
+#     python import_nutrient_db.py FoodData_Central_foundation_food_json_2024-04-18.json
+
+DEFAULT_DATA_TYPES = ('foundation_food', 'sr_legacy_food', 'survey_fndds_food')
+
+# nutrient id -> (column, priority); lower priority wins when a food has several
+NUTRIENT_COLUMNS = {
+    nutrient_id: (column, priority)
+    for column, ids in FDC_NUTRIENT_IDS.items()
+    for priority, nutrient_id in enumerate(ids)
+}
+
+def _set_value(values, priorities, nutrient_id, amount):
+    mapped = NUTRIENT_COLUMNS.get(nutrient_id)
+    if mapped is None or amount in (None, ''):
+        return
+    column, priority = mapped
+    if priority < priorities.get(column, len(FDC_NUTRIENT_IDS[column])):
+        values[column] = float(amount)
+        priorities[column] = priority
+
+def read_fdc_csv(directory, data_types):
+    """Yield (fdc_id, description, values) from an FDC CSV release directory"""
+    foods = {}
+    with open(os.path.join(directory, 'food.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if not data_types or row['data_type'] in data_types:
+                foods[row['fdc_id']] = row['description']
+    print(f"{len(foods)} foods selected from food.csv")
+
+    values = {fdc_id: {} for fdc_id in foods}
+    priorities = {fdc_id: {} for fdc_id in foods}
+    with open(os.path.join(directory, 'food_nutrient.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            fdc_id = row['fdc_id']
+            if fdc_id in values:
+                _set_value(values[fdc_id], priorities[fdc_id], int(row['nutrient_id']), row['amount'])
+
+    for fdc_id, description in foods.items():
+        if values[fdc_id]:
+            yield fdc_id, description, values[fdc_id]
+
+def read_fdc_json(path):
+    """Yield (fdc_id, description, values) from an FDC JSON release file"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    # {"FoundationFoods": [...]} / {"SRLegacyFoods": [...]} / ...
+    foods = next(iter(data.values())) if isinstance(data, dict) else data
+    for food in foods:
+        values, priorities = {}, {}
+        for entry in food.get('foodNutrients', []):
+            nutrient = entry.get('nutrient', {})
+            _set_value(values, priorities, nutrient.get('id'), entry.get('amount'))
+        if values:
+            yield food.get('fdcId'), food.get('description', ''), values
+
+def main():
+    parser = argparse.ArgumentParser(description='Import USDA FoodData Central into the local nutrient database')
+    parser.add_argument('source', help='FDC CSV release directory or JSON release file')
+    parser.add_argument('-o', '--output', default=Config.NUTRIENT_DB_PATH)
+    parser.add_argument('--data-types', default=','.join(DEFAULT_DATA_TYPES),
+                        help="Comma-separated FDC data types to keep from food.csv ('' = all, including branded)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if os.path.isdir(args.source):
+        data_types = {t for t in args.data_types.split(',') if t}
+        records = read_fdc_csv(args.source, data_types)
+    else:
+        records = read_fdc_json(args.source)
+    count = write_database(args.output, records)
+    print(f"Wrote {count} foods to {args.output} ({os.path.getsize(args.output) / 1024 / 1024:.1f} MB) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    # Sanity check: reopen and time lookups of every 97th name
+    db = NutrientDatabase(args.output)
+    names = [db.name(i) for i in range(0, len(db), 97)]
+    if names:
+        start = time.perf_counter()
+        for name in names:
+            db.lookup(name, 150)
+        per_lookup_us = (time.perf_counter() - start) * 1e6 / len(names)
+        print(f"Lookup: {per_lookup_us:.1f} us/item, e.g. {db.lookup(names[0])}")
+
+if __name__ == '__main__':
+    main()
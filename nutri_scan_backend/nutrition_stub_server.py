@@ -0,0 +1,118 @@
+import re
+import json
+import time
+import zlib
+import random
+import argparse
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the nutrition providers: Groq chat completions and the
+# Edamam food-database parser.
+# Groq latency = fixed model time + output time per food, so single-item and
+# batched lookups can be compared offline. Edamam can be made slow and flaky
+# (--fail-rate / --slow-rate) to exercise timeouts and retries:
+#     python nutrition_stub_server.py --port 8090 --fail-rate 0.1
+#     GROQ_API_BASE=http://127.0.0.1:8090 GROQ_API_KEY=stub python app.py
+#     EDAMAM_API_BASE=http://127.0.0.1:8090 EDAMAM_APP_ID=stub EDAMAM_APP_KEY=stub python app.py
+
+ITEMS_PATTERN = re.compile(r'\[\{"id".*?\}\]')
+NAME_PATTERN = re.compile(r"grams of '(.+?)'")
+
+def fake_nutrition(name):
+    """Deterministic per-100g values for any food name"""
+    seed = zlib.crc32(name.lower().encode())
+    return {
+        'calories': 50 + seed % 400, 'protein': round(seed % 300 / 10, 1), 'carbs': round(seed % 500 / 10, 1),
+        'fat': round(seed % 200 / 10, 1), 'fiber': round(seed % 50 / 10, 1), 'sugar': round(seed % 100 / 10, 1),
+        'sodium': seed % 600, 'calcium': seed % 150, 'iron': round(seed % 40 / 10, 1),
+        'vitamin_c': seed % 60, 'vitamin_a': seed % 300
+    }
+
+# Our nutrient keys -> Edamam nutrient codes
+EDAMAM_CODES = {
+    'calories': 'ENERC_KCAL', 'protein': 'PROCNT', 'carbs': 'CHOCDF', 'fat': 'FAT', 'fiber': 'FIBTG',
+    'sugar': 'SUGAR', 'sodium': 'NA', 'calcium': 'CA', 'iron': 'FE', 'vitamin_c': 'VITC', 'vitamin_a': 'VITA_RAE'
+}
+
+def make_handler(model_ms, per_item_ms, edamam_ms=80, fail_rate=0.0, slow_rate=0.0, slow_ms=15000):
+    class NutritionStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path != '/api/food-database/v2/parser':
+                self._send_json(404, {'error': 'not found'})
+                return
+            roll = random.random()
+            if roll < fail_rate:
+                time.sleep(edamam_ms / 1000)
+                self._send_json(503, {'error': 'simulated outage'})
+                return
+            # Slow responses outlast a sensible read timeout
+            time.sleep((slow_ms if roll < fail_rate + slow_rate else edamam_ms) / 1000)
+
+            name = parse_qs(url.query).get('q', ['food'])[0]
+            nutrients = {EDAMAM_CODES[k]: v for k, v in fake_nutrition(name).items()}
+            self._send_json(200, {'text': name, 'hints': [{'food': {'label': name, 'nutrients': nutrients}}]})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            prompt = request.get('messages', [{}])[-1].get('content', '')
+
+            batch = ITEMS_PATTERN.search(prompt)
+            if batch:
+                items = json.loads(batch.group(0))
+                content = {'items': [dict(fake_nutrition(item['name']), id=item['id']) for item in items]}
+            else:
+                match = NAME_PATTERN.search(prompt)
+                items = [None]
+                content = fake_nutrition(match.group(1) if match else 'food')
+            time.sleep((model_ms + per_item_ms * len(items)) / 1000)
+
+            self._send_json(200, {
+                'id': 'stub', 'object': 'chat.completion', 'created': int(time.time()),
+                'model': request.get('model', 'stub'),
+                'choices': [{
+                    'index': 0, 'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': json.dumps(content)}
+                }],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return NutritionStubHandler
+
+def start_server(port=8090, model_ms=350, per_item_ms=60, **edamam_options):
+    """Start the stub in a background thread; returns the server (call shutdown() to stop)"""
+    import threading
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(model_ms, per_item_ms, **edamam_options))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local nutrition provider stand-in')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--model-ms', type=float, default=350, help='simulated fixed latency per request')
+    parser.add_argument('--per-item-ms', type=float, default=60, help='simulated output time per food')
+    parser.add_argument('--edamam-ms', type=float, default=80, help='simulated Edamam latency')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of Edamam requests answered with 503')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='fraction of Edamam requests that hang')
+    parser.add_argument('--slow-ms', type=float, default=15000, help='latency of a hanging Edamam request')
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(
+        args.model_ms, args.per_item_ms, args.edamam_ms, args.fail_rate, args.slow_rate, args.slow_ms
+    ))
+    print(f"Nutrition stub listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
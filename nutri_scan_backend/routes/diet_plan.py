@@ -4,6 +4,7 @@ from database import db
 from utils.auth import token_required, get_current_user_id
 from services.rda import rda_service
 from services.nutrition import nutrition_service
+from services.nutrients import NutrientVector
 from geopy.geocoders import Nominatim
 import random
 
@@ -32,11 +33,9 @@ def generate_diet_plan():
                 'date': today
             }))
             
-            total_nutrition = {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0}
-            for log in today_logs:
-                n = log.get('total_nutrition', {})
-                for k in total_nutrition.keys():
-                    total_nutrition[k] += n.get(k, 0)
+            total_nutrition = NutrientVector.sum(
+                log.get('total_nutrition', {}) for log in today_logs
+            ).to_dict(rda_service.COMPARED_NUTRIENTS)
             
             rda_analysis = rda_service.compare_with_rda(total_nutrition, profile)
         
@@ -2,9 +2,14 @@ from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 import os
 from datetime import datetime
+from bson import ObjectId
+from concurrent.futures import ThreadPoolExecutor
 from database import db
 from utils.auth import token_required, get_current_user_id
 from services.food_detection import food_detection_service
+from services.detection_cache import detection_cache
+from services.meal_index import meal_index
+from services.scan_jobs import scan_job_queue
 from services.nutrition import nutrition_service
 from config import Config
 
@@ -13,10 +18,85 @@ food_bp = Blueprint('food', __name__)
 # Ensure upload directory exists
 os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
 
+# Single background writer for archiving originals off the request path
+_archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='upload-archive')
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
 
+def _write_file(filepath, data):
+    try:
+        with open(filepath, 'wb') as f:
+            f.write(data)
+    except Exception as e:
+        print(f"Error archiving upload {filepath}: {e}")
+
+def archive_upload(filename, data):
+    """Queue the original upload bytes for writing; returns the path or None if disabled"""
+    if not Config.ARCHIVE_UPLOADS:
+        return None
+    filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
+    _archive_executor.submit(_write_file, filepath, data)
+    return filepath
+
+def process_scan(user_id, image, filepath):
+    """Near-duplicate lookup, detection, nutrition and food log insert for one decoded image"""
+    # Near-duplicate of a meal this user already scanned? Reuse it and skip Gemini/YOLO
+    phash = meal_index.compute_hash(image)
+    near_duplicate = None
+    prior_log = None
+    detection_info = None
+    if Config.NEAR_DUPLICATE_ENABLED:
+        match = meal_index.find(user_id, phash)
+        if match:
+            prior_log = db.food_logs.find_one({'_id': ObjectId(match[0]), 'user_id': user_id})
+            if prior_log:
+                near_duplicate = {'matched_log_id': match[0], 'distance': match[1]}
+                print(f"Near-duplicate meal (distance {match[1]}), reusing scan {match[0]}")
+
+    if prior_log:
+        food_items = prior_log.get('detected_foods', [])
+        total_nutrition = prior_log.get('total_nutrition', {})
+    else:
+        # Detect food items
+        detected_foods, detection_info = food_detection_service.detect(image)
+
+        # Get detailed nutrition and totals
+        total_nutrition = nutrition_service.get_multiple_foods_nutrition(detected_foods)
+        food_items = [{
+            'name': f['food_name'],
+            'confidence': next((d['confidence'] for d in detected_foods if d['name'] == f['food_name']), 0.99),
+            'nutrition': f,
+            'source': next((d.get('source', 'unknown') for d in detected_foods if d['name'] == f['food_name']), 'unknown'),
+            'quantity': f['quantity']
+        } for f in total_nutrition['foods']]
+
+    # Save to food log
+    food_log = {
+        'user_id': user_id,
+        'image_path': filepath,
+        'detected_foods': food_items,
+        'total_nutrition': total_nutrition,
+        'phash': meal_index.to_hex(phash),
+        'timestamp': datetime.utcnow(),
+        'date': datetime.utcnow().date().isoformat()
+    }
+    if near_duplicate:
+        food_log['near_duplicate_of'] = near_duplicate['matched_log_id']
+
+    inserted = db.food_logs.insert_one(food_log)
+    meal_index.add(user_id, phash, str(inserted.inserted_id))
+
+    return {
+        'message': 'Food detected successfully',
+        'detected_foods': food_items,
+        'total_nutrition': total_nutrition,
+        'image_path': filepath,
+        'near_duplicate': near_duplicate,
+        'detection': detection_info
+    }
+
 @food_bp.route('/upload', methods=['POST'])
 @token_required
 def upload_food_image():
@@ -31,45 +111,32 @@ def upload_food_image():
             return jsonify({'error': 'No file selected'}), 400
         
         if file and allowed_file(file.filename):
-            # Save file
-            filename = secure_filename(f"{user_id}_{datetime.utcnow().timestamp()}_{file.filename}")
-            filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
-            file.save(filepath)
-            
-            # Preprocess image
-            preprocessed_path = food_detection_service.preprocess_image(filepath)
-            
-            # Detect food items
-            detected_foods = food_detection_service.detect_food(preprocessed_path)
+            # Decode the request stream once; everything below works on the in-memory array
+            data = file.read()
+            image = food_detection_service.decode_image(data, target_size=Config.UPLOAD_DECODE_EDGE)
+            if image is None:
+                return jsonify({'error': 'Could not decode image'}), 400
             
-            # Get detailed nutrition and totals
-            total_nutrition = nutrition_service.get_multiple_foods_nutrition(detected_foods)
-            food_items = [{
-                'name': f['food_name'],
-                'confidence': next((d['confidence'] for d in detected_foods if d['name'] == f['food_name']), 0.99),
-                'nutrition': f,
-                'source': next((d.get('source', 'unknown') for d in detected_foods if d['name'] == f['food_name']), 'unknown'),
-                'quantity': f['quantity']
-            } for f in total_nutrition['foods']]
+            # Archive the original (async, optional)
+            filename = secure_filename(f"{user_id}_{datetime.utcnow().timestamp()}_{file.filename}")
+            filepath = archive_upload(filename, data)
             
-            # Save to food log
-            food_log = {
-                'user_id': user_id,
-                'image_path': filepath,
-                'detected_foods': food_items,
-                'total_nutrition': total_nutrition,
-                'timestamp': datetime.utcnow(),
-                'date': datetime.utcnow().date().isoformat()
-            }
+            # Bound the working image; Gemini gets up to GEMINI_IMAGE_MAX_EDGE, YOLO resizes its own copy
+            image = food_detection_service.preprocess_array(image, target_size=Config.UPLOAD_DECODE_EDGE)
             
-            db.food_logs.insert_one(food_log)
+            # Async mode: hand the pipeline to the bounded job pool and return immediately
+            if request.args.get('async') in ('1', 'true'):
+                job_id = scan_job_queue.submit(user_id, process_scan, user_id, image, filepath)
+                if job_id is None:
+                    return jsonify({'error': 'Too many scans in progress, please retry shortly'}), 429
+                return jsonify({
+                    'message': 'Scan queued',
+                    'job_id': job_id,
+                    'status': 'queued',
+                    'status_url': f"/api/food/jobs/{job_id}"
+                }), 202
             
-            return jsonify({
-                'message': 'Food detected successfully',
-                'detected_foods': food_items,
-                'total_nutrition': total_nutrition,
-                'image_path': filepath
-            }), 200
+            return jsonify(process_scan(user_id, image, filepath)), 200
         
         return jsonify({'error': 'Invalid file type'}), 400
         
@@ -89,23 +156,51 @@ def detect_food():
             return jsonify({'error': 'No file selected'}), 400
         
         if file and allowed_file(file.filename):
-            # Save temporarily
-            filename = secure_filename(f"temp_{datetime.utcnow().timestamp()}_{file.filename}")
-            filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
-            file.save(filepath)
+            # Decode in memory (nothing is written to disk)
+            image = food_detection_service.decode_image(file.read(), target_size=Config.UPLOAD_DECODE_EDGE)
+            if image is None:
+                return jsonify({'error': 'Could not decode image'}), 400
             
             # Detect food
-            detected_foods = food_detection_service.detect_food(filepath)
-            
-            # Clean up temp file
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            detected_foods, detection_info = food_detection_service.detect(image)
             
             return jsonify({
-                'detected_foods': detected_foods
+                'detected_foods': detected_foods,
+                'detection': detection_info
             }), 200
         
         return jsonify({'error': 'Invalid file type'}), 400
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@food_bp.route('/cache/stats', methods=['GET'])
+@token_required
+def detection_cache_stats():
+    """Hit/miss counters of the detection result cache and near-duplicate index"""
+    return jsonify({
+        'detection_cache': detection_cache.get_stats(),
+        'meal_index': dict(meal_index.stats)
+    }), 200
+
+@food_bp.route('/jobs/<job_id>', methods=['GET'])
+@token_required
+def get_scan_job(job_id):
+    """Status (queued / running / done / failed) and result of an async scan"""
+    try:
+        user_id = get_current_user_id()
+        job = scan_job_queue.get(job_id, user_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'job': job}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@food_bp.route('/metrics', methods=['GET'])
+@token_required
+def detection_metrics():
+    """YOLO cascade escalation rate, tiling cost, per-stage timings and batching counters"""
+    return jsonify({
+        'detection': food_detection_service.get_cascade_stats(),
+        'tiling': food_detection_service.get_tile_stats()
+    }), 200
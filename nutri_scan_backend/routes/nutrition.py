@@ -2,6 +2,9 @@ from flask import Blueprint, request, jsonify
 from database import db
 from utils.auth import token_required, get_current_user_id
 from services.nutrition import nutrition_service
+from services.nutrition_cache import nutrition_cache
+from services.provider_router import provider_router
+from services.single_flight import single_flight
 from services.rda import rda_service
 from models.profile import Profile
 import json
@@ -40,6 +43,43 @@ def analyze_nutrition():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@nutrition_bp.route('/resolve', methods=['GET'])
+@token_required
+def resolve_food_name():
+    """Top matches for a free-text food name in the local nutrition data"""
+    try:
+        name = request.args.get('name', '')
+        if not name:
+            return jsonify({'error': 'No food name provided'}), 400
+        k = min(int(request.args.get('k', 5)), 20)
+
+        matches = nutrition_service.resolve_food(name, k=max(k, 2))[:k]
+        return jsonify({
+            'query': name,
+            'matches': [{'id': m['id'], 'name': m['name'], 'score': m['score']} for m in matches],
+            'local': bool(matches) and matches[0]['score'] >= Config.FOOD_NAME_MIN_CONFIDENCE
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@nutrition_bp.route('/cache/stats', methods=['GET'])
+@token_required
+def nutrition_cache_stats():
+    """Nutrition cache hit/miss counters, coalesced lookups, batched Groq requests and provider HTTP pools"""
+    return jsonify({
+        'nutrition_cache': nutrition_cache.get_stats(),
+        'single_flight': single_flight.get_stats(),
+        'groq_batches': dict(nutrition_service.batch_stats),
+        'edamam_http': nutrition_service.edamam_http.get_stats()
+    }), 200
+
+@nutrition_bp.route('/providers', methods=['GET'])
+@token_required
+def nutrition_provider_state():
+    """Circuit breaker state, rolling latency/error rate and recent transitions per provider"""
+    return jsonify({'router': provider_router.get_state()}), 200
+
 @nutrition_bp.route('/visualize', methods=['POST'])
 @token_required
 def visualize_nutrition():
@@ -3,10 +3,16 @@ from datetime import datetime, timedelta
 from database import db
 from utils.auth import token_required, get_current_user_id
 from services.rda import rda_service
+from services.nutrients import NutrientVector, nutrient_matrix
 from models.profile import Profile
 
 reports_bp = Blueprint('reports', __name__)
 
+# Nutrients totalled in daily reports
+DAILY_TOTAL_KEYS = ('calories', 'protein', 'carbs', 'fat', 'fiber', 'vitamin_a', 'vitamin_c', 'calcium', 'iron', 'sodium')
+# Nutrients totalled and averaged in weekly reports
+WEEKLY_TOTAL_KEYS = ('calories', 'protein', 'carbs', 'fat')
+
 @reports_bp.route('/daily', methods=['GET'])
 @token_required
 def get_daily_report():
@@ -20,18 +26,14 @@ def get_daily_report():
             'date': date
         }))
         
-        total_nutrition = {
-            'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0,
-            'vitamin_a': 0, 'vitamin_c': 0, 'calcium': 0, 'iron': 0, 'sodium': 0,
-            'foods_consumed': [],
-            'scans': []
-        }
+        # Daily totals of all scans in one array sum
+        totals = NutrientVector.sum(log.get('total_nutrition', {}) for log in food_logs)
+        total_nutrition = totals.to_dict(DAILY_TOTAL_KEYS)
+        total_nutrition['foods_consumed'] = []
+        total_nutrition['scans'] = []
         
         for log in food_logs:
             scan_nutrition = log.get('total_nutrition', {})
-            # Add to daily totals
-            for key in ['calories', 'protein', 'carbs', 'fat', 'fiber', 'vitamin_a', 'vitamin_c', 'calcium', 'iron', 'sodium']:
-                total_nutrition[key] += scan_nutrition.get(key, 0)
             
             # Formate time
             log_timestamp = log.get('timestamp') or log.get('created_at')
@@ -111,34 +113,34 @@ def get_weekly_report():
             }
         }))
         
-        # Calculate weekly averages
-        weekly_totals = {
-            'calories': 0,
-            'protein': 0,
-            'carbs': 0,
-            'fat': 0,
-            'days_logged': len(reports)
-        }
-        
-        for report in reports:
-            nutrition = report.get('total_nutrition', {})
-            weekly_totals['calories'] += nutrition.get('calories', 0)
-            weekly_totals['protein'] += nutrition.get('protein', 0)
-            weekly_totals['carbs'] += nutrition.get('carbs', 0)
-            weekly_totals['fat'] += nutrition.get('fat', 0)
+        # Calculate weekly totals and averages: one (days x nutrients) matrix
+        matrix = nutrient_matrix(report.get('total_nutrition', {}) for report in reports)
+        weekly_totals = NutrientVector(matrix.sum(axis=0)).to_dict(WEEKLY_TOTAL_KEYS)
+        weekly_totals['days_logged'] = len(reports)
         
+        averages = None
         if len(reports) > 0:
-            weekly_totals['avg_calories'] = round(weekly_totals['calories'] / len(reports), 2)
-            weekly_totals['avg_protein'] = round(weekly_totals['protein'] / len(reports), 2)
-            weekly_totals['avg_carbs'] = round(weekly_totals['carbs'] / len(reports), 2)
-            weekly_totals['avg_fat'] = round(weekly_totals['fat'] / len(reports), 2)
+            averages = NutrientVector(matrix.mean(axis=0)).to_dict(WEEKLY_TOTAL_KEYS)
+            for key, value in averages.items():
+                weekly_totals[f'avg_{key}'] = value
+        
+        # Every day against the profile's current targets in one batch comparison
+        profile = db.profiles.find_one({'user_id': user_id})
+        daily_rda = {}
+        average_rda = None
+        if profile and averages:
+            analyses = rda_service.compare_many((r.get('total_nutrition', {}) for r in reports), profile)
+            daily_rda = {report.get('date'): analysis for report, analysis in zip(reports, analyses)}
+            average_rda = rda_service.compare_with_rda(averages, profile)
         
         return jsonify({
             'weekly_report': {
                 'start_date': start_date.isoformat(),
                 'end_date': end_date.isoformat(),
                 'totals': weekly_totals,
-                'daily_reports': [r for r in reports]
+                'daily_reports': [r for r in reports],
+                'daily_rda_analysis': daily_rda,
+                'average_rda_analysis': average_rda
             }
         }), 200
         
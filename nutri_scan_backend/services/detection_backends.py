@@ -0,0 +1,385 @@
+import os
+import ast
+import glob
+import shutil
+import tempfile
+from contextlib import contextmanager
+import cv2
+import numpy as np
+from config import Config
+
+# Pluggable YOLO inference backends.
+# Every backend is callable like an ultralytics YOLO model:
+#     backend(sources, conf=..., imgsz=..., verbose=False) -> [result, ...]
+# and each result exposes `.names` and `.boxes` (with .cls / .conf / .xyxy),
+# so FoodDetectionService post-processes them the same way.
+
+BACKENDS = ('torch', 'onnxruntime', 'openvino')
+
+class Boxes:
+    """Minimal stand-in for ultralytics Boxes backed by NumPy arrays"""
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Boxes(self.xyxy[i:i + 1], self.conf[i:i + 1], self.cls[i:i + 1])
+
+class Result:
+    """Minimal stand-in for an ultralytics Results object"""
+    def __init__(self, boxes, names, orig_shape):
+        self.boxes = boxes
+        self.names = names
+        self.orig_shape = orig_shape
+
+def resolve_thread_counts(workers=None):
+    """
+    (intra_op, inter_op) threads for one inference process.
+    INFERENCE_INTRA_OP_THREADS=0 splits the host's cores evenly between the
+    processes that run inference (gunicorn workers, or detection_server.py
+    processes), so several workers on one host do not oversubscribe the CPU.
+    """
+    intra = Config.INFERENCE_INTRA_OP_THREADS
+    if not intra:
+        if workers is None:
+            workers = (Config.DETECTION_WORKERS or os.cpu_count()) if Config.DETECTION_SERVER_ADDRESS \
+                else Config.WEB_CONCURRENCY
+        intra = max(1, (os.cpu_count() or 1) // max(1, workers))
+    return intra, max(1, Config.INFERENCE_INTER_OP_THREADS)
+
+class TorchBackend:
+    """
+    ultralytics YOLO with a CPU tuning profile: per-process thread counts,
+    torch.inference_mode, conv-BN fusion, optional channels-last weights and a
+    fixed (square) input size so every batch has the same shape.
+    """
+    def __init__(self, model_name, intra_op_threads=None, inter_op_threads=None,
+                 fuse=True, channels_last=False, fixed_shape=True):
+        from ultralytics import YOLO
+        import torch
+        self.torch = torch
+        self.yolo = YOLO(model_name)
+        self.names = self.yolo.names
+        default_intra, default_inter = resolve_thread_counts()
+        self.intra_op_threads = intra_op_threads or default_intra
+        self.inter_op_threads = inter_op_threads or default_inter
+        self.fixed_shape = fixed_shape
+        self._pid = None
+
+        if fuse:
+            self.yolo.fuse()
+        if channels_last:
+            self.yolo.model.to(memory_format=torch.channels_last)
+
+    def _configure_threads(self):
+        # Applied lazily in the process that runs inference (i.e. after a gunicorn fork)
+        self.torch.set_num_threads(self.intra_op_threads)
+        try:
+            self.torch.set_num_interop_threads(self.inter_op_threads)
+        except RuntimeError:
+            # Only settable once, before any inter-op work has started
+            pass
+        self._pid = os.getpid()
+
+    def __call__(self, sources, conf=0.25, imgsz=640, verbose=False, **kwargs):
+        if self._pid != os.getpid():
+            self._configure_threads()
+        if self.fixed_shape:
+            # Letterbox every image to imgsz x imgsz instead of the minimal rectangle
+            kwargs.setdefault('rect', False)
+        with self.torch.inference_mode():
+            return self.yolo(sources, conf=conf, imgsz=imgsz, verbose=verbose, **kwargs)
+
+class OnnxModelBackend:
+    """
+    Runs an exported YOLOv8 ONNX graph with our own letterbox + NMS so the
+    runtime (thread pools, graph optimisations) is fully under our control.
+    Subclasses provide _create_session() and _run().
+    """
+    def __init__(self, onnx_path, names=None, intra_op_threads=0, inter_op_threads=1):
+        self.onnx_path = onnx_path
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.names = names or {}
+        self._create_session()
+
+    def __call__(self, sources, conf=0.25, imgsz=640, iou=0.7, max_det=300, verbose=False):
+        if not isinstance(sources, (list, tuple)):
+            sources = [sources]
+        images = [cv2.imread(s) if isinstance(s, str) else s for s in sources]
+
+        batch, letterboxes = [], []
+        for img in images:
+            tensor, ratio, pad = self._letterbox(img, imgsz)
+            batch.append(tensor)
+            letterboxes.append((ratio, pad))
+
+        outputs = self._run(np.stack(batch))
+        return [
+            self._postprocess(pred, img.shape[:2], ratio, pad, conf, iou, max_det)
+            for pred, img, (ratio, pad) in zip(outputs, images, letterboxes)
+        ]
+
+    @staticmethod
+    def _letterbox(img, imgsz):
+        """Resize keeping aspect ratio and pad to imgsz x imgsz (same as ultralytics LetterBox)"""
+        height, width = img.shape[:2]
+        ratio = min(imgsz / height, imgsz / width)
+        new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+        if (new_w, new_h) != (width, height):
+            img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        dw, dh = (imgsz - new_w) / 2, (imgsz - new_h) / 2
+        top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+        left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+        img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+        tensor = cv2.cvtColor(img, cv2.COLOR_BGR2RGB).transpose(2, 0, 1).astype(np.float32) / 255.0
+        return tensor, ratio, (left, top)
+
+    def _postprocess(self, pred, orig_shape, ratio, pad, conf, iou, max_det):
+        """Decode one (4 + num_classes, anchors) prediction into boxes in original image coordinates"""
+        pred = pred.T
+        scores = pred[:, 4:]
+        cls = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(scores)), cls]
+        keep = confidence >= conf
+        pred, cls, confidence = pred[keep], cls[keep], confidence[keep]
+
+        xyxy = np.empty((len(pred), 4), dtype=np.float32)
+        xyxy[:, 0] = pred[:, 0] - pred[:, 2] / 2
+        xyxy[:, 1] = pred[:, 1] - pred[:, 3] / 2
+        xyxy[:, 2] = pred[:, 0] + pred[:, 2] / 2
+        xyxy[:, 3] = pred[:, 1] + pred[:, 3] / 2
+
+        if len(xyxy):
+            # Class-aware NMS, as ultralytics does by default
+            xywh = np.column_stack([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]])
+            idx = cv2.dnn.NMSBoxesBatched(xywh.tolist(), confidence.tolist(), cls.tolist(), conf, iou)
+            idx = np.array(idx, dtype=np.int64).reshape(-1)[:max_det]
+            xyxy, confidence, cls = xyxy[idx], confidence[idx], cls[idx]
+
+        # Undo letterbox
+        xyxy[:, [0, 2]] = ((xyxy[:, [0, 2]] - pad[0]) / ratio).clip(0, orig_shape[1])
+        xyxy[:, [1, 3]] = ((xyxy[:, [1, 3]] - pad[1]) / ratio).clip(0, orig_shape[0])
+
+        boxes = Boxes(xyxy, confidence.astype(np.float32), cls.astype(np.float32))
+        return Result(boxes, self.names, orig_shape)
+
+    def _create_session(self):
+        raise NotImplementedError
+
+    def _run(self, batch):
+        raise NotImplementedError
+
+class OnnxRuntimeBackend(OnnxModelBackend):
+    """ONNX Runtime CPU execution provider"""
+    def _create_session(self):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if self.intra_op_threads:
+            options.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads:
+            options.inter_op_num_threads = self.inter_op_threads
+        self.session = ort.InferenceSession(self.onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        if not self.names:
+            self.names = _names_from_metadata(self.session.get_modelmeta().custom_metadata_map)
+
+    def _run(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+class OpenVINOBackend(OnnxModelBackend):
+    """OpenVINO CPU plugin reading the same exported ONNX graph"""
+    def _create_session(self):
+        import openvino as ov
+        core = ov.Core()
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if self.intra_op_threads:
+            config['INFERENCE_NUM_THREADS'] = self.intra_op_threads
+        self.compiled = core.compile_model(core.read_model(self.onnx_path), 'CPU', config)
+        if not self.names:
+            import onnx
+            meta = {p.key: p.value for p in onnx.load(self.onnx_path, load_external_data=False).metadata_props}
+            self.names = _names_from_metadata(meta)
+
+    def _run(self, batch):
+        return self.compiled(batch)[0]
+
+def _names_from_metadata(meta):
+    """Ultralytics stores the class map as a dict literal in the ONNX metadata"""
+    try:
+        return {int(k): v for k, v in ast.literal_eval(meta.get('names', '{}')).items()}
+    except (ValueError, SyntaxError):
+        return {}
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock_file(lock_file):
+        lock_file.seek(0)
+        while True:
+            try:
+                # LK_LOCK itself retries for about 10 s before giving up
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _unlock_file(lock_file):
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(lock_file):
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+    def _unlock_file(lock_file):
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+@contextmanager
+def _build_lock(path):
+    """Exclusive lock next to `path`, so concurrent builders (workers, CLI) build it once"""
+    # Appending, not truncating: Windows refuses to truncate a file another process has locked
+    with open(path + '.lock', 'a') as lock_file:
+        _lock_file(lock_file)
+        try:
+            yield
+        finally:
+            _unlock_file(lock_file)
+
+def onnx_paths(model_name):
+    """(fp32, int8) ONNX paths for YOLO .pt weights"""
+    base = os.path.splitext(model_name)[0]
+    return base + '.onnx', base + '_int8.onnx'
+
+def find_onnx_model(model_name, int8=False):
+    """Path of an already-built ONNX model (INT8 preferred if requested), or None"""
+    onnx_path, int8_path = onnx_paths(model_name)
+    if int8 and os.path.exists(int8_path):
+        return int8_path
+    return onnx_path if os.path.exists(onnx_path) else None
+
+def export_onnx(model_name, imgsz=640):
+    """
+    Export YOLO .pt weights to ONNX once (dynamic batch) and return the .onnx path.
+    The export runs in a temporary directory and is moved into place atomically,
+    so readers never see a half-written file.
+    """
+    onnx_path, _ = onnx_paths(model_name)
+    with _build_lock(onnx_path):
+        if os.path.exists(onnx_path):
+            return onnx_path
+        from ultralytics import YOLO
+        print(f"Exporting {model_name} to ONNX...")
+        # Downloads the weights if needed; ultralytics writes the export next to them
+        model = YOLO(model_name)
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(onnx_path))) as tmp:
+            weights = os.path.join(tmp, os.path.basename(model_name))
+            shutil.copy(model.ckpt_path, weights)
+            exported = YOLO(weights).export(format='onnx', imgsz=imgsz, dynamic=True, simplify=True)
+            os.replace(exported, onnx_path)
+    return onnx_path
+
+def quantize_int8(onnx_path, calibration_dir, imgsz=640, max_images=100):
+    """
+    Static INT8 (QDQ) quantization with ONNX Runtime, calibrated on real food photos.
+    Returns the quantized model path, or the FP32 path if no calibration images exist.
+    Like export_onnx, this is a build step: it can take minutes, so run it
+    offline (build_detection_models.py) or in the gunicorn master, not in a request.
+    """
+    int8_path = onnx_path.replace('.onnx', '_int8.onnx')
+    if os.path.exists(int8_path):
+        return int8_path
+
+    files = sorted(
+        f for ext in ('jpg', 'jpeg', 'png')
+        for f in glob.glob(os.path.join(calibration_dir or '', f'*.{ext}'))
+    )[:max_images]
+    if not files:
+        print(f"No calibration images in '{calibration_dir}', using FP32 ONNX model.")
+        return onnx_path
+
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    class FoodCalibrationReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.input_name = input_name
+            self._iter = iter(files)
+
+        def get_next(self):
+            for path in self._iter:
+                img = cv2.imread(path)
+                if img is not None:
+                    tensor, _, _ = OnnxModelBackend._letterbox(img, imgsz)
+                    return {self.input_name: tensor[None]}
+            return None
+
+    import onnx
+    with _build_lock(int8_path):
+        if os.path.exists(int8_path):
+            return int8_path
+        input_name = onnx.load(onnx_path, load_external_data=False).graph.input[0].name
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(int8_path))) as tmp:
+            prepared_path = os.path.join(tmp, 'prep.onnx')
+            quantized_path = os.path.join(tmp, 'int8.onnx')
+            # Symbolic shape inference fails on the dynamic-batch YOLO graph; ONNX shape inference is enough
+            quant_pre_process(onnx_path, prepared_path, skip_symbolic_shape=True)
+
+            print(f"Quantizing {onnx_path} to INT8 with {len(files)} calibration images...")
+            quantize_static(
+                prepared_path, quantized_path, FoodCalibrationReader(input_name),
+                quant_format=QuantFormat.QDQ, per_channel=True,
+                activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8
+            )
+            os.replace(quantized_path, int8_path)
+    return int8_path
+
+def build_onnx_model(model_name):
+    """Export (and, with QUANTIZE_INT8, quantize) the ONNX model workers will load"""
+    onnx_path = export_onnx(model_name, Config.YOLO_IMGSZ)
+    if Config.QUANTIZE_INT8:
+        onnx_path = quantize_int8(onnx_path, Config.CALIBRATION_DIR, Config.YOLO_IMGSZ)
+    return onnx_path
+
+def create_backend(name, model_name, build=False):
+    """
+    Build the configured inference backend for the given YOLO weights.
+    ONNX backends load a model built beforehand (build_onnx_model); pass
+    build=True to build it here instead (offline scripts only).
+    """
+    name = (name or 'torch').lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown DETECTION_BACKEND '{name}', expected one of {BACKENDS}")
+
+    if name == 'torch':
+        return TorchBackend(
+            model_name,
+            fuse=Config.TORCH_FUSE,
+            channels_last=Config.TORCH_CHANNELS_LAST,
+            fixed_shape=Config.YOLO_FIXED_SHAPE
+        )
+
+    onnx_path = build_onnx_model(model_name) if build else find_onnx_model(model_name, Config.QUANTIZE_INT8)
+    if onnx_path is None:
+        # Never export or calibrate inside a request: serve with torch until the model is built
+        print(f"No ONNX model for {model_name}; run `python build_detection_models.py`. Using torch for now.")
+        return create_backend('torch', model_name)
+
+    backend_cls = OnnxRuntimeBackend if name == 'onnxruntime' else OpenVINOBackend
+    print(f"Using {name} backend: {onnx_path}")
+    intra_op_threads, inter_op_threads = resolve_thread_counts()
+    return backend_cls(
+        onnx_path,
+        intra_op_threads=intra_op_threads,
+        inter_op_threads=inter_op_threads
+    )
@@ -0,0 +1,134 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from config import Config
+
+class DetectionCache:
+    """
+    Content-addressed cache for food detection results.
+    Keys are BLAKE2b digests of the decoded image pixels, so client retries and
+    re-scans of the same photo skip Gemini/YOLO. A bounded in-process LRU sits
+    in front of an optional MongoDB tier shared by all gunicorn workers.
+    Entries record the backend and model version that produced them and are
+    ignored once that model changes.
+    """
+    def __init__(self, max_entries=1024, use_mongo=False, ttl_days=30):
+        self.max_entries = max_entries
+        self.use_mongo = use_mongo
+        self.ttl_days = ttl_days
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._indexed = False
+        self.stats = {'hits': 0, 'mongo_hits': 0, 'misses': 0, 'stale': 0, 'evictions': 0}
+
+    def key_for(self, image):
+        """Content hash of a decoded image array (None for file paths, which are not cached)"""
+        if not isinstance(image, np.ndarray):
+            return None
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(image.shape).encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    def get(self, key, model_versions):
+        """Return cached detections, or None on a miss or if the producing model changed"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        source = 'memory'
+        if entry is None and self.use_mongo:
+            entry = self._mongo_get(key)
+            source = 'mongo'
+
+        if entry is None:
+            self._count('misses')
+            return None
+
+        if entry['model_version'] != model_versions.get(entry['backend']):
+            self._count('stale')
+            self._count('misses')
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+
+        if source == 'mongo':
+            self._count('mongo_hits')
+            self._remember(key, entry)
+        self._count('hits')
+        return copy.deepcopy(entry['detections'])
+
+    def put(self, key, detections, backend, model_version):
+        """Store detections produced by `backend` ('gemini' / 'yolo') at `model_version`"""
+        entry = {
+            'detections': copy.deepcopy(detections),
+            'backend': backend,
+            'model_version': model_version
+        }
+        self._remember(key, entry)
+        if self.use_mongo:
+            self._mongo_put(key, entry)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats, size=len(self._entries), max_entries=self.max_entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _mongo(self):
+        # Not cached: the collection belongs to this process's client (see database.py)
+        from database import db
+        collection = db.detection_cache
+        if not self._indexed:
+            # Let MongoDB expire old entries on its own
+            collection.create_index('created_at', expireAfterSeconds=self.ttl_days * 86400)
+            self._indexed = True
+        return collection
+
+    def _mongo_get(self, key):
+        try:
+            doc = self._mongo().find_one({'_id': key})
+        except Exception as e:
+            print(f"Detection cache (mongo) read error: {e}")
+            return None
+        if not doc:
+            return None
+        return {k: doc[k] for k in ('detections', 'backend', 'model_version')}
+
+    def _mongo_put(self, key, entry):
+        try:
+            self._mongo().update_one(
+                {'_id': key},
+                {'$set': dict(entry, created_at=datetime.utcnow())},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"Detection cache (mongo) write error: {e}")
+
+# Singleton instance
+detection_cache = DetectionCache(
+    max_entries=Config.DETECTION_CACHE_SIZE,
+    use_mongo=Config.DETECTION_CACHE_MONGO,
+    ttl_days=Config.DETECTION_CACHE_TTL_DAYS
+)
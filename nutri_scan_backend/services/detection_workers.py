@@ -0,0 +1,171 @@
+import os
+import time
+import queue
+import threading
+import numpy as np
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client
+from config import Config
+
+# Out-of-process YOLO detection.
+# detection_server.py runs a pool of detection processes that hold the model.
+# Each web worker owns a shared-memory ring of frame slots: it copies the
+# decoded image into a free slot and sends only (ring name, slot, shape) over a
+# local connection, so image arrays are never pickled.
+
+def require_authkey(authkey):
+    """
+    multiprocessing connections unpickle what they receive, so anyone who can
+    reach the listener with the key can run code there: refuse to run without one.
+    """
+    if not authkey:
+        raise ValueError("DETECTION_SERVER_AUTHKEY must be set to a private secret to use the detection server")
+    return authkey.encode()
+
+def parse_address(address):
+    """'host:port' -> (host, port); anything else is a Unix socket path"""
+    if ':' in address and not address.startswith('/'):
+        host, port = address.rsplit(':', 1)
+        return host, int(port)
+    return address
+
+class DetectionClient:
+    """Thin client used by FoodDetectionService when DETECTION_SERVER_ADDRESS is set"""
+    def __init__(self, address, authkey, slots=8, max_edge=640):
+        self.address = parse_address(address)
+        self.authkey = require_authkey(authkey)
+        self.slots = slots
+        self.slot_bytes = max_edge * max_edge * 3
+        self._ring = None
+        self._free = None
+        self._connections = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_ring(self):
+        # One ring per process: a forked gunicorn worker must not share its parent's slots
+        if self._ring is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._ring is not None and self._pid == os.getpid():
+                return
+            self._ring = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+            self._free = queue.Queue()
+            for slot in range(self.slots):
+                self._free.put(slot)
+            self._connections = {}
+            self._pid = os.getpid()
+            import atexit
+            atexit.register(self.close)
+
+    def detect(self, image, timeout=None):
+        """
+        Run YOLO food detection for a decoded BGR array in the detection pool.
+        `timeout` covers waiting for a free slot and for the server's reply.
+        """
+        self._ensure_ring()
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        if image.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame {image.shape} does not fit a {self.slot_bytes}-byte slot; preprocess it first")
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        slot = self._free.get(timeout=timeout)
+        release = True
+        try:
+            offset = slot * self.slot_bytes
+            frame = np.ndarray(image.shape, dtype=np.uint8, buffer=self._ring.buf, offset=offset)
+            frame[...] = image
+
+            conn = self._connections.get(slot)
+            if conn is None:
+                conn = Client(self.address, authkey=self.authkey)
+                self._connections[slot] = conn
+            try:
+                conn.send(('detect', self._ring.name, offset, image.shape))
+                remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+                if not conn.poll(remaining):
+                    # The server may still be reading the frame: keep the slot out of
+                    # the free list until its reply (or a disconnect) arrives
+                    self._connections.pop(slot, None)
+                    release = False
+                    threading.Thread(target=self._reclaim, args=(slot, conn), daemon=True).start()
+                    raise TimeoutError(f"No reply from the detection server within {timeout:.1f}s")
+                status, payload = conn.recv()
+            except (EOFError, OSError):
+                # Server restarted: drop the connection so the next call reconnects
+                self._connections.pop(slot, None)
+                raise
+            if status != 'ok':
+                raise RuntimeError(f"Detection worker error: {payload}")
+            return payload
+        finally:
+            if release:
+                self._free.put(slot)
+
+    def _reclaim(self, slot, conn):
+        """Return a timed-out slot to the ring once the server is done with it"""
+        try:
+            conn.recv()
+        except (EOFError, OSError):
+            pass
+        finally:
+            try:
+                conn.close()
+            except OSError:
+                pass
+            if self._pid == os.getpid() and self._ring is not None:
+                self._free.put(slot)
+
+    def close(self):
+        for conn in self._connections.values():
+            try:
+                conn.close()
+            except OSError:
+                pass
+        self._connections = {}
+        if self._ring is not None and self._pid == os.getpid():
+            self._ring.close()
+            self._ring.unlink()
+            self._ring = None
+
+# --- Detection worker process side (used by detection_server.py) ---
+
+_worker_service = None
+_attached = {}
+
+def init_worker():
+    """ProcessPoolExecutor initializer: load the YOLO model once per detection process"""
+    global _worker_service
+    from services.food_detection import FoodDetectionService
+    _worker_service = FoodDetectionService()
+    _worker_service.preload(force=True)
+    _worker_service.warm_up()
+
+def detect_in_worker(ring_name, offset, shape):
+    """Read a frame from a web worker's ring and run local YOLO detection on it"""
+    ring = _attached.get(ring_name)
+    if ring is None:
+        ring = shared_memory.SharedMemory(name=ring_name)
+        # The web worker owns the segment; stop this process's tracker from unlinking it
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(ring._name, 'shared_memory')
+        _attached[ring_name] = ring
+    # Zero-copy view: the web worker keeps the slot reserved until we reply
+    image = np.ndarray(shape, dtype=np.uint8, buffer=ring.buf, offset=offset)
+    return _worker_service._detect_with_yolo_local(image)
+
+_client = None
+
+def get_detection_client():
+    """Process-wide DetectionClient (None when detection runs in-process)"""
+    global _client
+    if not Config.DETECTION_SERVER_ADDRESS:
+        return None
+    if _client is None:
+        _client = DetectionClient(
+            Config.DETECTION_SERVER_ADDRESS,
+            Config.DETECTION_SERVER_AUTHKEY,
+            slots=Config.DETECTION_RING_SLOTS,
+            max_edge=Config.DETECTION_INPUT_EDGE
+        )
+    return _client
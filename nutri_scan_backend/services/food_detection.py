@@ -1,18 +1,154 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import os
+import io
+import time
+import queue
 import base64
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from groq import Groq
-import google.generativeai as genai
 from config import Config
+from services.detection_backends import build_onnx_model, create_backend
+from services.detection_cache import detection_cache
+from services.gemini_client import get_gemini_client
+from services.detection_workers import get_detection_client
+
+# JPEG DCT-domain downscaling factors supported by cv2.imdecode
+REDUCED_DECODE_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+
+# EXIF orientation tag -> transform that brings the pixels upright
+EXIF_ORIENTATION_TRANSFORMS = {
+    2: lambda img: cv2.flip(img, 1),
+    3: lambda img: cv2.rotate(img, cv2.ROTATE_180),
+    4: lambda img: cv2.flip(img, 0),
+    5: lambda img: cv2.transpose(img),
+    6: lambda img: cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE),
+    7: lambda img: cv2.flip(cv2.transpose(img), -1),
+    8: lambda img: cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE),
+}
+
+def _as_numpy(values):
+    """torch tensors (ultralytics) and NumPy arrays (ONNX backends) -> NumPy"""
+    if hasattr(values, 'cpu'):
+        return values.cpu().numpy()
+    return np.asarray(values)
+
+def _box_iou(a, b):
+    """IoU of two [x1, y1, x2, y2] boxes"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0
+
+def _box_ios(a, b):
+    """Intersection over the smaller box (catches an item cut in half at a tile edge)"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return inter / smaller if smaller > 0 else 0
+
+class InferenceBatcher:
+    """
+    Micro-batching scheduler for YOLO inference.
+    Callers submit single images; a background thread collects pending requests
+    for up to max_wait_ms (or until max_batch_size is reached), runs one batched
+    forward pass and hands each result back through a Future.
+    """
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=5):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.stats = {'batches': 0, 'images': 0, 'largest_batch': 0}
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # Threads do not survive a fork, so each (gunicorn) worker starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='yolo-batcher', daemon=True)
+            self._thread.start()
+
+    def submit(self, source):
+        """Queue one image (path or array) and return a Future for its result"""
+        future = Future()
+        if self.max_batch_size == 1:
+            # Batch-1 mode: run inline in the caller's thread
+            self._dispatch([(source, future)])
+            return future
+        self._ensure_started()
+        self._queue.put((source, future))
+        return future
+
+    def predict(self, source, timeout=None):
+        """Blocking helper: submit one image and wait for its result"""
+        return self.submit(source).result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        sources = [source for source, _ in batch]
+        try:
+            results = self.predict_fn(sources)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        results = list(results)
+        with self._lock:
+            self.stats['batches'] += 1
+            self.stats['images'] += len(batch)
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        # A backend that returns fewer results than inputs must not leave callers waiting forever
+        for _, future in batch[len(results):]:
+            future.set_exception(RuntimeError(
+                f"Inference returned {len(results)} results for a batch of {len(batch)} images"
+            ))
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
 
 class FoodDetectionService:
     def __init__(self):
         # Initialize YOLO model
         # Using yolov8x.pt (Extra Large) for maximum accuracy.
         self.model_name = 'yolov8n.pt'
-        self.model = None
+        # Loaded lazily on first use (or explicitly via preload() in the gunicorn master)
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._warmed_up = False
+        self._gemini_executor = None
+        self._gemini_executor_pid = None
         
         # COCO classes that are food items
         # These are the names used in the standard COCO dataset which YOLOv8 is trained on
@@ -20,38 +156,143 @@ class FoodDetectionService:
             'banana', 'apple', 'sandwich', 'orange', 'broccoli', 'carrot', 
             'hot dog', 'pizza', 'donut', 'cake'
         }
+        # Boolean lookup table indexed by class id, resolved from food_classes at model load
+        self._food_lut = None
         
-        self._load_model()
+        self.batcher = InferenceBatcher(
+            self._predict_batch,
+            max_batch_size=Config.YOLO_MAX_BATCH_SIZE,
+            max_wait_ms=Config.YOLO_MAX_BATCH_WAIT_MS
+        )
+
+        # Cascade: escalate low-confidence images from the nano model to a larger one
+        self.cascade_model_name = Config.CASCADE_MODEL
+        self._cascade_model = None
+        self._cascade_food_lut = None
+        self.cascade_batcher = InferenceBatcher(
+            self._predict_cascade_batch,
+            max_batch_size=Config.YOLO_MAX_BATCH_SIZE,
+            max_wait_ms=Config.YOLO_MAX_BATCH_WAIT_MS
+        )
+        self.cascade_stats = {'images': 0, 'escalations': 0, 'nano_ms': 0.0, 'large_ms': 0.0}
+        self.tile_stats = {'images': 0, 'tiled': 0, 'full_ms': 0.0, 'tile_ms': 0.0, 'added': 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """YOLO model, loaded on first access so importing the app stays cheap"""
+        if self._model is None:
+            self._load_model()
+        return self._model
 
     def _load_model(self):
         """Load YOLO model for food detection"""
+        with self._model_lock:
+            if self._model is not None:
+                return
+            try:
+                print(f"Loading YOLO model: {self.model_name} ({Config.DETECTION_BACKEND})...")
+                start = time.perf_counter()
+                # torch/ultralytics (or the ONNX runtime) are only imported when detection is used.
+                # This will automatically download the model from the internet if it doesn't exist
+                self._model = create_backend(Config.DETECTION_BACKEND, self.model_name)
+                self._food_lut = self._food_class_lut(self._model.names)
+                print(f"Model loaded successfully in {time.perf_counter() - start:.2f}s.")
+            except Exception as e:
+                print(f"Error loading model: {e}")
+                self._model = None
+
+    @property
+    def cascade_model(self):
+        """Larger cascade model (None when CASCADE_MODEL is not configured)"""
+        if self._cascade_model is None and self.cascade_model_name:
+            with self._model_lock:
+                if self._cascade_model is None:
+                    try:
+                        print(f"Loading cascade model: {self.cascade_model_name}...")
+                        self._cascade_model = create_backend(Config.DETECTION_BACKEND, self.cascade_model_name)
+                        self._cascade_food_lut = self._food_class_lut(self._cascade_model.names)
+                    except Exception as e:
+                        print(f"Error loading cascade model: {e}")
+                        self._cascade_model = None
+        return self._cascade_model
+
+    def build_models(self):
+        """
+        Export / quantize the ONNX models for the configured backend ahead of time
+        (gunicorn master or build_detection_models.py); workers only load them.
+        Returns the built paths ([] for the torch backend).
+        """
+        if Config.DETECTION_BACKEND == 'torch':
+            return []
+        names = [self.model_name] + ([self.cascade_model_name] if self.cascade_model_name else [])
+        return [build_onnx_model(name) for name in names]
+
+    def preload(self, force=False):
+        """
+        Load weights eagerly. Called in the gunicorn master (preload_app) so forked
+        workers share the weight pages copy-on-write instead of each loading a copy.
+        ONNX Runtime / OpenVINO sessions own thread pools that do not survive fork,
+        so those backends are left to load in each worker.
+        `force` is used by detection server processes, which are never forked.
+        """
+        if force:
+            pass
+        elif Config.DETECTION_SERVER_ADDRESS:
+            print("Skipping preload: detection runs in detection_server.py.")
+            return False
+        elif Config.DETECTION_BACKEND != 'torch':
+            print(f"Skipping preload: {Config.DETECTION_BACKEND} sessions are created per worker.")
+            return False
+        # Both cascade stages stay resident
+        if self.cascade_model_name:
+            self.cascade_model
+        return self.model is not None
+
+    def warm_up(self):
+        """
+        Run one dummy inference so the first real request does not pay graph
+        initialisation (layer fusion, predictor setup). Run this after fork, in
+        each worker: torch's OpenMP pool must not be started in the master.
+        """
+        if self._warmed_up:
+            return
+        # Web workers of an out-of-process setup never load the model themselves
+        if Config.DETECTION_SERVER_ADDRESS and self._model is None:
+            return
+        if self.model is None:
+            return
         try:
-            print(f"Loading YOLO model: {self.model_name}...")
-            # This will automatically download the model from the internet if it doesn't exist
-            self.model = YOLO(self.model_name)
-            print("Model loaded successfully.")
+            start = time.perf_counter()
+            dummy = np.zeros((Config.YOLO_IMGSZ, Config.YOLO_IMGSZ, 3), dtype=np.uint8)
+            self._predict_batch([dummy])
+            if self.cascade_model is not None:
+                self._predict_cascade_batch([dummy])
+            self._warmed_up = True
+            print(f"YOLO warm-up finished in {time.perf_counter() - start:.2f}s (pid {os.getpid()}).")
         except Exception as e:
-            print(f"Error loading model: {e}")
-            self.model = None
+            print(f"Error warming up model: {e}")
+
+    def _predict_batch(self, sources):
+        """Run one YOLO forward pass over a list of images"""
+        return self.model(sources, conf=Config.YOLO_CONFIDENCE, imgsz=Config.YOLO_IMGSZ, verbose=False)
+
+    def _predict_cascade_batch(self, sources):
+        """Run one forward pass of the larger cascade model"""
+        return self.cascade_model(sources, conf=Config.YOLO_CONFIDENCE, imgsz=Config.YOLO_IMGSZ, verbose=False)
 
     def _encode_image(self, image_path):
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
 
-    def detect_with_gemini(self, image_path):
+    def detect_with_gemini(self, image):
         """Use Google Gemini Vision for SUPER ACCURATE detection"""
-        if not Config.GEMINI_API_KEY:
+        client = get_gemini_client()
+        if not client:
             return []
             
         try:
             print("Running Gemini Vision analysis...")
-            genai.configure(api_key=Config.GEMINI_API_KEY)
-            model = genai.GenerativeModel('gemini-flash-latest')
-            
-            # Load image directly using PIL or similar if supported, or pass path if library supports
-            # google-generativeai supports PIL images
-            from PIL import Image
-            img = Image.open(image_path)
             
             prompt = """
             Analyze this food image. Identify the MAIN DISH NAME and ALL visible KEY INGREDIENTS.
@@ -66,8 +307,8 @@ class FoodDetectionService:
             Ignore cutlery/bowls. Do not include markdown formatting.
             """
             
-            response = model.generate_content([prompt, img])
-            result = response.text.strip()
+            # Shared client: downscales/re-encodes the image and reuses one connection
+            result = client.generate(prompt, image).strip()
             
             # Clean up potential markdown code blocks
             if result.startswith("```"):
@@ -109,70 +350,414 @@ class FoodDetectionService:
             print(f"Gemini Vision Error: {e}")
             return []
 
-    def detect_food(self, image_path):
+    @property
+    def model_versions(self):
+        """Version of each detection backend, used to invalidate cached results"""
+        yolo_version = f"{self.model_name}/{Config.DETECTION_BACKEND}"
+        if Config.DETECTION_BACKEND != 'torch' and Config.QUANTIZE_INT8:
+            yolo_version += '-int8'
+        if self.cascade_model_name:
+            yolo_version += f"+{self.cascade_model_name}"
+        return {'gemini': Config.GEMINI_VISION_MODEL, 'yolo': yolo_version}
+
+    def detect_food(self, image):
         """
         Detect food items in an image using Gemini Vision (Priority) or YOLO (Fallback)
+        `image` is either a file path or a decoded BGR array (see decode_image).
+        """
+        return self.detect(image)[0]
+
+    def detect(self, image):
+        """
+        Like detect_food, but returns (detections, info) where info says which
+        path produced the result and how long each path took.
+        Results for decoded arrays are cached by content hash.
         """
+        cache_key = detection_cache.key_for(image)
+        if cache_key:
+            cached = detection_cache.get(cache_key, self.model_versions)
+            if cached is not None:
+                print(f"Detection cache hit ({cache_key[:8]}): {len(cached)} items.", flush=True)
+                return cached, {'mode': 'cache', 'winner': 'cache', 'timings_ms': {}}
+
+        if Config.DETECTION_MODE == 'hedged' and Config.GEMINI_API_KEY:
+            detections, info = self._detect_hedged(image)
+        else:
+            detections, info = self._detect_sequential(image)
+
+        # Empty results are not cached so a transient Gemini/YOLO failure is retried
+        if cache_key and detections:
+            backend = detections[0].get('source', 'yolo')
+            detection_cache.put(cache_key, detections, backend, self.model_versions.get(backend))
+        return detections, info
+
+    def _detect_sequential(self, image):
+        """Gemini Vision first, YOLO only after Gemini fails"""
         print(f"DEBUG IN DETECT_FOOD: Gemini Key Present? {bool(Config.GEMINI_API_KEY)}")
+        timings = {}
         
         # 1. Gemini Vision (Super Priority - EXCLUSIVE)
         if Config.GEMINI_API_KEY:
-            gemini_results = self.detect_with_gemini(image_path)
+            start = time.perf_counter()
+            gemini_results = self.detect_with_gemini(image)
+            timings['gemini'] = round((time.perf_counter() - start) * 1000, 1)
             if gemini_results:
                 print(f"Gemini Success! Returning {len(gemini_results)} items. Skipping YOLO.", flush=True)
-                return gemini_results
+                return gemini_results, {'mode': 'sequential', 'winner': 'gemini', 'timings_ms': timings}
         
         # 2. YOLO (Fallback ONLY)
         print("Gemini failed/missing. Falling back to YOLO.", flush=True)
-        
-        all_detections = []
-        if not self.model:
-            print("Model not loaded, attempting to reload...")
-            self._load_model()
+        start = time.perf_counter()
+        all_detections = self._detect_with_yolo(image)
+        timings['yolo'] = round((time.perf_counter() - start) * 1000, 1)
+        return all_detections, {'mode': 'sequential', 'winner': 'yolo', 'timings_ms': timings}
 
+    def _detect_hedged(self, image):
+        """
+        Start Gemini and local YOLO together. Gemini's richer answer wins if it
+        arrives within GEMINI_DEADLINE_MS, otherwise the YOLO result is returned
+        and the late Gemini call is ignored.
+        """
+        start = time.perf_counter()
+        gemini_future = self._hedge_executor().submit(self._timed_gemini, image)
+
+        yolo_detections = self._detect_with_yolo(image)
+        yolo_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        remaining = Config.GEMINI_DEADLINE_MS / 1000.0 - (time.perf_counter() - start)
+        gemini_results = None
+        gemini_ms = None
+        try:
+            # Timed in the worker: result() only returns once the YOLO path is done
+            gemini_results, gemini_ms = gemini_future.result(timeout=max(0.0, remaining))
+        except FutureTimeoutError:
+            # Cannot abort the HTTP call; drop it if it has not started yet, else ignore the result
+            gemini_future.cancel()
+            print(f"Gemini missed the {Config.GEMINI_DEADLINE_MS:.0f} ms deadline, using YOLO.", flush=True)
+        except Exception as e:
+            print(f"Gemini Vision Error: {e}")
+
+        info = {'mode': 'hedged', 'timings_ms': {'gemini': gemini_ms, 'yolo': yolo_ms}}
+        if gemini_results:
+            info['winner'] = 'gemini'
+            return gemini_results, info
+        info['winner'] = 'yolo'
+        return yolo_detections, info
+
+    def _timed_gemini(self, image):
+        """detect_with_gemini on a hedge thread: (detections, elapsed ms)"""
+        start = time.perf_counter()
+        results = self.detect_with_gemini(image)
+        return results, round((time.perf_counter() - start) * 1000, 1)
+
+    def _hedge_executor(self):
+        # Created per process: threads do not survive a gunicorn fork
+        if self._gemini_executor is None or self._gemini_executor_pid != os.getpid():
+            self._gemini_executor = ThreadPoolExecutor(
+                max_workers=Config.GEMINI_MAX_CONCURRENCY, thread_name_prefix='gemini-hedge'
+            )
+            self._gemini_executor_pid = os.getpid()
+        return self._gemini_executor
+
+    def _detect_with_yolo(self, image):
+        """YOLO detection, in the detection server pool if configured, else in this process"""
+        client = get_detection_client()
+        if client is None:
+            return self._detect_with_yolo_local(image)
+
+        try:
+            if not isinstance(image, np.ndarray):
+                image = cv2.imread(image)
+            # Frames must fit a ring slot (DETECTION_INPUT_EDGE x DETECTION_INPUT_EDGE)
+            image = self.preprocess_array(image)
+            return client.detect(image, timeout=Config.DETECTION_SERVER_TIMEOUT)
+        except Exception as e:
+            print(f"Error in remote YOLO detection: {e}")
+            return []
+
+    def _detect_with_yolo_local(self, image):
+        """
+        Local YOLO detection of food classes (nano model, escalating to the cascade
+        model), followed by a sliced pass over overlapping tiles when enabled.
+        """
+        all_detections = []
+        if isinstance(image, np.ndarray):
+            # Uploads are kept large enough for Gemini; YOLO only needs its input size
+            image = self.preprocess_array(image)
+        # Accessing .model loads it on first use (and retries if a previous load failed)
         if self.model:
             try:
-                # Run inference
-                results = self.model(image_path, conf=0.15) 
-                
-                for result in results:
-                    boxes = result.boxes
-                    for box in boxes:
-                        class_id = int(box.cls[0])
-                        confidence = float(box.conf[0])
-                        class_name = result.names[class_id]
-                        
-                        if class_name.lower() in self.food_classes:
-                            print(f"YOLO Detected {class_name} ({confidence:.2f})")
-                            all_detections.append({
-                                'name': class_name,
-                                'confidence': round(confidence, 2),
-                                'quantity': 100, # Default to 100g for YOLO as it can't estimate weight
-                                'source': 'yolo',
-                                'bbox': box.xyxy[0].tolist()
-                            })
+                # Run inference (batched with concurrent requests)
+                start = time.perf_counter()
+                result = self.batcher.predict(image)
+                all_detections = self._parse_yolo_result(result)
+                nano_ms = (time.perf_counter() - start) * 1000
+
+                large_ms = None
+                batcher, lut = self.batcher, self._food_lut
+                if self.cascade_model_name and self._should_escalate(all_detections) and self.cascade_model:
+                    # Both stages receive the same decoded, resized image
+                    start = time.perf_counter()
+                    result = self.cascade_batcher.predict(image)
+                    all_detections = self._parse_yolo_result(result, self._cascade_food_lut)
+                    large_ms = (time.perf_counter() - start) * 1000
+                    batcher, lut = self.cascade_batcher, self._cascade_food_lut
+                    print(f"Cascade escalated to {self.cascade_model_name}: {len(all_detections)} items.")
+                self._record_cascade(nano_ms, large_ms)
+
+                if Config.TILED_INFERENCE and isinstance(image, np.ndarray):
+                    full_ms = nano_ms + (large_ms or 0.0)
+                    all_detections = self._detect_tiled(image, all_detections, batcher, lut, full_ms)
             except Exception as e:
                 print(f"Error in YOLO detection: {e}")
 
         return all_detections
 
+    def _should_tile(self, image, detections):
+        """Cost guard: only tile images with enough pixels to gain from it"""
+        long_edge = max(image.shape[:2])
+        if long_edge < max(Config.TILE_MIN_EDGE, Config.YOLO_IMGSZ):
+            return False
+        if Config.TILE_LARGE_EDGE and long_edge >= Config.TILE_LARGE_EDGE:
+            return True
+        return len(detections) < Config.TILE_MIN_ITEMS
+
+    def _make_tiles(self, image):
+        """TILE_GRID x TILE_GRID overlapping crops covering the image: [(x, y, tile)]"""
+        height, width = image.shape[:2]
+        grid = max(1, Config.TILE_GRID)
+        overlap = min(max(Config.TILE_OVERLAP, 0.0), 0.9)
+        # n tiles of size t with overlap o cover n*t - (n-1)*o*t pixels
+        tile_w = int(np.ceil(width / (grid - (grid - 1) * overlap)))
+        tile_h = int(np.ceil(height / (grid - (grid - 1) * overlap)))
+        xs = np.linspace(0, width - tile_w, grid).round().astype(int)
+        ys = np.linspace(0, height - tile_h, grid).round().astype(int)
+        return [(x, y, np.ascontiguousarray(image[y:y + tile_h, x:x + tile_w]))
+                for y in ys.tolist() for x in xs.tolist()]
+
+    def _detect_tiled(self, image, detections, batcher, lut, full_ms):
+        """
+        Sliced inference: run all tiles as one batch through the same batcher as
+        the full pass, shift tile boxes back into image coordinates and merge
+        them with the full-pass boxes using class-aware NMS.
+        """
+        tiled = self._should_tile(image, detections)
+        tile_ms = 0.0
+        added = 0
+        if tiled:
+            start = time.perf_counter()
+            tiles = self._make_tiles(image)
+            # Submitted together so the batcher runs them in a single forward pass
+            futures = [batcher.submit(tile) for _, _, tile in tiles]
+            candidates = list(detections)
+            for (x, y, _), future in zip(tiles, futures):
+                for detection in self._parse_yolo_result(future.result(), lut):
+                    x1, y1, x2, y2 = detection['bbox']
+                    detection['bbox'] = [x1 + x, y1 + y, x2 + x, y2 + y]
+                    candidates.append(detection)
+            merged = self._merge_detections(candidates)
+            added = len(merged) - len(detections)
+            tile_ms = (time.perf_counter() - start) * 1000
+            print(f"Tiled inference: {len(tiles)} tiles in {tile_ms:.0f} ms, "
+                  f"{len(detections)} -> {len(merged)} items.")
+            detections = merged
+
+        with self._stats_lock:
+            self.tile_stats['images'] += 1
+            self.tile_stats['full_ms'] += full_ms
+            if tiled:
+                self.tile_stats['tiled'] += 1
+                self.tile_stats['tile_ms'] += tile_ms
+                self.tile_stats['added'] += max(0, added)
+        return detections
+
+    def _merge_detections(self, detections):
+        """Class-aware NMS across full-pass and tile boxes (highest confidence wins)"""
+        kept = []
+        for detection in sorted(detections, key=lambda d: d['confidence'], reverse=True):
+            duplicate = any(
+                other['name'] == detection['name'] and (
+                    _box_iou(other['bbox'], detection['bbox']) >= Config.TILE_NMS_IOU
+                    or _box_ios(other['bbox'], detection['bbox']) >= 0.8
+                )
+                for other in kept
+            )
+            if not duplicate:
+                kept.append(detection)
+        return kept
+
+    def get_tile_stats(self):
+        """How often tiling ran and what it cost relative to the full pass"""
+        with self._stats_lock:
+            stats = dict(self.tile_stats)
+        images, tiled = stats['images'], stats['tiled']
+        avg_full = stats['full_ms'] / images if images else 0.0
+        avg_tile = stats['tile_ms'] / tiled if tiled else 0.0
+        return {
+            'enabled': Config.TILED_INFERENCE,
+            'grid': Config.TILE_GRID,
+            'images': images,
+            'tiled': tiled,
+            'tile_rate': round(tiled / images, 3) if images else 0.0,
+            'avg_full_pass_ms': round(avg_full, 1),
+            'avg_tile_pass_ms': round(avg_tile, 1),
+            # Latency of a tiled image relative to a single pass
+            'tiled_cost_ratio': round((avg_full + avg_tile) / avg_full, 2) if tiled and avg_full else 0.0,
+            'items_added': stats['added']
+        }
+
+    def _should_escalate(self, detections):
+        """Escalate when no food box clears CASCADE_CONFIDENCE or the top boxes disagree"""
+        if not detections:
+            return True
+        ranked = sorted(detections, key=lambda d: d['confidence'], reverse=True)
+        top = ranked[0]
+        if top['confidence'] < Config.CASCADE_CONFIDENCE:
+            return True
+        # Disagreement: another class on (roughly) the same region with a similar score
+        for other in ranked[1:]:
+            if top['confidence'] - other['confidence'] > Config.CASCADE_DISAGREEMENT_MARGIN:
+                break
+            if other['name'] != top['name'] and _box_iou(top['bbox'], other['bbox']) >= 0.5:
+                return True
+        return False
+
+    def _record_cascade(self, nano_ms, large_ms):
+        with self._stats_lock:
+            self.cascade_stats['images'] += 1
+            self.cascade_stats['nano_ms'] += nano_ms
+            if large_ms is not None:
+                self.cascade_stats['escalations'] += 1
+                self.cascade_stats['large_ms'] += large_ms
+
+    def get_cascade_stats(self):
+        """Escalation rate and mean per-stage latency of the YOLO cascade"""
+        with self._stats_lock:
+            stats = dict(self.cascade_stats)
+        images, escalations = stats['images'], stats['escalations']
+        return {
+            'nano_model': self.model_name,
+            'cascade_model': self.cascade_model_name or None,
+            'images': images,
+            'escalations': escalations,
+            'escalation_rate': round(escalations / images, 3) if images else 0.0,
+            'avg_nano_ms': round(stats['nano_ms'] / images, 1) if images else 0.0,
+            'avg_large_ms': round(stats['large_ms'] / escalations, 1) if escalations else 0.0,
+            'batcher': self.batcher.get_stats(),
+            'cascade_batcher': self.cascade_batcher.get_stats()
+        }
+
+    def _food_class_lut(self, names):
+        """Resolve food_classes (names) to a boolean mask over the model's class ids"""
+        lut = np.zeros(max(names) + 1 if names else 0, dtype=bool)
+        for class_id, class_name in names.items():
+            lut[class_id] = class_name.lower() in self.food_classes
+        return lut
+
+    def _parse_yolo_result(self, result, lut=None):
+        """Convert a single YOLO result into detection dicts (food classes only)"""
+        boxes = result.boxes
+        if len(boxes) == 0:
+            return []
+        if lut is None:
+            lut = self._food_lut if self._food_lut is not None else self._food_class_lut(result.names)
+
+        # Filter all boxes in one mask operation; only survivors become dicts
+        cls = _as_numpy(boxes.cls).astype(np.int64)
+        mask = np.zeros(len(cls), dtype=bool)
+        known = cls < len(lut)
+        mask[known] = lut[cls[known]]
+        keep = np.flatnonzero(mask)
+        if len(keep) == 0:
+            return []
+
+        confidences = _as_numpy(boxes.conf)[keep]
+        xyxy = _as_numpy(boxes.xyxy)[keep]
+
+        detections = []
+        for class_id, confidence, bbox in zip(cls[keep].tolist(), confidences.tolist(), xyxy.tolist()):
+            class_name = result.names[class_id]
+            print(f"YOLO Detected {class_name} ({confidence:.2f})")
+            detections.append({
+                'name': class_name,
+                'confidence': round(confidence, 2),
+                'quantity': 100, # Default to 100g for YOLO as it can't estimate weight
+                'source': 'yolo',
+                'bbox': bbox
+            })
+        return detections
+
+    def _read_header(self, data):
+        """Read format, size and EXIF orientation without decoding pixels"""
+        from PIL import Image
+        try:
+            with Image.open(io.BytesIO(data)) as header:
+                orientation = header.getexif().get(0x0112, 1) if header.format == 'JPEG' else 1
+                return header.format, header.size, orientation
+        except Exception:
+            return None, None, 1
+
+    def decode_image(self, data, target_size=None):
+        """
+        Decode raw upload bytes straight into a BGR array (no disk round-trip).
+        Large JPEGs are decoded at a reduced resolution (DCT scaling) that still
+        covers target_size, and EXIF orientation is applied to the small image.
+        """
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        if buffer.size == 0:
+            return None
+
+        target_size = target_size or Config.DETECTION_INPUT_EDGE
+        image_format, size, orientation = self._read_header(data)
+
+        # Pick the largest reduction that keeps the long edge >= target_size
+        reduction = 1
+        if image_format == 'JPEG' and size:
+            long_edge = max(size)
+            for factor in sorted(REDUCED_DECODE_FLAGS, reverse=True):
+                if long_edge / factor >= target_size:
+                    reduction = factor
+                    break
+
+        flags = REDUCED_DECODE_FLAGS.get(reduction, cv2.IMREAD_COLOR)
+        img = cv2.imdecode(buffer, flags | cv2.IMREAD_IGNORE_ORIENTATION)
+        if img is None:
+            return None
+
+        transform = EXIF_ORIENTATION_TRANSFORMS.get(orientation)
+        if transform:
+            img = transform(img)
+
+        if size and reduction > 1:
+            full_bytes = size[0] * size[1] * 3
+            saved_mb = (full_bytes - img.nbytes) / (1024 * 1024)
+            print(f"Reduced decode 1/{reduction}: {size[0]}x{size[1]} -> "
+                  f"{img.shape[1]}x{img.shape[0]} (saved {saved_mb:.1f} MB)")
+        return img
+
+    def preprocess_array(self, img, target_size=None):
+        """Resize a decoded image once, straight to the detection input size (area interpolation)"""
+        target_size = target_size or Config.DETECTION_INPUT_EDGE
+        height, width = img.shape[:2]
+        if width > target_size or height > target_size:
+            scale = min(target_size/width, target_size/height)
+            new_width = max(1, int(round(width * scale)))
+            new_height = max(1, int(round(height * scale)))
+            img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
+        
+        # Basic enhancement
+        # We skip heavy enhancement as YOLOv8 is robust enough
+        return img
+
     def preprocess_image(self, image_path):
-        """Preprocess image for better detection"""
+        """Preprocess image file for better detection (file-based, used by CLI scripts)"""
         try:
-            img = cv2.imread(image_path)
+            with open(image_path, 'rb') as f:
+                img = self.decode_image(f.read())
             if img is None:
                 return None
             
-            # Resize if too large
-            height, width = img.shape[:2]
-            if width > 1280 or height > 1280:
-                scale = min(1280/width, 1280/height)
-                new_width = int(width * scale)
-                new_height = int(height * scale)
-                img = cv2.resize(img, (new_width, new_height))
-            
-            # Basic enhancement
-            # We skip heavy enhancement as YOLOv8 is robust enough
+            img = self.preprocess_array(img)
             
             # Save preprocessed image
             preprocessed_path = image_path.replace('.', '_preprocessed.')
@@ -0,0 +1,173 @@
+import re
+import numpy as np
+
+# Words that describe amount, size or serving rather than the food itself
+QUANTITY_WORDS = {
+    'a', 'an', 'the', 'of', 'some', 'and', 'with',
+    'slice', 'piece', 'cup', 'bowl', 'plate', 'serving', 'portion', 'glass',
+    'handful', 'half', 'whole', 'small', 'medium', 'large', 'big', 'fresh',
+    'g', 'gram', 'kg', 'ml', 'l', 'oz', 'lb', 'tbsp', 'tsp',
+}
+
+# Words ending in 's' that are not plurals
+NON_PLURALS = {
+    'hummus', 'couscous', 'asparagus', 'citrus', 'swiss', 'molasses', 'bass',
+    'grass', 'hibiscus', 'octopus', 'series',
+}
+
+# Regional and alternative names -> the name used in our nutrition data
+SYNONYMS = {
+    'doughnut': 'donut',
+    'hotdog': 'hot dog',
+    'frankfurter': 'hot dog',
+    'aubergine': 'eggplant',
+    'brinjal': 'eggplant',
+    'courgette': 'zucchini',
+    'capsicum': 'bell pepper',
+    'coriander': 'cilantro',
+    'yoghurt': 'yogurt',
+    'curd': 'yogurt',
+    'dahi': 'yogurt',
+    'prawn': 'shrimp',
+    'chapati': 'roti',
+    'chapatti': 'roti',
+    'maize': 'corn',
+    'garbanzo': 'chickpea',
+    'chana': 'chickpea',
+    'aloo': 'potato',
+    'ladyfinger': 'okra',
+    'bhindi': 'okra',
+    'scallion': 'green onion',
+    'spring onion': 'green onion',
+}
+
+# A query word counts as present in a food name if it is this close to one of
+# its words (Dice of word trigrams): absorbs typos like 'banan', not 'chickpea' -> 'chicken'
+WORD_MATCH = 0.6
+
+_PUNCTUATION = re.compile(r"[^a-z0-9 ]+")
+_NUMBER = re.compile(r"^\d+(\.\d+)?[a-z]*$")
+
+def singularize(word):
+    if len(word) <= 3 or word in NON_PLURALS or word.endswith('ss'):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'ches', 'shes', 'xes', 'sses')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+def normalize_food_name(name):
+    """
+    Canonical form of a free-text food name: lower case, no punctuation or
+    quantity words, singular nouns, synonyms applied.
+    'Cucumber Slices' -> 'cucumber', '2 Aloo Parathas' -> 'potato paratha'
+    """
+    text = _PUNCTUATION.sub(' ', str(name).lower().replace('&', ' and '))
+    words = [singularize(w) for w in text.split() if not _NUMBER.match(w)]
+    kept = [w for w in words if w not in QUANTITY_WORDS] or words
+    phrase = ' '.join(kept)
+    if phrase in SYNONYMS:
+        return SYNONYMS[phrase]
+    return ' '.join(SYNONYMS.get(w, w) for w in kept)
+
+def trigrams(text):
+    """Character trigrams of each word, padded so short words and word starts count"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def _dice(a, b):
+    return 2.0 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+class FoodNameIndex:
+    """
+    Character-trigram inverted index over canonical food names.
+    Postings are one flat int32 array sliced per trigram, so a lookup is a
+    handful of array slices and a bincount, not a scan over all foods.
+    Scores are the Dice coefficient of the trigram sets (1.0 = exact match
+    after normalization), scaled by the share of query words found in the
+    candidate: 'carrot cake' is not a confident 'carrot'.
+    """
+    def __init__(self, names):
+        self.names = list(names)
+        self.keys = [normalize_food_name(n) for n in self.names]
+        self._exact = {}
+        for entry_id, key in enumerate(self.keys):
+            self._exact.setdefault(key, entry_id)
+
+        gram_ids = {}
+        gram_column, entry_column = [], []
+        sizes = np.zeros(len(self.keys), dtype=np.int32)
+        for entry_id, key in enumerate(self.keys):
+            grams = trigrams(key)
+            sizes[entry_id] = len(grams)
+            for gram in grams:
+                gram_column.append(gram_ids.setdefault(gram, len(gram_ids)))
+                entry_column.append(entry_id)
+
+        gram_column = np.asarray(gram_column, dtype=np.int32)
+        order = np.argsort(gram_column, kind='stable')
+        self._postings = np.asarray(entry_column, dtype=np.int32)[order]
+        self._offsets = np.zeros(len(gram_ids) + 1, dtype=np.int64)
+        self._offsets[1:] = np.cumsum(np.bincount(gram_column, minlength=len(gram_ids)))
+        self._gram_ids = gram_ids
+        self._sizes = sizes
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, name, k=5):
+        """Top-k [(entry_id, score)] for a free-text name, best first"""
+        key = normalize_food_name(name)
+        exact = self._exact.get(key)
+        if exact is not None:
+            return [(exact, 1.0)]
+
+        grams = trigrams(key)
+        slices = [
+            self._postings[self._offsets[g]:self._offsets[g + 1]]
+            for g in (self._gram_ids.get(gram) for gram in grams) if g is not None
+        ]
+        if not slices:
+            return []
+
+        # Shared trigram count per food in one pass (no sort, linear in postings)
+        counts = np.bincount(np.concatenate(slices), minlength=len(self.names))
+        candidates = np.flatnonzero(counts)
+        shared = counts[candidates]
+        scores = 2.0 * shared / (len(grams) + self._sizes[candidates])
+        # Word coverage can only lower a score, so it is checked on a shortlist
+        shortlist = max(4 * k, 20)
+        if len(candidates) > shortlist:
+            top = np.argpartition(scores, -shortlist)[-shortlist:]
+        else:
+            top = np.arange(len(candidates))
+
+        words = [(word, trigrams(word)) for word in key.split()]
+        ranked = []
+        for i in top:
+            entry_id = int(candidates[i])
+            score = float(scores[i]) * self._coverage(words, entry_id)
+            if score > 0:
+                ranked.append((entry_id, round(score, 3)))
+        ranked.sort(key=lambda match: match[1], reverse=True)
+        return ranked[:k]
+
+    def _coverage(self, words, entry_id):
+        """Share of query words that also appear (or nearly so) in the entry's name"""
+        entry_words = [(word, trigrams(word)) for word in self.keys[entry_id].split()]
+        covered = sum(
+            1 for word, grams in words
+            if any(word == other or _dice(grams, other_grams) >= WORD_MATCH for other, other_grams in entry_words)
+        )
+        return covered / len(words)
+
+    def resolve(self, name):
+        """Best (entry_id, score) for a name, or None"""
+        matches = self.search(name, k=1)
+        return matches[0] if matches else None
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import base64
+import threading
+import cv2
+import numpy as np
+import requests
+from config import Config
+
+# Encoders for the image sent to Gemini: extension, quality flag, MIME type
+IMAGE_ENCODINGS = {
+    'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY, 'image/jpeg'),
+    'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY, 'image/webp'),
+}
+
+class GeminiVisionClient:
+    """
+    Gemini generateContent client shared by the whole process.
+    Images are downscaled to a bounded long edge and re-encoded (JPEG/WebP)
+    before upload, and the REST call reuses one keep-alive session. The base
+    URL is configurable so a local stand-in (gemini_stub_server.py) can replace
+    Gemini for offline benchmarks.
+    """
+    def __init__(self, api_key, model_name, api_base, max_edge=1024,
+                 image_format='jpeg', quality=85, timeout=30):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.api_base = api_base.rstrip('/')
+        self.max_edge = max_edge
+        self.image_format = image_format if image_format in IMAGE_ENCODINGS else 'jpeg'
+        self.quality = quality
+        self.timeout = timeout
+        self._local = threading.local()
+        self.stats = {'requests': 0, 'bytes_sent': 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def session(self):
+        # One session per thread (hedged detection calls Gemini from a pool)
+        session = getattr(self._local, 'session', None)
+        if session is None or getattr(self._local, 'pid', None) != os.getpid():
+            session = requests.Session()
+            self._local.session = session
+            self._local.pid = os.getpid()
+        return session
+
+    def get_stats(self):
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def encode_image(self, image):
+        """Downscale to max_edge (area interpolation) and encode; returns (bytes, mime_type)"""
+        if not isinstance(image, np.ndarray):
+            image = cv2.imread(image)
+            if image is None:
+                raise ValueError("Could not read image for Gemini")
+
+        height, width = image.shape[:2]
+        if self.max_edge and max(height, width) > self.max_edge:
+            scale = self.max_edge / max(height, width)
+            image = cv2.resize(
+                image, (max(1, int(round(width * scale))), max(1, int(round(height * scale)))),
+                interpolation=cv2.INTER_AREA
+            )
+
+        ext, quality_flag, mime_type = IMAGE_ENCODINGS[self.image_format]
+        ok, buffer = cv2.imencode(ext, image, [quality_flag, self.quality])
+        if not ok:
+            raise ValueError(f"Could not encode image as {self.image_format}")
+        return buffer.tobytes(), mime_type
+
+    def generate(self, prompt, image):
+        """Send prompt + image to generateContent and return the response text"""
+        data, mime_type = self.encode_image(image)
+        body = {
+            'contents': [{
+                'parts': [
+                    {'text': prompt},
+                    {'inline_data': {'mime_type': mime_type, 'data': base64.b64encode(data).decode('ascii')}}
+                ]
+            }]
+        }
+        url = f"{self.api_base}/v1beta/models/{self.model_name}:generateContent"
+
+        start = time.perf_counter()
+        # Key in a header, not the query string: HTTPError messages (and so our logs) include the URL
+        response = self.session.post(
+            url, headers={'x-goog-api-key': self.api_key}, json=body, timeout=self.timeout, stream=True
+        )
+        # `elapsed` stops when the response headers arrive: time to first byte
+        ttfb_ms = response.elapsed.total_seconds() * 1000
+        payload = response.content
+        total_ms = (time.perf_counter() - start) * 1000
+
+        # Hedge threads call generate() concurrently
+        with self._stats_lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_sent'] += len(data)
+        print(f"Gemini request: {len(data) / 1024:.1f} KB {self.image_format} sent, "
+              f"TTFB {ttfb_ms:.0f} ms, total {total_ms:.0f} ms")
+
+        response.raise_for_status()
+        result = json.loads(payload)
+        parts = result['candidates'][0]['content']['parts']
+        return ''.join(part.get('text', '') for part in parts)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_gemini_client():
+    """Process-wide GeminiVisionClient built from Config (None without an API key)"""
+    global _client
+    if not Config.GEMINI_API_KEY:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GeminiVisionClient(
+                    api_key=Config.GEMINI_API_KEY,
+                    model_name=Config.GEMINI_VISION_MODEL,
+                    api_base=Config.GEMINI_API_BASE,
+                    max_edge=Config.GEMINI_IMAGE_MAX_EDGE,
+                    image_format=Config.GEMINI_IMAGE_FORMAT,
+                    quality=Config.GEMINI_IMAGE_QUALITY,
+                    timeout=Config.GEMINI_TIMEOUT
+                )
+    return _client
@@ -0,0 +1,147 @@
+import os
+import time
+import random
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# Methods that are safe to repeat after the request may have reached the server
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+# Responses worth retrying: throttling and transient upstream failures
+RETRY_STATUSES = {429, 502, 503, 504}
+
+class ProviderHTTPClient:
+    """
+    Keep-alive HTTP client for one nutrition provider.
+    Each process gets its own requests.Session whose connection pool holds
+    pool_size connections per host, shared by all threads in that process.
+    Connect and read timeouts are separate. Failed requests are retried with
+    jittered exponential backoff, but only where repeating them is safe:
+    connect timeouts for any method (nothing reached the server), and other
+    connection failures, read timeouts or 429/5xx responses for idempotent
+    methods only.
+    """
+    def __init__(self, name, pool_size=8, connect_timeout=3.05, read_timeout=10,
+                 max_retries=2, backoff=0.2):
+        self.name = name
+        self.pool_size = max(1, pool_size)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._host_stats = {}
+
+    @property
+    def session(self):
+        # Created per process: pooled sockets must not be shared with a forked parent
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, pool_block=False)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                    self._pid = os.getpid()
+                    self._host_stats = {}
+        return self._session
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method, url, budget=None, **kwargs):
+        """
+        session.request with pooled connections, split timeouts and safe retries.
+        `budget` (seconds) caps the whole call, retries and backoff included:
+        each attempt's timeouts are cut to the time left, and no retry starts
+        once the budget is spent.
+        """
+        method = method.upper()
+        timeout = kwargs.pop('timeout', self.timeout)
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        idempotent = method in IDEMPOTENT_METHODS
+        host = urlsplit(url).netloc
+        session = self.session
+        deadline = time.monotonic() + budget if budget is not None else None
+
+        attempt = 0
+        while True:
+            if deadline is not None:
+                remaining = max(0.001, deadline - time.monotonic())
+                kwargs['timeout'] = tuple(min(t, remaining) for t in timeout)
+            else:
+                kwargs['timeout'] = timeout
+            # Full jitter: spread retries from many workers instead of synchronising them
+            delay = random.uniform(0, self.backoff * (2 ** (attempt + 1)))
+            may_retry = attempt < self.max_retries
+
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                # ConnectTimeout is a ConnectionError: nothing reached the server
+                retry = may_retry and (idempotent or isinstance(e, requests.exceptions.ConnectTimeout))
+                retry = retry and self._within(deadline, delay)
+                self._record(host, start, error=True, retried=retry)
+                if not retry:
+                    raise
+            except requests.exceptions.Timeout:
+                retry = may_retry and idempotent and self._within(deadline, delay)
+                self._record(host, start, error=True, retried=retry)
+                if not retry:
+                    raise
+            else:
+                retry = may_retry and idempotent and response.status_code in RETRY_STATUSES
+                retry = retry and self._within(deadline, delay)
+                self._record(host, start, error=response.status_code >= 500, retried=retry)
+                if not retry:
+                    return response
+                response.close()
+
+            attempt += 1
+            time.sleep(delay)
+
+    @staticmethod
+    def _within(deadline, delay):
+        """Whether a retry after `delay` seconds would still start before the deadline"""
+        return deadline is None or time.monotonic() + delay < deadline
+
+    def _record(self, host, start, error, retried):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            stats = self._host_stats.setdefault(
+                host, {'requests': 0, 'errors': 0, 'retries': 0, 'total_ms': 0.0}
+            )
+            stats['requests'] += 1
+            stats['total_ms'] += elapsed_ms
+            if error:
+                stats['errors'] += 1
+            if retried:
+                stats['retries'] += 1
+
+    def get_stats(self):
+        """Per-host request/error/retry counts, mean latency and connections opened"""
+        with self._lock:
+            hosts = {host: dict(stats) for host, stats in self._host_stats.items()}
+
+        # Connections actually opened, from urllib3's per-host pools
+        if self._session is not None and self._pid == os.getpid():
+            adapter = self._session.get_adapter('https://')
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+                entry = hosts.setdefault(host, {'requests': 0, 'errors': 0, 'retries': 0, 'total_ms': 0.0})
+                entry['connections_opened'] = pool.num_connections
+
+        for stats in hosts.values():
+            total_ms = stats.pop('total_ms')
+            stats['avg_ms'] = round(total_ms / stats['requests'], 1) if stats['requests'] else 0.0
+        return {'provider': self.name, 'pool_size': self.pool_size, 'hosts': hosts}
@@ -0,0 +1,134 @@
+import time
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+from config import Config
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit perceptual hashes (Hamming metric).
+    Nodes are [hash, payload, {distance: child}] lists to keep lookups cheap.
+    """
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, payload):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, payload, {}]
+            return
+        node = self.root
+        while True:
+            distance = (value ^ node[0]).bit_count()
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, payload, {}]
+                return
+            node = child
+
+    def find_nearest(self, value, max_distance):
+        """Closest (distance, payload) within max_distance, or None"""
+        if self.root is None:
+            return None
+        best = None
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = (value ^ node[0]).bit_count()
+            if distance <= max_distance and (best is None or distance < best[0]):
+                best = (distance, node[1])
+                if distance == 0:
+                    break
+            # Triangle inequality: only children within [d - r, d + r] can match
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in node[2].items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+        return best
+
+class MealHashIndex:
+    """
+    Per-user perceptual-hash index of previous scans.
+    Each user's dHashes are loaded from food_logs into a BK-tree on first use,
+    so /api/food/upload can recognise a near-duplicate photo of a meal the user
+    already scanned and reuse its detected foods instead of calling Gemini/YOLO.
+    """
+    def __init__(self, max_distance=6, max_users=1000, refresh_seconds=300):
+        self.max_distance = max_distance
+        self.max_users = max_users
+        self.refresh_seconds = refresh_seconds
+        self._trees = OrderedDict()  # user_id -> (loaded_at, BKTree)
+        self._lock = threading.Lock()
+        self.stats = {'lookups': 0, 'matches': 0}
+
+    @staticmethod
+    def compute_hash(image):
+        """64-bit difference hash (dHash) of a decoded BGR image"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+    @staticmethod
+    def to_hex(value):
+        # Stored as a hex string: MongoDB integers are signed 64-bit
+        return f"{value:016x}"
+
+    def find(self, user_id, value):
+        """Return (log_id, distance) of the closest prior scan for this user, or None"""
+        tree = self._tree_for(user_id)
+        with self._lock:
+            match = tree.find_nearest(value, self.max_distance)
+            self.stats['lookups'] += 1
+            if match:
+                self.stats['matches'] += 1
+        if not match:
+            return None
+        distance, log_id = match
+        return log_id, distance
+
+    def add(self, user_id, value, log_id):
+        """Index a newly saved scan (only if the user's tree is already in memory)"""
+        with self._lock:
+            cached = self._trees.get(user_id)
+            if cached:
+                cached[1].add(value, log_id)
+
+    def _tree_for(self, user_id):
+        with self._lock:
+            cached = self._trees.get(user_id)
+            if cached and time.monotonic() - cached[0] < self.refresh_seconds:
+                self._trees.move_to_end(user_id)
+                return cached[1]
+
+        # Picks up scans saved by other workers since the last load
+        tree = self._load(user_id)
+        with self._lock:
+            self._trees[user_id] = (time.monotonic(), tree)
+            self._trees.move_to_end(user_id)
+            while len(self._trees) > self.max_users:
+                self._trees.popitem(last=False)
+        return tree
+
+    def _load(self, user_id):
+        from database import db
+        tree = BKTree()
+        cursor = db.food_logs.find(
+            {'user_id': user_id, 'phash': {'$exists': True}},
+            {'phash': 1}
+        )
+        for doc in cursor:
+            try:
+                tree.add(int(doc['phash'], 16), str(doc['_id']))
+            except (TypeError, ValueError):
+                continue
+        return tree
+
+# Singleton instance
+meal_index = MealHashIndex(
+    max_distance=Config.NEAR_DUPLICATE_MAX_DISTANCE,
+    max_users=Config.MEAL_INDEX_MAX_USERS,
+    refresh_seconds=Config.MEAL_INDEX_REFRESH_SECONDS
+)
@@ -0,0 +1,188 @@
+import os
+import json
+import struct
+import threading
+import numpy as np
+from config import Config
+
+# Nutrient columns, in storage order (units as in get_nutrition_data: per 100 g)
+NUTRIENT_KEYS = (
+    'calories', 'protein', 'carbs', 'fat', 'fiber', 'sugar',
+    'sodium', 'calcium', 'iron', 'vitamin_c', 'vitamin_a'
+)
+
+# USDA FoodData Central nutrient ids for each column (first id present wins)
+FDC_NUTRIENT_IDS = {
+    'calories': (1008, 2047, 2048),  # Energy kcal, then Atwater general/specific
+    'protein': (1003,),
+    'carbs': (1005,),
+    'fat': (1004,),
+    'fiber': (1079,),
+    'sugar': (2000, 1063),
+    'sodium': (1093,),
+    'calcium': (1087,),
+    'iron': (1089,),
+    'vitamin_c': (1162,),
+    'vitamin_a': (1106,),  # RAE, mcg
+}
+
+MAGIC = b'NUTRIDB1'
+ALIGNMENT = 64
+
+def normalize_key(name):
+    """Lookup key for a food name: lower-case, single-spaced"""
+    return ' '.join(str(name).lower().split())
+
+class NutrientDatabase:
+    """
+    Read-only columnar nutrient table, memory-mapped from a single file.
+
+    Layout: MAGIC, a uint64 header length, a JSON header, then 64-byte aligned
+    blocks: one float32 column per nutrient, int64 source ids, and a string
+    table (uint32 offsets + UTF-8 bytes) for keys and display names. Rows are
+    sorted by normalized key, so a lookup is a binary search over the mapped
+    key table. Nothing is copied into the process, so every gunicorn worker
+    shares the same page-cache pages.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a nutrient database")
+            (header_len,) = struct.unpack('<Q', f.read(8))
+            self.header = json.loads(f.read(header_len))
+
+        self.count = self.header['count']
+        blocks = self.header['blocks']
+        self.columns = {
+            name: self._map(blocks[name], np.float32, (self.count,)) for name in self.header['columns']
+        }
+        self.ids = self._map(blocks['ids'], np.int64, (self.count,))
+        self._key_offsets = self._map(blocks['key_offsets'], np.uint32, (self.count + 1,))
+        self._key_bytes = self._map(blocks['keys'], np.uint8, (blocks['keys']['length'],))
+        self._name_offsets = self._map(blocks['name_offsets'], np.uint32, (self.count + 1,))
+        self._name_bytes = self._map(blocks['names'], np.uint8, (blocks['names']['length'],))
+
+    def _map(self, block, dtype, shape):
+        if not shape[0]:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=block['offset'], shape=shape)
+
+    def __len__(self):
+        return self.count
+
+    def key(self, index):
+        start, end = self._key_offsets[index], self._key_offsets[index + 1]
+        return self._key_bytes[start:end].tobytes().decode('utf-8')
+
+    def name(self, index):
+        start, end = self._name_offsets[index], self._name_offsets[index + 1]
+        return self._name_bytes[start:end].tobytes().decode('utf-8')
+
+    def find(self, food_name):
+        """Row index for an exact (normalized) name, or None"""
+        key = normalize_key(food_name)
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self.key(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.count and self.key(low) == key:
+            return low
+        return None
+
+    def per_100g(self, index):
+        """Nutrient values of one row as {nutrient: value} per 100 g"""
+        return {name: float(column[index]) for name, column in self.columns.items()}
+
+    def nutrition(self, index, food_name, quantity=100):
+        """Row scaled to `quantity` grams, in the get_nutrition_data dict shape"""
+        scale = quantity / 100
+        result = {'food_name': food_name}
+        for name in NUTRIENT_KEYS:
+            column = self.columns.get(name)
+            result[name] = round(float(column[index]) * scale, 2) if column is not None else 0
+        result['quantity'] = quantity
+        return result
+
+    def lookup(self, food_name, quantity=100):
+        """Nutrition for an exact food name, or None if it is not in the database"""
+        index = self.find(food_name)
+        if index is None:
+            return None
+        return self.nutrition(index, food_name, quantity)
+
+def write_database(path, records):
+    """
+    Build a database file from (source_id, name, {nutrient: per-100g value})
+    records. Later duplicates of a normalized name are dropped.
+    """
+    rows = {}
+    for source_id, name, values in records:
+        key = normalize_key(name)
+        if key and key not in rows:
+            rows[key] = (int(source_id or 0), str(name).strip(), values)
+    keys = sorted(rows)
+    count = len(keys)
+
+    def string_table(strings):
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(count + 1, dtype=np.uint32)
+        offsets[1:] = np.cumsum([len(b) for b in encoded]) if encoded else []
+        return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    arrays = {}
+    for name in NUTRIENT_KEYS:
+        arrays[name] = np.array([rows[k][2].get(name) or 0.0 for k in keys], dtype=np.float32)
+    arrays['ids'] = np.array([rows[k][0] for k in keys], dtype=np.int64)
+    arrays['key_offsets'], arrays['keys'] = string_table(keys)
+    arrays['name_offsets'], arrays['names'] = string_table([rows[k][1] for k in keys])
+
+    # Lay the blocks out after a header whose size is fixed before offsets are known
+    header = {'version': 1, 'count': count, 'columns': list(NUTRIENT_KEYS), 'blocks': {}}
+    placeholder = {name: {'offset': 0, 'length': 0} for name in arrays}
+    header_len = len(json.dumps(dict(header, blocks=placeholder))) + 32 * len(arrays) + 64
+    offset = len(MAGIC) + 8 + header_len
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        header['blocks'][name] = {'offset': offset, 'length': int(array.size)}
+        offset += array.nbytes
+
+    encoded_header = json.dumps(header).encode().ljust(header_len)
+    tmp_path = path + '.tmp'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', header_len))
+        f.write(encoded_header)
+        for name, array in arrays.items():
+            f.write(b'\0' * (header['blocks'][name]['offset'] - f.tell()))
+            f.write(array.tobytes())
+    # Workers that already mapped the old file keep reading it until they reopen
+    os.replace(tmp_path, path)
+    return count
+
+_database = None
+_database_lock = threading.Lock()
+_database_missing = False
+
+def get_nutrient_db():
+    """Process-wide NutrientDatabase from Config.NUTRIENT_DB_PATH (None if not imported yet)"""
+    global _database, _database_missing
+    if _database is None and not _database_missing:
+        with _database_lock:
+            if _database is None and not _database_missing:
+                if not os.path.exists(Config.NUTRIENT_DB_PATH):
+                    print(f"Nutrient database not found at {Config.NUTRIENT_DB_PATH}; "
+                          f"run import_nutrient_db.py to build it.")
+                    _database_missing = True
+                    return None
+                try:
+                    _database = NutrientDatabase(Config.NUTRIENT_DB_PATH)
+                    print(f"Nutrient database loaded: {len(_database)} foods.")
+                except Exception as e:
+                    print(f"Error loading nutrient database: {e}")
+                    _database_missing = True
+    return _database
@@ -0,0 +1,76 @@
+import numpy as np
+from services.nutrient_db import NUTRIENT_KEYS
+
+# Position of each nutrient in a NutrientVector
+NUTRIENT_INDEX = {name: i for i, name in enumerate(NUTRIENT_KEYS)}
+
+def _number(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def nutrient_matrix(dicts):
+    """(n, len(NUTRIENT_KEYS)) float array from nutrition dicts; missing or unparseable values are 0"""
+    dicts = list(dicts)
+    matrix = np.zeros((len(dicts), len(NUTRIENT_KEYS)), dtype=np.float64)
+    for row, data in enumerate(dicts):
+        if data:
+            matrix[row] = [_number(data.get(name)) for name in NUTRIENT_KEYS]
+    return matrix
+
+def compare_with_targets(consumed, targets, low=80, high=120):
+    """
+    Element-wise (percentage of target, difference from target, status) for
+    nutrient arrays of any matching shape, e.g. one row per day against one
+    row of targets. Status is 'low' below `low`%, 'high' above `high`%, else
+    'balanced'; targets that are not positive count as 0%.
+    """
+    consumed = np.asarray(consumed, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentages = np.where(targets > 0, consumed / targets * 100, 0.0)
+    status = np.where(percentages < low, 'low', np.where(percentages > high, 'high', 'balanced'))
+    return percentages, consumed - targets, status
+
+class NutrientVector:
+    """
+    Nutrient amounts as one float array in NUTRIENT_KEYS order.
+    Sums and scaling are array operations (comparisons against targets use
+    compare_with_targets() on the arrays); dicts in the API's
+    {'calories': ..., 'protein': ...} shape are only built at the edges with
+    from_dict() / to_dict().
+    """
+    __slots__ = ('values',)
+
+    def __init__(self, values=None):
+        if values is None:
+            self.values = np.zeros(len(NUTRIENT_KEYS), dtype=np.float64)
+        else:
+            self.values = np.array(values, dtype=np.float64)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(nutrient_matrix([data])[0])
+
+    @classmethod
+    def sum(cls, dicts):
+        """Total of many nutrition dicts (food items, logs, daily reports)"""
+        return cls(nutrient_matrix(dicts).sum(axis=0))
+
+    def to_dict(self, keys=NUTRIENT_KEYS, decimals=2):
+        """{'calories': ..., ...} for the given keys, rounded like the API always has"""
+        return {name: round(float(self.values[NUTRIENT_INDEX[name]]), decimals) for name in keys}
+
+    def __getitem__(self, name):
+        return float(self.values[NUTRIENT_INDEX[name]])
+
+    def __add__(self, other):
+        return NutrientVector(self.values + other.values)
+
+    def scale(self, factor):
+        """e.g. per-100g values -> a portion: vector.scale(grams / 100)"""
+        return NutrientVector(self.values * factor)
+
+    def __repr__(self):
+        return f"NutrientVector({self.to_dict()})"
@@ -1,9 +1,46 @@
-import requests
 import json
 import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import httpx
 import google.generativeai as genai
 from groq import Groq
 from config import Config
+from services.nutrient_db import NUTRIENT_KEYS, get_nutrient_db
+from services.food_names import FoodNameIndex, normalize_food_name
+from services.nutrients import NutrientVector
+from services.nutrition_cache import nutrition_cache
+from services.http_client import ProviderHTTPClient
+from services.provider_router import provider_router
+from services.single_flight import UNRESOLVED, single_flight
+
+# This is a simplified nutrition database, used when nothing else knows the food
+# In production, use a comprehensive database (see import_nutrient_db.py)
+MOCK_NUTRITION = {
+    # COCO Food Classes
+    'apple': {'calories': 52, 'protein': 0.3, 'carbs': 14, 'fat': 0.2, 'fiber': 2.4},
+    'banana': {'calories': 89, 'protein': 1.1, 'carbs': 23, 'fat': 0.3, 'fiber': 2.6},
+    'sandwich': {'calories': 300, 'protein': 12, 'carbs': 35, 'fat': 10, 'fiber': 2}, # Generic
+    'orange': {'calories': 47, 'protein': 0.9, 'carbs': 11.8, 'fat': 0.1, 'fiber': 2.4},
+    'broccoli': {'calories': 34, 'protein': 2.8, 'carbs': 7, 'fat': 0.4, 'fiber': 2.6},
+    'carrot': {'calories': 41, 'protein': 0.9, 'carbs': 9.6, 'fat': 0.2, 'fiber': 2.8},
+    'hot dog': {'calories': 290, 'protein': 10, 'carbs': 25, 'fat': 16, 'fiber': 1},
+    'pizza': {'calories': 266, 'protein': 11, 'carbs': 33, 'fat': 10, 'fiber': 2}, # Per slice
+    'donut': {'calories': 452, 'protein': 4.9, 'carbs': 51, 'fat': 25, 'fiber': 1.5}, # Per portion
+    'cake': {'calories': 371, 'protein': 5.5, 'carbs': 53.4, 'fat': 15.1, 'fiber': 0.5}, # Per slice
+    'bowl': {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0}, # Container
+    'cup': {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0}, # Container
+    
+    # Common Extras often detected
+    'chicken': {'calories': 165, 'protein': 31, 'carbs': 0, 'fat': 3.6, 'fiber': 0},
+    'rice': {'calories': 130, 'protein': 2.7, 'carbs': 28, 'fat': 0.3, 'fiber': 0.4},
+    'bread': {'calories': 265, 'protein': 9, 'carbs': 49, 'fat': 3.2, 'fiber': 2.7},
+    'egg': {'calories': 155, 'protein': 13, 'carbs': 1.1, 'fat': 11, 'fiber': 0},
+    'milk': {'calories': 42, 'protein': 3.4, 'carbs': 5, 'fat': 1, 'fiber': 0},
+    'salmon': {'calories': 208, 'protein': 20, 'carbs': 0, 'fat': 12, 'fiber': 0},
+    'tomato': {'calories': 18, 'protein': 0.9, 'carbs': 3.9, 'fat': 0.2, 'fiber': 1.2},
+}
 
 class NutritionService:
     def __init__(self):
@@ -16,15 +53,46 @@ class NutritionService:
 
         # Configure Groq
         if Config.GROQ_API_KEY:
-            self.groq_client = Groq(api_key=Config.GROQ_API_KEY)
+            # The SDK keeps its own keep-alive pool; give it the same timeouts and retry budget
+            self.groq_client = Groq(
+                api_key=Config.GROQ_API_KEY,
+                base_url=Config.GROQ_API_BASE or None,
+                timeout=httpx.Timeout(Config.PROVIDER_READ_TIMEOUT, connect=Config.PROVIDER_CONNECT_TIMEOUT),
+                max_retries=Config.PROVIDER_MAX_RETRIES
+            )
         else:
             self.groq_client = None
 
         # You can use APIs like Edamam, Nutritionix, or USDA FoodData Central
         self.api_key = os.getenv('NUTRITION_API_KEY', '')
-        self.api_url = 'https://api.edamam.com/api/food-database/v2/parser'
+        self.api_url = f"{Config.EDAMAM_API_BASE.rstrip('/')}/api/food-database/v2/parser"
         self.app_id = os.getenv('EDAMAM_APP_ID', '')
         self.app_key = os.getenv('EDAMAM_APP_KEY', '')
+        self.edamam_http = ProviderHTTPClient(
+            'edamam',
+            pool_size=Config.PROVIDER_POOL_SIZE or Config.NUTRITION_FANOUT_WORKERS,
+            connect_timeout=Config.PROVIDER_CONNECT_TIMEOUT,
+            read_timeout=Config.PROVIDER_READ_TIMEOUT,
+            max_retries=Config.PROVIDER_MAX_RETRIES,
+            backoff=Config.PROVIDER_RETRY_BACKOFF
+        )
+
+        # Name resolution index over the built-in table and the local nutrient database
+        self._name_index = None
+        self._name_entries = None
+        self._name_index_lock = threading.Lock()
+
+        # Multi-item Groq requests made by get_multiple_foods_nutrition
+        self.batch_stats = {'requests': 0, 'items': 0, 'missing': 0, 'total_ms': 0.0}
+        self._stats_lock = threading.Lock()
+
+        # Per-item lookups that could not be batched run concurrently, with a cap per provider
+        self._fanout_executor = None
+        self._fanout_executor_pid = None
+        self._provider_limits = {
+            'groq': threading.BoundedSemaphore(max(1, Config.NUTRITION_GROQ_CONCURRENCY)),
+            'edamam': threading.BoundedSemaphore(max(1, Config.NUTRITION_EDAMAM_CONCURRENCY))
+        }
 
     def get_nutrition_data(self, food_name, quantity=100):
         """
@@ -32,32 +100,145 @@ class NutritionService:
         quantity is in grams
         """
         try:
-            # Priority 1: Groq (Llama-3 High Performance)
-            if self.groq_client:
-                try:
-                    return self._get_from_groq(food_name, quantity)
-                except Exception as e:
-                    print(f"Groq Nutrition Error: {e}")
-
-            # Priority 2: Gemini (Backup)
-            if self.gemini_model:
-                 # ... fallback logic if needed, but for now we skip to API
-                 pass
-
-            # Priority 3: API (Edamam)
-            if self.app_id and self.app_key:
-                return self._get_from_api(food_name, quantity)
-            else:
-                # Fallback to mock data
-                return self._get_mock_nutrition(food_name, quantity)
+            nutrition = self._get_without_providers(food_name, quantity)
+            if nutrition is not None:
+                return nutrition
+            return self._get_from_providers(food_name, quantity)
+        except Exception as e:
+            print(f"Error fetching nutrition data: {e}")
+            return self._get_mock_nutrition(food_name, quantity)
+
+    def _get_without_providers(self, food_name, quantity):
+        """Confident local match or cached per-100g values; None if a provider is needed"""
+        # Priority 0: confident local match (nutrient database / built-in table, no network)
+        match = self.resolve_food(food_name)
+        if match and match['score'] >= Config.FOOD_NAME_MIN_CONFIDENCE:
+            return self._get_local_nutrition(match, food_name, quantity)
+
+        cached = nutrition_cache.get(normalize_food_name(food_name))
+        if cached is not None:
+            return self._scale_nutrition(cached['values'], food_name, quantity)
+        return None
+
+    def _get_provider_nutrition(self, food_name, quantity):
+        """get_nutrition_data for an item whose local lookup already missed"""
+        try:
+            # Another request may have cached it meanwhile; peek() so the miss is counted once
+            cached = self._cached_per_100g(normalize_food_name(food_name))
+            if cached is not None:
+                return self._scale_nutrition(cached[0], food_name, quantity)
+            return self._get_from_providers(food_name, quantity)
         except Exception as e:
             print(f"Error fetching nutrition data: {e}")
             return self._get_mock_nutrition(food_name, quantity)
 
-    def _get_from_groq(self, food_name, quantity):
+    def _get_from_providers(self, food_name, quantity):
+        """
+        Providers are asked for 100 g once per food; quantities are scaled locally.
+        Concurrent lookups of the same food (in this worker or, with the MongoDB
+        cache, in others) share a single provider call.
+        """
+        key = normalize_food_name(food_name)
+        values, source = single_flight.do(
+            key,
+            lambda: self._fetch_and_cache(key, food_name),
+            wait_for=lambda: self._cached_per_100g(key)
+        )
+        if values is None:
+            # Fallback to mock data
+            return self._get_mock_nutrition(food_name, quantity)
+        return self._scale_nutrition(values, food_name, quantity)
+
+    def _fetch_and_cache(self, key, food_name):
+        values, source = self._fetch_per_100g(food_name)
+        if values is not None:
+            # Cached before the lease is released, so waiting workers find it
+            nutrition_cache.put(key, values, source)
+        return values, source
+
+    @staticmethod
+    def _cached_per_100g(key):
+        cached = nutrition_cache.peek(key)
+        return (cached['values'], cached['source']) if cached is not None else None
+
+    def _available_providers(self):
+        # Gemini has no nutrition path yet; Groq and Edamam are routed
+        providers = []
+        if self.groq_client:
+            providers.append('groq')
+        if self.app_id and self.app_key:
+            providers.append('edamam')
+        return providers
+
+    def _fetch_per_100g(self, food_name):
+        """
+        Ask the fastest healthy provider first, within NUTRITION_LATENCY_BUDGET_MS.
+        Providers with an open circuit or too slow for the time left are skipped,
+        so the caller degrades to local data. Returns (values, source) or (None, None).
+        """
+        deadline = time.perf_counter() + Config.NUTRITION_LATENCY_BUDGET_MS / 1000
+        for provider in provider_router.ranked(self._available_providers()):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not provider_router.allow(provider, remaining * 1000):
+                continue
+
+            limit = self._provider_limits[provider]
+            if not limit.acquire(timeout=remaining):
+                # Saturated locally; the provider itself did not fail
+                provider_router.release(provider)
+                continue
+
+            start = time.perf_counter()
+            remaining = max(0.001, deadline - start)
+            result = None
+            ok = False
+            try:
+                if provider == 'groq':
+                    result = self._get_from_groq(food_name, 100, timeout=remaining)
+                else:
+                    result = self._get_from_api(food_name, 100, timeout=remaining)
+                ok = True
+            except Exception as e:
+                print(f"{provider.capitalize()} Nutrition Error: {e}")
+            finally:
+                limit.release()
+                provider_router.record(provider, (time.perf_counter() - start) * 1000, ok)
+
+            if result is not None:
+                return self._nutrient_values(result), provider
+        return None, None
+
+    @staticmethod
+    def _nutrient_values(nutrition):
+        """Numeric nutrient values of a provider response (unparseable values count as 0)"""
+        values = {}
+        for key in NUTRIENT_KEYS:
+            try:
+                values[key] = float(nutrition.get(key) or 0)
+            except (TypeError, ValueError):
+                values[key] = 0.0
+        return values
+
+    @staticmethod
+    def _scale_nutrition(per_100g, food_name, quantity):
+        """Per-100g values -> get_nutrition_data dict for `quantity` grams"""
+        result = {'food_name': food_name}
+        result.update(NutrientVector.from_dict(per_100g).scale(quantity / 100).to_dict())
+        result['quantity'] = quantity
+        return result
+
+    def _groq_within(self, timeout):
+        """Groq client for a call that must finish in `timeout` seconds (None: the default client)"""
+        if not timeout:
+            return self.groq_client
+        # The SDK's timeout is per attempt, so a retry would run past the budget
+        return self.groq_client.with_options(timeout=timeout, max_retries=0)
+
+    def _get_from_groq(self, food_name, quantity, timeout=None):
         """Get nutrition estimation from Groq (Llama-3)"""
         if not self.groq_client:
             return None
+        client = self._groq_within(timeout)
 
         prompt = f"""
         Analyze the nutrition for {quantity} grams of '{food_name}'.
@@ -82,7 +263,7 @@ class NutritionService:
         }}
         """
         
-        completion = self.groq_client.chat.completions.create(
+        completion = client.chat.completions.create(
             model="llama-3.3-70b-versatile",
             messages=[
                 {"role": "system", "content": "You are a nutritional database. Output valid JSON only."},
@@ -95,71 +276,204 @@ class NutritionService:
 
         text = completion.choices[0].message.content
         try:
-            # Handle potential markdown code blocks
-            if "```" in text:
-                text = text.split("```")[1]
-                if text.startswith("json"):
-                    text = text[4:]
-            
-            data = json.loads(text.strip())
-            
-            # Normalize keys to snake_case
-            normalized_data = {}
-            for k, v in data.items():
-                key = k.lower().replace(" ", "_").replace("-", "_")
-                # Handle potential nested "nutrition" object
-                if key == 'nutrition' and isinstance(v, dict):
-                    for sub_k, sub_v in v.items():
-                        sub_key = sub_k.lower().replace(" ", "_").replace("-", "_")
-                        normalized_data[sub_key] = sub_v
-                else:
-                    normalized_data[key] = v
-                    
-            # Map common variations
-            mappings = {
-                'vit_a': 'vitamin_a', 'vit_c': 'vitamin_c', 
-                'vitamin_a': 'vitamin_a', 'vitamin_c': 'vitamin_c',
-                'calcium': 'calcium', 'iron': 'iron', 'sodium': 'sodium',
-                'sugars': 'sugar'
-            }
-            
-            final_data = {
-                'food_name': food_name,
-                'quantity': quantity,
-                'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 
-                'fiber': 0, 'sugar': 0, 'sodium': 0, 
-                'calcium': 0, 'iron': 0, 'vitamin_a': 0, 'vitamin_c': 0
-            }
-            
-            for k, v in normalized_data.items():
-                # Direct match
-                if k in final_data:
-                    final_data[k] = v
-                # Mapped match
-                elif k in mappings:
-                    final_data[mappings[k]] = v
-                # Substring match (e.g., "vitamin a (mcg)")
-                else:
-                    for target in final_data.keys():
-                        if target in k:
-                            final_data[target] = v
-                            break
-                            
-            return final_data
-            
+            return self._parse_groq_nutrition(self._parse_groq_json(text), food_name, quantity)
         except json.JSONDecodeError:
             print(f"Failed to parse Groq response: {text}")
             raise
 
-    def _get_from_api(self, food_name, quantity):
-        """Fetch nutrition data from Edamam API"""
+    @staticmethod
+    def _parse_groq_json(text):
+        # Handle potential markdown code blocks
+        if "```" in text:
+            text = text.split("```")[1]
+            if text.startswith("json"):
+                text = text[4:]
+        return json.loads(text.strip())
+
+    @staticmethod
+    def _parse_groq_nutrition(data, food_name, quantity):
+        """Map one Groq nutrition object (loosely named keys) onto the get_nutrition_data dict"""
+        # Normalize keys to snake_case
+        normalized_data = {}
+        for k, v in data.items():
+            key = k.lower().replace(" ", "_").replace("-", "_")
+            # Handle potential nested "nutrition" object
+            if key == 'nutrition' and isinstance(v, dict):
+                for sub_k, sub_v in v.items():
+                    sub_key = sub_k.lower().replace(" ", "_").replace("-", "_")
+                    normalized_data[sub_key] = sub_v
+            else:
+                normalized_data[key] = v
+                
+        # Map common variations
+        mappings = {
+            'vit_a': 'vitamin_a', 'vit_c': 'vitamin_c', 
+            'vitamin_a': 'vitamin_a', 'vitamin_c': 'vitamin_c',
+            'calcium': 'calcium', 'iron': 'iron', 'sodium': 'sodium',
+            'sugars': 'sugar'
+        }
+        
+        final_data = {
+            'food_name': food_name,
+            'quantity': quantity,
+            'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 
+            'fiber': 0, 'sugar': 0, 'sodium': 0, 
+            'calcium': 0, 'iron': 0, 'vitamin_a': 0, 'vitamin_c': 0
+        }
+        
+        for k, v in normalized_data.items():
+            # Direct match
+            if k in final_data:
+                final_data[k] = v
+            # Mapped match
+            elif k in mappings:
+                final_data[mappings[k]] = v
+            # Substring match (e.g., "vitamin a (mcg)")
+            else:
+                for target in final_data.keys():
+                    if target in k:
+                        final_data[target] = v
+                        break
+                        
+        return final_data
+
+    def _get_batch_from_groq(self, food_names, timeout=None):
+        """
+        Per-100g nutrition for several foods in one Groq request.
+        Returns {index in food_names: values}; items the model skipped are absent.
+        """
+        items = [{'id': i, 'name': name} for i, name in enumerate(food_names)]
+        prompt = f"""
+        Analyze the nutrition for 100 grams of each of these foods:
+        {json.dumps(items)}
+        Return ONLY a JSON object {{"items": [...]}} with one entry per food, in any order.
+        Each entry has the food's "id" and these keys (values as numbers, no units):
+        calories (kcal), protein (g), carbs (g), fat (g), fiber (g), sugar (g),
+        sodium (mg), calcium (mg), iron (mg), vitamin_c (mg), vitamin_a (mcg)
+
+        Example format:
+        {{"items": [{{"id": 0, "calories": 150, "protein": 12.5, ...}}]}}
+        """
+
+        client = self._groq_within(timeout)
+        completion = client.chat.completions.create(
+            model="llama-3.3-70b-versatile",
+            messages=[
+                {"role": "system", "content": "You are a nutritional database. Output valid JSON only."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            max_tokens=200 + 150 * len(food_names),
+            response_format={"type": "json_object"}
+        )
+
+        data = self._parse_groq_json(completion.choices[0].message.content)
+        entries = data.get('items', []) if isinstance(data, dict) else data
+        by_name = {normalize_food_name(name): i for i, name in enumerate(food_names)}
+        results = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                index = int(entry.get('id'))
+            except (TypeError, ValueError):
+                # Some answers drop the id but echo the name
+                index = by_name.get(normalize_food_name(entry.get('name', '')))
+            if index is None or not 0 <= index < len(food_names):
+                continue
+            fields = {k: v for k, v in entry.items() if k not in ('id', 'name')}
+            results[index] = self._nutrient_values(self._parse_groq_nutrition(fields, food_names[index], 100))
+        return results
+
+    def _prefetch_batch(self, food_items):
+        """
+        Resolve every item that needs a provider with a single Groq request.
+        Returns {item index: nutrition}; items left out have already missed the
+        local lookup and fall back to per-item provider lookups.
+        """
+        results = {}
+        pending = {}  # normalized name -> item indexes
+        for i, item in enumerate(food_items):
+            food_name = item.get('name', '')
+            nutrition = self._get_without_providers(food_name, item.get('quantity', 100))
+            if nutrition is not None:
+                results[i] = nutrition
+            else:
+                pending.setdefault(normalize_food_name(food_name), []).append(i)
+
+        # One item gains nothing from batching; it goes through the normal chain
+        if not self.groq_client or len(pending) < 2:
+            return results
+
+        # Foods already being looked up by another request are left to the
+        # per-item path, which waits for that lookup instead of repeating it
+        calls = {}
+        for key in pending:
+            call = single_flight.begin(key)
+            if call is not None:
+                calls[key] = call
+        if not calls:
+            return results
+        # Asked only once a request will really be made: allow() may hand out the half-open probe
+        budget = Config.NUTRITION_LATENCY_BUDGET_MS / 1000
+        allowed = provider_router.allow('groq', Config.NUTRITION_LATENCY_BUDGET_MS)
+        limit = self._provider_limits['groq']
+        if allowed and not limit.acquire(timeout=budget):
+            # Saturated locally; the provider itself did not fail
+            provider_router.release('groq')
+            allowed = False
+        if not allowed:
+            for key, call in calls.items():
+                single_flight.finish(key, call, UNRESOLVED)
+            return results
+
+        keys = list(calls)
+        names = [food_items[pending[key][0]].get('name', '') for key in keys]
+        start = time.perf_counter()
+        ok = False
+        batch = {}
+        try:
+            batch = self._get_batch_from_groq(names, timeout=budget)
+            ok = True
+        except Exception as e:
+            print(f"Groq Batch Nutrition Error: {e}")
+        finally:
+            limit.release()
+            for index, key in enumerate(keys):
+                values = batch.get(index)
+                if values is not None:
+                    nutrition_cache.put(key, values, 'groq')
+                # Items the reply left out go through the per-item chain, for waiters too
+                single_flight.finish(key, calls[key], (values, 'groq') if values is not None else UNRESOLVED)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        provider_router.record('groq', elapsed_ms, ok)
+
+        for index, values in batch.items():
+            for i in pending[keys[index]]:
+                item = food_items[i]
+                results[i] = self._scale_nutrition(values, item.get('name', ''), item.get('quantity', 100))
+
+        print(f"Groq batch: {len(batch)}/{len(names)} foods in one request ({elapsed_ms:.0f} ms)")
+        with self._stats_lock:
+            self.batch_stats['requests'] += 1
+            self.batch_stats['items'] += len(names)
+            self.batch_stats['missing'] += len(names) - len(batch)
+            self.batch_stats['total_ms'] += elapsed_ms
+        return results
+
+    def _get_from_api(self, food_name, quantity, timeout=None):
+        """Fetch nutrition data from Edamam API (None if it does not know the food)"""
         try:
             params = {
                 'q': food_name,
                 'app_id': self.app_id,
                 'app_key': self.app_key
             }
-            response = requests.get(self.api_url, params=params, timeout=10)
+            # A budget bounds all attempts together, not each retry separately
+            response = self.edamam_http.get(self.api_url, params=params, budget=timeout or None)
+            # Server errors count against the provider; "not found" answers do not
+            if response.status_code >= 500:
+                response.raise_for_status()
             
             if response.status_code == 200:
                 data = response.json()
@@ -187,40 +501,60 @@ class NutritionService:
                     }
         except Exception as e:
             print(f"API error: {e}")
+            raise
         
-        return self._get_mock_nutrition(food_name, quantity)
+        return None
+
+    @property
+    def name_index(self):
+        """FoodNameIndex over built-in and nutrient database names, built on first use"""
+        if self._name_index is None:
+            with self._name_index_lock:
+                if self._name_index is None:
+                    entries = [('builtin', key) for key in MOCK_NUTRITION]
+                    names = list(MOCK_NUTRITION)
+                    local_db = get_nutrient_db()
+                    if local_db is not None:
+                        entries.extend(('db', i) for i in range(len(local_db)))
+                        names.extend(local_db.name(i) for i in range(len(local_db)))
+                    self._name_entries = entries
+                    self._name_index = FoodNameIndex(names)
+        return self._name_index
 
-    def _get_mock_nutrition(self, food_name, quantity):
+    def resolve_food(self, food_name, k=1):
+        """
+        Resolve a free-text food name to canonical foods.
+        Returns the best {'id', 'name', 'score'} (or the top-k list when k > 1).
+        """
+        index = self.name_index
+        matches = []
+        for entry_id, score in index.search(food_name, k=k):
+            kind, ref = self._name_entries[entry_id]
+            if kind == 'db':
+                food_id = f"fdc:{int(get_nutrient_db().ids[ref])}"
+            else:
+                food_id = f"builtin:{ref}"
+            matches.append({'id': food_id, 'name': index.names[entry_id], 'score': score, '_entry': entry_id})
+        if k > 1:
+            return matches
+        return matches[0] if matches else None
+
+    def _get_local_nutrition(self, match, food_name, quantity):
+        """Nutrition for a resolved food from the local database or the built-in table"""
+        kind, ref = self._name_entries[match['_entry']]
+        if kind == 'db':
+            return get_nutrient_db().nutrition(ref, food_name, quantity)
+        return self._get_mock_nutrition(food_name, quantity, ref)
+
+    def _get_mock_nutrition(self, food_name, quantity, key=None):
         """Mock nutrition data for development"""
-        # This is a simplified nutrition database
-        # In production, use a comprehensive database
-        nutrition_db = {
-            # COCO Food Classes
-            'apple': {'calories': 52, 'protein': 0.3, 'carbs': 14, 'fat': 0.2, 'fiber': 2.4},
-            'banana': {'calories': 89, 'protein': 1.1, 'carbs': 23, 'fat': 0.3, 'fiber': 2.6},
-            'sandwich': {'calories': 300, 'protein': 12, 'carbs': 35, 'fat': 10, 'fiber': 2}, # Generic
-            'orange': {'calories': 47, 'protein': 0.9, 'carbs': 11.8, 'fat': 0.1, 'fiber': 2.4},
-            'broccoli': {'calories': 34, 'protein': 2.8, 'carbs': 7, 'fat': 0.4, 'fiber': 2.6},
-            'carrot': {'calories': 41, 'protein': 0.9, 'carbs': 9.6, 'fat': 0.2, 'fiber': 2.8},
-            'hot dog': {'calories': 290, 'protein': 10, 'carbs': 25, 'fat': 16, 'fiber': 1},
-            'pizza': {'calories': 266, 'protein': 11, 'carbs': 33, 'fat': 10, 'fiber': 2}, # Per slice
-            'donut': {'calories': 452, 'protein': 4.9, 'carbs': 51, 'fat': 25, 'fiber': 1.5}, # Per portion
-            'cake': {'calories': 371, 'protein': 5.5, 'carbs': 53.4, 'fat': 15.1, 'fiber': 0.5}, # Per slice
-            'bowl': {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0}, # Container
-            'cup': {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0}, # Container
-            
-            # Common Extras often detected
-            'chicken': {'calories': 165, 'protein': 31, 'carbs': 0, 'fat': 3.6, 'fiber': 0},
-            'rice': {'calories': 130, 'protein': 2.7, 'carbs': 28, 'fat': 0.3, 'fiber': 0.4},
-            'bread': {'calories': 265, 'protein': 9, 'carbs': 49, 'fat': 3.2, 'fiber': 2.7},
-            'egg': {'calories': 155, 'protein': 13, 'carbs': 1.1, 'fat': 11, 'fiber': 0},
-            'milk': {'calories': 42, 'protein': 3.4, 'carbs': 5, 'fat': 1, 'fiber': 0},
-            'salmon': {'calories': 208, 'protein': 20, 'carbs': 0, 'fat': 12, 'fiber': 0},
-            'tomato': {'calories': 18, 'protein': 0.9, 'carbs': 3.9, 'fat': 0.2, 'fiber': 1.2},
-        }
-        
-        food_lower = food_name.lower()
-        base_nutrition = nutrition_db.get(food_lower, {
+        if key is None:
+            # Weaker matches are still better than the generic default
+            match = self.resolve_food(food_name)
+            if match and match['score'] >= Config.FOOD_NAME_FALLBACK_CONFIDENCE:
+                return self._get_local_nutrition(match, food_name, quantity)
+            key = food_name.lower()
+        base_nutrition = MOCK_NUTRITION.get(key, {
             'calories': 100,
             'protein': 5,
             'carbs': 15,
@@ -245,47 +579,66 @@ class NutritionService:
             'quantity': quantity
         }
 
+    def _executor(self):
+        # Created per process: threads do not survive a gunicorn fork
+        if self._fanout_executor is None or self._fanout_executor_pid != os.getpid():
+            self._fanout_executor = ThreadPoolExecutor(
+                max_workers=Config.NUTRITION_FANOUT_WORKERS, thread_name_prefix='nutrition-fanout'
+            )
+            self._fanout_executor_pid = os.getpid()
+        return self._fanout_executor
+
+    def _resolve_items(self, food_items, prefetched, checked_locally=False):
+        """
+        Yield (index, nutrition) for every item: prefetched ones first, the rest
+        as their concurrent per-item lookups complete. With `checked_locally`,
+        items not prefetched already missed _get_without_providers and go
+        straight to the providers.
+        """
+        lookup = self._get_provider_nutrition if checked_locally else self.get_nutrition_data
+        remaining = []
+        for i, item in enumerate(food_items):
+            if i in prefetched:
+                yield i, prefetched[i]
+            else:
+                remaining.append(i)
+
+        if len(remaining) == 1:
+            item = food_items[remaining[0]]
+            yield remaining[0], lookup(item.get('name', ''), item.get('quantity', 100))
+            return
+
+        futures = {
+            self._executor().submit(
+                lookup, food_items[i].get('name', ''), food_items[i].get('quantity', 100)
+            ): i
+            for i in remaining
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
     def get_multiple_foods_nutrition(self, food_items):
         """Get combined nutrition for multiple food items"""
-        total_nutrition = {
-            'calories': 0,
-            'protein': 0,
-            'carbs': 0,
-            'fat': 0,
-            'fiber': 0,
-            'sugar': 0,
-            'sodium': 0,
-            'calcium': 0,
-            'iron': 0,
-            'vitamin_c': 0,
-            'vitamin_a': 0,
-            'foods': []
-        }
-        
-        for item in food_items:
-            food_name = item.get('name', '')
-            quantity = item.get('quantity', 100)
-            nutrition = self.get_nutrition_data(food_name, quantity)
-            
-            total_nutrition['calories'] += nutrition['calories']
-            total_nutrition['protein'] += nutrition['protein']
-            total_nutrition['carbs'] += nutrition['carbs']
-            total_nutrition['fat'] += nutrition['fat']
-            total_nutrition['fiber'] += nutrition.get('fiber', 0)
-            total_nutrition['sugar'] += nutrition.get('sugar', 0)
-            total_nutrition['sodium'] += nutrition.get('sodium', 0)
-            total_nutrition['calcium'] += nutrition.get('calcium', 0)
-            total_nutrition['iron'] += nutrition.get('iron', 0)
-            total_nutrition['vitamin_c'] += nutrition.get('vitamin_c', 0)
-            total_nutrition['vitamin_a'] += nutrition.get('vitamin_a', 0)
-            
-            total_nutrition['foods'].append(nutrition)
-        
-        # Round all values
-        for key in total_nutrition:
-            if isinstance(total_nutrition[key], (int, float)):
-                total_nutrition[key] = round(total_nutrition[key], 2)
-        
+        # Everything not answered locally or from cache goes to Groq in one request
+        try:
+            prefetched = self._prefetch_batch(food_items)
+            checked_locally = True
+        except Exception as e:
+            print(f"Error prefetching nutrition data: {e}")
+            prefetched = {}
+            checked_locally = False
+
+        # Totals accumulate as each lookup finishes
+        foods = [None] * len(food_items)
+        totals = NutrientVector()
+        for i, nutrition in self._resolve_items(food_items, prefetched, checked_locally):
+            foods[i] = nutrition
+            totals += NutrientVector.from_dict(nutrition)
+
+        # Rounded totals; foods in the same order as the input items,
+        # whatever order the lookups finished in
+        total_nutrition = totals.to_dict()
+        total_nutrition['foods'] = foods
         return total_nutrition
 
 # Singleton instance
@@ -0,0 +1,128 @@
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from config import Config
+
+class NutritionCache:
+    """
+    Per-100g nutrition values keyed by normalized food name.
+    Providers are only asked for 100 g and callers scale by quantity, so
+    "rice 150g" and "Rice, 200 g" share one entry. Entries expire after
+    ttl_seconds; an optional MongoDB tier (`nutrition_cache`) is written
+    through and shared by all gunicorn workers.
+    """
+    def __init__(self, max_entries=4096, ttl_seconds=7 * 86400, use_mongo=False):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.use_mongo = use_mongo
+        self._entries = OrderedDict()  # key -> (stored_at, entry)
+        self._lock = threading.Lock()
+        self._indexed = False
+        self.stats = {'hits': 0, 'mongo_hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+    def get(self, key):
+        """Cached {'values': {nutrient: per-100g}, 'source': provider}, or None"""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                if time.time() - cached[0] < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return dict(cached[1])
+                del self._entries[key]
+                self.stats['expired'] += 1
+
+        if self.use_mongo:
+            doc = self._mongo_get(key)
+            # MongoDB's TTL monitor only runs once a minute, so check the age here too
+            stored_at = doc['updated_at'].replace(tzinfo=timezone.utc).timestamp() if doc else 0
+            if doc is not None and time.time() - stored_at < self.ttl_seconds:
+                entry = {'values': doc['values'], 'source': doc['source']}
+                self._remember(key, entry, stored_at)
+                self._count('mongo_hits')
+                self._count('hits')
+                return dict(entry)
+
+        self._count('misses')
+        return None
+
+    def peek(self, key):
+        """Like get(), but without touching hit/miss counters (used while polling)"""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and time.time() - cached[0] < self.ttl_seconds:
+                return dict(cached[1])
+
+        if self.use_mongo:
+            doc = self._mongo_get(key)
+            stored_at = doc['updated_at'].replace(tzinfo=timezone.utc).timestamp() if doc else 0
+            if doc is not None and time.time() - stored_at < self.ttl_seconds:
+                entry = {'values': doc['values'], 'source': doc['source']}
+                self._remember(key, entry, stored_at)
+                return dict(entry)
+        return None
+
+    def put(self, key, values, source):
+        """Store per-100g values produced by `source` ('groq' / 'edamam' / ...)"""
+        entry = {'values': dict(values), 'source': source}
+        self._remember(key, entry, time.time())
+        if self.use_mongo:
+            self._mongo_put(key, entry)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats, size=len(self._entries), max_entries=self.max_entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _remember(self, key, entry, stored_at):
+        with self._lock:
+            self._entries[key] = (stored_at, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _mongo(self):
+        # Not cached: the collection belongs to this process's client (see database.py)
+        from database import db
+        collection = db.nutrition_cache
+        if not self._indexed:
+            # Let MongoDB expire old entries on its own
+            collection.create_index('updated_at', expireAfterSeconds=self.ttl_seconds)
+            self._indexed = True
+        return collection
+
+    def _mongo_get(self, key):
+        try:
+            return self._mongo().find_one({'_id': key})
+        except Exception as e:
+            print(f"Nutrition cache (mongo) read error: {e}")
+            return None
+
+    def _mongo_put(self, key, entry):
+        try:
+            self._mongo().update_one(
+                {'_id': key},
+                {'$set': dict(entry, updated_at=datetime.utcnow())},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"Nutrition cache (mongo) write error: {e}")
+
+# Singleton instance
+nutrition_cache = NutritionCache(
+    max_entries=Config.NUTRITION_CACHE_SIZE,
+    ttl_seconds=Config.NUTRITION_CACHE_TTL_SECONDS,
+    use_mongo=Config.NUTRITION_CACHE_MONGO
+)
@@ -0,0 +1,166 @@
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from config import Config
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures, or when the
+    error rate over the rolling window reaches `error_rate` (with at least
+    `min_samples` calls). After `open_seconds` one probe call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+    def __init__(self, failure_threshold=5, error_rate=0.5, min_samples=10, open_seconds=30):
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.min_samples = min_samples
+        self.open_seconds = open_seconds
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def allow(self, now):
+        if self.state == 'closed':
+            return True
+        if self.state == 'open' and now - self.opened_at >= self.open_seconds:
+            self.state = 'half_open'
+            self.probe_in_flight = False
+        if self.state == 'half_open' and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def release(self):
+        """Give back a half-open probe that was allowed but never made"""
+        self.probe_in_flight = False
+
+    def record(self, ok, error_rate, samples, now):
+        """Update after a call; returns the new state if it changed, else None"""
+        previous = self.state
+        if ok:
+            self.consecutive_failures = 0
+            if self.state == 'half_open':
+                self.state = 'closed'
+        else:
+            self.consecutive_failures += 1
+            tripped = (self.consecutive_failures >= self.failure_threshold
+                       or (samples >= self.min_samples and error_rate >= self.error_rate))
+            if self.state == 'half_open' or (self.state == 'closed' and tripped):
+                self.state = 'open'
+                self.opened_at = now
+        self.probe_in_flight = False
+        return self.state if self.state != previous else None
+
+class ProviderRouter:
+    """
+    Picks which nutrition provider to call, fastest healthy one first.
+    Each provider has a rolling window of (latency, ok) samples and a circuit
+    breaker. Providers whose breaker is open, or whose median latency does not
+    fit the time left in the request's budget, are skipped so the caller can
+    fall back to local data instead of waiting for a timeout.
+    """
+    def __init__(self, providers, window=50, failure_threshold=5, error_rate=0.5, open_seconds=30):
+        self.providers = list(providers)
+        self._windows = {name: deque(maxlen=window) for name in self.providers}
+        self._breakers = {
+            name: CircuitBreaker(failure_threshold, error_rate, min(10, window), open_seconds)
+            for name in self.providers
+        }
+        self._sampled_at = {name: 0.0 for name in self.providers}
+        self.transitions = deque(maxlen=100)
+        self.stats = {'skipped_open': 0, 'skipped_budget': 0}
+        self._lock = threading.Lock()
+
+    def _median_ms(self, name):
+        latencies = sorted(ms for ms, _ in self._windows[name])
+        return latencies[len(latencies) // 2] if latencies else None
+
+    def _error_rate(self, name):
+        window = self._windows[name]
+        return sum(1 for _, ok in window if not ok) / len(window) if window else 0.0
+
+    def _expected_ms(self, name):
+        # Median latency inflated by the error rate: a provider that fails fast is not "fast"
+        median = self._median_ms(name)
+        if median is None:
+            return 0.0
+        return median / max(0.05, 1.0 - self._error_rate(name))
+
+    def ranked(self, available):
+        """Available providers, lowest expected latency first (untried ones keep their priority order)"""
+        with self._lock:
+            order = [name for name in self.providers if name in available]
+            return sorted(order, key=lambda name: (self._expected_ms(name), order.index(name)))
+
+    def allow(self, name, remaining_ms):
+        """
+        Whether to call `name` now, given the time left in the request budget.
+        The latency window only changes when calls are made, so a provider
+        skipped as too slow is tried again once `open_seconds` pass without
+        a new sample, and a half-open probe is never skipped for its budget.
+        """
+        with self._lock:
+            now = time.monotonic()
+            breaker = self._breakers[name]
+            median = self._median_ms(name)
+            too_slow = median is not None and median > remaining_ms and len(self._windows[name]) >= 5
+            if too_slow and breaker.state == 'closed':
+                if now - self._sampled_at[name] < breaker.open_seconds:
+                    self.stats['skipped_budget'] += 1
+                    return False
+                # Stale samples: let this call through to measure again, one per period
+                self._sampled_at[name] = now
+            previous = breaker.state
+            allowed = breaker.allow(now)
+            if breaker.state != previous:
+                self._transition(name, breaker)
+            if not allowed:
+                self.stats['skipped_open'] += 1
+            return allowed
+
+    def _transition(self, name, breaker):
+        self.transitions.append({
+            'provider': name, 'state': breaker.state, 'at': datetime.utcnow().isoformat(),
+            'consecutive_failures': breaker.consecutive_failures
+        })
+        print(f"Nutrition provider {name}: circuit {breaker.state}")
+
+    def release(self, name):
+        """Call instead of record() when an allowed call was not made after all"""
+        with self._lock:
+            self._breakers[name].release()
+
+    def record(self, name, latency_ms, ok):
+        with self._lock:
+            self._windows[name].append((latency_ms, ok))
+            self._sampled_at[name] = time.monotonic()
+            breaker = self._breakers[name]
+            if breaker.record(ok, self._error_rate(name), len(self._windows[name]), time.monotonic()):
+                self._transition(name, breaker)
+
+    def get_state(self):
+        """Breaker state, rolling latency and error rate per provider, plus recent transitions"""
+        with self._lock:
+            providers = {}
+            for name in self.providers:
+                breaker = self._breakers[name]
+                median = self._median_ms(name)
+                providers[name] = {
+                    'state': breaker.state,
+                    'samples': len(self._windows[name]),
+                    'median_ms': round(median, 1) if median is not None else None,
+                    'error_rate': round(self._error_rate(name), 3),
+                    'consecutive_failures': breaker.consecutive_failures
+                }
+            return {'providers': providers, 'transitions': list(self.transitions), **self.stats}
+
+# Singleton instance
+provider_router = ProviderRouter(
+    ['groq', 'edamam'],
+    window=Config.PROVIDER_WINDOW_SIZE,
+    failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+    error_rate=Config.BREAKER_ERROR_RATE,
+    open_seconds=Config.BREAKER_OPEN_SECONDS
+)
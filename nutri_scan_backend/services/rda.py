@@ -1,3 +1,5 @@
+from services.nutrients import NUTRIENT_INDEX, NutrientVector, compare_with_targets, nutrient_matrix
+
 class RDAService:
     """RDA (Recommended Daily Allowance) comparison service"""
     
@@ -14,79 +16,61 @@ class RDAService:
         'vitamin_a': {'male': 900, 'female': 700},  # mcg
     }
     
+    # Nutrients compared in the analysis, and targets when neither profile nor RDA has one
+    COMPARED_NUTRIENTS = ('calories', 'protein', 'carbs', 'fat')
+    DEFAULT_TARGETS = {'calories': 2000, 'protein': 50, 'carbs': 250, 'fat': 65}
+
+    @staticmethod
+    def targets_for(user_profile):
+        """Personalized daily requirements if available, otherwise RDA, as a NutrientVector"""
+        gender = user_profile.get('gender', 'male').lower()
+        daily_req = user_profile.get('daily_requirements', {})
+        return NutrientVector.from_dict({
+            nutrient: daily_req.get(nutrient, RDAService.RDA_VALUES[nutrient].get(gender, default))
+            for nutrient, default in RDAService.DEFAULT_TARGETS.items()
+        })
+
     @staticmethod
     def compare_with_rda(consumed_nutrition, user_profile):
         """
         Compare consumed nutrition with RDA standards
         Returns analysis with suggestions
         """
-        gender = user_profile.get('gender', 'male').lower()
-        daily_req = user_profile.get('daily_requirements', {})
-        
-        # Use personalized requirements if available, otherwise use RDA
-        target_calories = daily_req.get('calories', RDAService.RDA_VALUES['calories'].get(gender, 2000))
-        target_protein = daily_req.get('protein', RDAService.RDA_VALUES['protein'].get(gender, 50))
-        target_carbs = daily_req.get('carbs', RDAService.RDA_VALUES['carbs'].get(gender, 250))
-        target_fat = daily_req.get('fat', RDAService.RDA_VALUES['fat'].get(gender, 65))
-        
-        analysis = {
-            'calories': RDAService._analyze_nutrient(
-                consumed_nutrition.get('calories', 0),
-                target_calories,
-                'calories'
-            ),
-            'protein': RDAService._analyze_nutrient(
-                consumed_nutrition.get('protein', 0),
-                target_protein,
-                'protein'
-            ),
-            'carbs': RDAService._analyze_nutrient(
-                consumed_nutrition.get('carbs', 0),
-                target_carbs,
-                'carbs'
-            ),
-            'fat': RDAService._analyze_nutrient(
-                consumed_nutrition.get('fat', 0),
-                target_fat,
-                'fat'
-            ),
-            'overall_status': 'balanced'
-        }
-        
-        # Determine overall status
-        low_count = sum(1 for nutrient in ['calories', 'protein', 'carbs', 'fat'] 
-                       if analysis[nutrient]['status'] == 'low')
-        high_count = sum(1 for nutrient in ['calories', 'protein', 'carbs', 'fat'] 
-                        if analysis[nutrient]['status'] == 'high')
-        
-        if low_count > 0 or high_count > 0:
-            analysis['overall_status'] = 'not_balanced'
-        
-        # Generate suggestions
-        suggestions = RDAService._generate_suggestions(analysis)
-        analysis['suggestions'] = suggestions
-        
-        return analysis
-    
+        return RDAService.compare_many([consumed_nutrition], user_profile)[0]
+
     @staticmethod
-    def _analyze_nutrient(consumed, target, nutrient_name):
-        """Analyze a single nutrient"""
-        percentage = (consumed / target * 100) if target > 0 else 0
-        
-        if percentage < 80:
-            status = 'low'
-        elif percentage > 120:
-            status = 'high'
-        else:
-            status = 'balanced'
-        
-        return {
-            'consumed': round(consumed, 2),
-            'target': round(target, 2),
-            'percentage': round(percentage, 2),
-            'status': status,
-            'difference': round(consumed - target, 2)
-        }
+    def compare_many(consumed_list, user_profile):
+        """
+        compare_with_rda for many nutrition dicts at once (every day of the
+        weekly report): one matrix comparison against the profile's targets
+        """
+        targets = RDAService.targets_for(user_profile).values
+        consumed = nutrient_matrix(consumed_list)
+        percentages, differences, status = compare_with_targets(consumed, targets)
+
+        columns = [(nutrient, NUTRIENT_INDEX[nutrient]) for nutrient in RDAService.COMPARED_NUTRIENTS]
+        analyses = []
+        for row in range(len(consumed)):
+            analysis = {
+                nutrient: {
+                    'consumed': round(float(consumed[row, col]), 2),
+                    'target': round(float(targets[col]), 2),
+                    'percentage': round(float(percentages[row, col]), 2),
+                    'status': str(status[row, col]),
+                    'difference': round(float(differences[row, col]), 2)
+                }
+                for nutrient, col in columns
+            }
+
+            # Determine overall status
+            balanced = all(analysis[nutrient]['status'] == 'balanced' for nutrient, _ in columns)
+            analysis['overall_status'] = 'balanced' if balanced else 'not_balanced'
+
+            # Generate suggestions
+            analysis['suggestions'] = RDAService._generate_suggestions(analysis)
+            analyses.append(analysis)
+
+        return analyses
     
     @staticmethod
     def _generate_suggestions(analysis):
@@ -0,0 +1,106 @@
+import os
+import uuid
+import socket
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+class ScanJobQueue:
+    """
+    Bounded background pool for food scans (POST /api/food/upload?async=1).
+    Job state lives in the `scan_jobs` MongoDB collection so results outlive
+    the worker that produced them. Jobs that were in flight when their worker
+    died are reported as failed once they exceed the job timeout.
+    """
+    def __init__(self, max_workers=2, max_pending=16, timeout_seconds=300):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.worker_id = None
+
+    def _collection(self):
+        from database import db
+        return db.scan_jobs
+
+    def _ensure_executor(self):
+        # Created lazily per process: pool threads do not survive a gunicorn fork
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scan-job')
+            self._pid = os.getpid()
+            self._pending = 0
+            self.worker_id = f"{socket.gethostname()}:{self._pid}"
+
+    def submit(self, user_id, fn, *args):
+        """Queue fn(*args) as a job; returns the job id, or None when the queue is full"""
+        with self._lock:
+            self._ensure_executor()
+            if self._pending >= self.max_pending:
+                return None
+            self._pending += 1
+
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow()
+        try:
+            self._collection().insert_one({
+                '_id': job_id,
+                'user_id': user_id,
+                'status': 'queued',
+                'worker': self.worker_id,
+                'created_at': now,
+                'updated_at': now
+            })
+            self._executor.submit(self._run, job_id, fn, args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return job_id
+
+    def get(self, job_id, user_id):
+        """Job document for this user, or None"""
+        job = self._collection().find_one({'_id': job_id, 'user_id': user_id})
+        if not job:
+            return None
+        if job['status'] in ('queued', 'running'):
+            age = datetime.utcnow() - job['updated_at']
+            if age > timedelta(seconds=self.timeout_seconds):
+                # The worker running it was restarted or killed
+                self._update(job_id, status='failed', error='Job was lost (worker restarted or timed out)')
+                job = self._collection().find_one({'_id': job_id})
+        job['job_id'] = job.pop('_id')
+        return job
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def _run(self, job_id, fn, args):
+        try:
+            self._update(job_id, status='running')
+            result = fn(*args)
+            self._update(job_id, status='done', result=result)
+        except Exception as e:
+            print(f"Scan job {job_id} failed: {e}")
+            self._update(job_id, status='failed', error=str(e))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = datetime.utcnow()
+        try:
+            self._collection().update_one({'_id': job_id}, {'$set': fields})
+        except Exception as e:
+            print(f"Error updating scan job {job_id}: {e}")
+
+# Singleton instance
+scan_job_queue = ScanJobQueue(
+    max_workers=Config.SCAN_JOB_WORKERS,
+    max_pending=Config.SCAN_JOB_QUEUE_LIMIT,
+    timeout_seconds=Config.SCAN_JOB_TIMEOUT_SECONDS
+)
@@ -0,0 +1,178 @@
+import os
+import time
+import socket
+import threading
+from datetime import datetime, timedelta
+from config import Config
+
+# Published by a leader that gave up on a key: waiters run their own lookup instead
+UNRESOLVED = object()
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Request coalescing for provider lookups keyed on a normalized food name.
+    Within a process, concurrent callers for the same key wait for the first
+    one (the leader) and share its result. Across workers, the leader takes a
+    short-lived lease document in `nutrition_leases`; a worker that finds the
+    lease taken polls the shared nutrition cache for the holder's result
+    instead of calling the provider itself, until the lease ends or expires.
+    """
+    def __init__(self, use_mongo=False, lease_seconds=6, poll_ms=50):
+        self.use_mongo = use_mongo
+        self.lease_seconds = lease_seconds
+        self.poll = poll_ms / 1000
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._indexed = False
+        self.stats = {'provider_calls': 0, 'coalesced_local': 0, 'coalesced_remote': 0, 'lease_timeouts': 0}
+
+    def do(self, key, fn, wait_for=None):
+        """
+        Run fn() once per key across concurrent callers and return its result.
+        `wait_for` returns the result from the shared cache (or None) and
+        enables cross-worker coalescing.
+        """
+        while True:
+            call = self.begin(key)
+            if call is not None:
+                break
+            joined, result = self._join(key)
+            if joined and result is not UNRESOLVED:
+                return result
+            # The leader finished between begin() and _join(), or left the key
+            # unresolved: try again (and likely lead the lookup ourselves)
+        try:
+            result = self._lead(key, fn, wait_for)
+        except Exception as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result
+
+    def begin(self, key):
+        """Become the leader for key: returns a call token, or None if a lookup is already in flight"""
+        with self._lock:
+            if key in self._calls:
+                return None
+            call = _Call()
+            self._calls[key] = call
+            return call
+
+    def finish(self, key, call, result=None, error=None):
+        """Publish the leader's result to everyone waiting on key (UNRESOLVED: nothing to share)"""
+        call.result = result
+        call.error = error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.event.set()
+
+    def _join(self, key):
+        """Wait for the in-flight lookup of key: (True, result), or (False, None) if there is none"""
+        with self._lock:
+            call = self._calls.get(key)
+        if call is None:
+            return False, None
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        if call.result is not UNRESOLVED:
+            self._count('coalesced_local')
+        return True, call.result
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats, in_flight=len(self._calls))
+        stats['provider_calls_saved'] = stats['coalesced_local'] + stats['coalesced_remote']
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _lead(self, key, fn, wait_for):
+        if not self.use_mongo or wait_for is None or self._acquire(key):
+            try:
+                self._count('provider_calls')
+                return fn()
+            finally:
+                if self.use_mongo and wait_for is not None:
+                    self._release(key)
+
+        # Another worker holds the lease: wait for its result in the shared cache
+        deadline = time.monotonic() + self.lease_seconds
+        while time.monotonic() < deadline:
+            time.sleep(self.poll)
+            result = wait_for()
+            if result is not None:
+                self._count('coalesced_remote')
+                return result
+            if not self._lease_held(key):
+                # The holder finished without a cached result (provider failure)
+                break
+        else:
+            self._count('lease_timeouts')
+
+        self._count('provider_calls')
+        return fn()
+
+    # --- MongoDB leases ---
+
+    def _mongo(self):
+        # Not cached: the collection belongs to this process's client (see database.py)
+        from database import db
+        collection = db.nutrition_leases
+        if not self._indexed:
+            # Crashed holders' leases are cleaned up by MongoDB; expires_at is also checked on read
+            collection.create_index('expires_at', expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    def _owner(self):
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _acquire(self, key):
+        """Take the lease for key; True if we hold it (or MongoDB is unavailable)"""
+        from pymongo.errors import DuplicateKeyError
+        now = datetime.utcnow()
+        lease = {'owner': self._owner(), 'expires_at': now + timedelta(seconds=self.lease_seconds)}
+        try:
+            self._mongo().insert_one(dict(lease, _id=key))
+            return True
+        except DuplicateKeyError:
+            # Taken; steal it only if the holder's lease has run out
+            stolen = self._mongo().find_one_and_update(
+                {'_id': key, 'expires_at': {'$lt': now}}, {'$set': lease}
+            )
+            return stolen is not None
+        except Exception as e:
+            print(f"Single-flight lease error: {e}")
+            return True
+
+    def _release(self, key):
+        try:
+            self._mongo().delete_one({'_id': key, 'owner': self._owner()})
+        except Exception as e:
+            print(f"Single-flight release error: {e}")
+
+    def _lease_held(self, key):
+        try:
+            return self._mongo().find_one({'_id': key, 'expires_at': {'$gt': datetime.utcnow()}}) is not None
+        except Exception:
+            return False
+
+# Singleton instance
+single_flight = SingleFlight(
+    # Cross-worker coalescing needs the shared cache to hand results over
+    use_mongo=Config.NUTRITION_SINGLE_FLIGHT_MONGO and Config.NUTRITION_CACHE_MONGO,
+    lease_seconds=Config.NUTRITION_LEASE_SECONDS,
+    poll_ms=Config.NUTRITION_LEASE_POLL_MS
+)
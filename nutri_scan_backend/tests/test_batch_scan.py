@@ -0,0 +1,62 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import batch_scan
+from batch_scan import JsonlWriter, ParquetWriter
+from config import Config
+from services.food_detection import food_detection_service
+
+def _record(i, status='ok'):
+    return {'path': f"/img/{i}.jpg", 'status': status, 'pid': 1, 'timings_ms': {'read': 0.1}}
+
+def test_jsonl_resume_skips_only_successful_paths(tmp_path):
+    path = str(tmp_path / 'scan.jsonl')
+    writer = JsonlWriter(path)
+    writer.write(_record(1))
+    writer.write(_record(2, status='error'))
+    writer.close()
+    with open(path, 'a') as f:
+        f.write('{"path": "/img/3.jpg", "sta')  # interrupted mid-line
+
+    assert JsonlWriter(path).done_paths() == {'/img/1.jpg'}
+
+def test_parquet_parts_survive_a_crash_before_close(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'scan.parquet')
+    writer = ParquetWriter(path, row_group_size=2)
+    for i in range(5):
+        writer.write(_record(i, status='error' if i == 1 else 'ok'))
+    # No close(): the fifth row was never flushed, the first four are on disk
+    assert sorted(os.listdir(path)) == ['part-00000.parquet', 'part-00001.parquet']
+    assert ParquetWriter(path).done_paths() == {'/img/0.jpg', '/img/2.jpg', '/img/3.jpg'}
+
+    resumed = ParquetWriter(path, row_group_size=2)
+    resumed.write(_record(4))
+    resumed.close()
+    table = pq.read_table(path)
+    assert table.num_rows == 5
+    assert sorted(os.listdir(path))[-1] == 'part-00002.parquet'
+
+def test_scan_image_decodes_like_the_upload_route(tmp_path, monkeypatch):
+    # Differs from DETECTION_INPUT_EDGE, as it does whenever Gemini is configured
+    monkeypatch.setattr(Config, 'UPLOAD_DECODE_EDGE', Config.DETECTION_INPUT_EDGE * 2)
+    path = str(tmp_path / 'meal.jpg')
+    cv2.imwrite(path, np.random.default_rng(0).integers(0, 256, (2000, 3000, 3), dtype=np.uint8))
+    with open(path, 'rb') as f:
+        data = f.read()
+    expected = food_detection_service.decode_image(data, target_size=Config.UPLOAD_DECODE_EDGE)
+    expected = food_detection_service.preprocess_array(expected, target_size=Config.UPLOAD_DECODE_EDGE)
+
+    seen = []
+    monkeypatch.setattr(food_detection_service, '_detect_with_yolo', lambda image: seen.append(image) or [])
+    monkeypatch.setattr(batch_scan, '_service', food_detection_service)
+    monkeypatch.setattr(batch_scan, '_detector', 'yolo')
+    monkeypatch.setattr(batch_scan, '_nutrition', None)
+
+    record = batch_scan.scan_image(path)
+    assert record['status'] == 'ok'
+    assert seen[0].shape == expected.shape
+    assert np.array_equal(seen[0], expected)
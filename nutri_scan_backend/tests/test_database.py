@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+from database import db
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_forked_child_gets_its_own_client():
+    parent_client = db.db.client
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write_end, b'1' if db.db.client is not parent_client else b'0')
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read_end, 1) == b'1'
+    assert db.db.client is parent_client
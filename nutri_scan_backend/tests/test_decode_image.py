@@ -0,0 +1,47 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageOps
+
+from services.food_detection import food_detection_service
+
+QUADRANTS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]  # RGB: TL, TR, BL, BR
+
+def _jpeg(width, height, orientation):
+    """Stored landscape JPEG with four coloured quadrants and an EXIF orientation tag"""
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    h, w = height // 2, width // 2
+    pixels[:h, :w], pixels[:h, w:], pixels[h:, :w], pixels[h:, w:] = QUADRANTS
+    image = Image.fromarray(pixels)
+    exif = image.getexif()
+    exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=95, exif=exif.tobytes())
+    return buffer.getvalue()
+
+def _quadrant_colours(rgb):
+    h, w = rgb.shape[0] // 2, rgb.shape[1] // 2
+    centres = [(h // 2, w // 2), (h // 2, w + w // 2), (h + h // 2, w // 2), (h + h // 2, w + w // 2)]
+    return [tuple(int(round(c / 255)) for c in rgb[y, x]) for y, x in centres]
+
+@pytest.mark.parametrize('orientation', [1, 3, 6, 8])
+def test_reduced_decode_applies_exif_orientation(orientation):
+    data = _jpeg(4000, 3000, orientation)
+    image = food_detection_service.decode_image(data, target_size=640)
+
+    # DCT-scaled, not full size: the largest reduction that still covers 640 px
+    assert 640 <= max(image.shape[:2]) < 2 * 640
+    expected = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    assert (image.shape[1] > image.shape[0]) == (expected.width > expected.height)
+    assert _quadrant_colours(image[:, :, ::-1]) == _quadrant_colours(np.asarray(expected.convert('RGB')))
+
+def test_rotated_upload_is_portrait():
+    image = food_detection_service.decode_image(_jpeg(4000, 3000, 6), target_size=640)
+    assert image.shape[:2] == (1000, 750)
+
+def test_small_and_broken_inputs():
+    small = food_detection_service.decode_image(_jpeg(320, 240, 1), target_size=640)
+    assert small.shape[:2] == (240, 320)
+    assert food_detection_service.decode_image(b'') is None
+    assert food_detection_service.decode_image(b'not an image') is None
@@ -0,0 +1,33 @@
+import multiprocessing
+import time
+
+from services.detection_backends import _build_lock, onnx_paths
+
+def _hold_lock(path, log):
+    with _build_lock(path):
+        with open(log, 'a') as f:
+            f.write('start\n')
+        time.sleep(0.2)
+        with open(log, 'a') as f:
+            f.write('end\n')
+
+def test_build_lock_serialises_processes(tmp_path):
+    path, log = str(tmp_path / 'model.onnx'), str(tmp_path / 'log')
+    processes = [multiprocessing.Process(target=_hold_lock, args=(path, log)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=10)
+        assert process.exitcode == 0
+    with open(log) as f:
+        assert f.read().split() == ['start', 'end'] * 3
+
+def test_build_lock_can_be_taken_again_after_release(tmp_path):
+    path = str(tmp_path / 'model.onnx')
+    for _ in range(2):
+        with _build_lock(path):
+            pass
+    assert (tmp_path / 'model.onnx.lock').exists()
+
+def test_onnx_paths():
+    assert onnx_paths('models/yolov8n.pt') == ('models/yolov8n.onnx', 'models/yolov8n_int8.onnx')
@@ -0,0 +1,83 @@
+import numpy as np
+
+from services.detection_cache import DetectionCache
+
+VERSIONS = {'gemini': 'gemini-2.0', 'yolo': 'yolov8n'}
+DETECTIONS = [{'name': 'rice', 'confidence': 0.9}]
+
+class _FakeCollection:
+    """The few pymongo calls DetectionCache makes, over a dict"""
+    def __init__(self):
+        self.docs = {}
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def find_one(self, query):
+        doc = self.docs.get(query['_id'])
+        return dict(doc, _id=query['_id']) if doc else None
+
+    def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query['_id'], {}).update(update['$set'])
+
+def _mongo_cache(monkeypatch, collection):
+    cache = DetectionCache(use_mongo=True)
+    monkeypatch.setattr(cache, '_mongo', lambda: collection)
+    return cache
+
+def test_key_is_content_hash_of_arrays_only():
+    cache = DetectionCache()
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+    assert cache.key_for(image) == cache.key_for(image.copy())
+    assert cache.key_for(image) != cache.key_for(np.zeros((8, 4, 3), dtype=np.uint8))
+    assert cache.key_for('/tmp/meal.jpg') is None
+
+def test_hit_returns_a_copy():
+    cache = DetectionCache()
+    cache.put('k', DETECTIONS, 'gemini', 'gemini-2.0')
+    hit = cache.get('k', VERSIONS)
+    assert hit == DETECTIONS
+    hit[0]['name'] = 'changed'
+    assert cache.get('k', VERSIONS) == DETECTIONS
+
+def test_least_recently_used_entry_is_evicted():
+    cache = DetectionCache(max_entries=2)
+    cache.put('a', DETECTIONS, 'yolo', 'yolov8n')
+    cache.put('b', DETECTIONS, 'yolo', 'yolov8n')
+    cache.get('a', VERSIONS)
+    cache.put('c', DETECTIONS, 'yolo', 'yolov8n')
+    assert cache.get('b', VERSIONS) is None
+    assert cache.get('a', VERSIONS) is not None and cache.get('c', VERSIONS) is not None
+    assert cache.get_stats()['evictions'] == 1
+
+def test_entry_from_an_old_model_version_is_dropped():
+    cache = DetectionCache()
+    cache.put('k', DETECTIONS, 'yolo', 'yolov8n')
+    assert cache.get('k', dict(VERSIONS, yolo='yolov8s')) is None
+    stats = cache.get_stats()
+    assert stats['stale'] == 1 and stats['misses'] == 1 and stats['size'] == 0
+    # Gone for good, not just hidden from the newer model
+    assert cache.get('k', VERSIONS) is None
+
+def test_mongo_hit_is_promoted_to_memory(monkeypatch):
+    collection = _FakeCollection()
+    writer = _mongo_cache(monkeypatch, collection)
+    writer.put('k', DETECTIONS, 'gemini', 'gemini-2.0')
+    assert 'created_at' in collection.docs['k']
+
+    # Another worker: empty memory tier, same collection
+    reader = _mongo_cache(monkeypatch, collection)
+    assert reader.get('k', VERSIONS) == DETECTIONS
+    collection.docs.clear()
+    assert reader.get('k', VERSIONS) == DETECTIONS
+    stats = reader.get_stats()
+    assert stats['mongo_hits'] == 1 and stats['hits'] == 2 and stats['size'] == 1
+
+def test_mongo_miss_and_stale_mongo_entry(monkeypatch):
+    collection = _FakeCollection()
+    cache = _mongo_cache(monkeypatch, collection)
+    assert cache.get('missing', VERSIONS) is None
+    collection.docs['old'] = {'detections': DETECTIONS, 'backend': 'yolo', 'model_version': 'yolov5'}
+    assert cache.get('old', VERSIONS) is None
+    stats = cache.get_stats()
+    assert stats['misses'] == 2 and stats['stale'] == 1 and stats['mongo_hits'] == 0 and stats['size'] == 0
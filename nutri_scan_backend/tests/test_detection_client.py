@@ -0,0 +1,56 @@
+import os
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Listener
+
+import numpy as np
+import pytest
+
+from services.detection_workers import DetectionClient
+
+def _serve(listener, reply_after, stop):
+    conn = listener.accept()
+    conn.recv()
+    if stop.wait(reply_after):
+        return
+    conn.send(('ok', [{'name': 'apple'}]))
+    stop.wait(5)
+
+@pytest.fixture
+def server():
+    path = os.path.join(tempfile.mkdtemp(), 'detect.sock')
+    listener = Listener(path, authkey=b'test-key')
+    stop = threading.Event()
+    yield path, listener, stop
+    stop.set()
+    listener.close()
+
+def test_client_requires_an_authkey():
+    with pytest.raises(ValueError):
+        DetectionClient('/tmp/unused.sock', '')
+
+def test_reply_within_the_timeout(server):
+    path, listener, stop = server
+    threading.Thread(target=_serve, args=(listener, 0, stop), daemon=True).start()
+    client = DetectionClient(path, 'test-key', slots=1, max_edge=8)
+    try:
+        assert client.detect(np.zeros((8, 8, 3), dtype=np.uint8), timeout=5) == [{'name': 'apple'}]
+    finally:
+        client.close()
+
+def test_hung_server_times_out_and_holds_the_slot_until_it_replies(server):
+    path, listener, stop = server
+    threading.Thread(target=_serve, args=(listener, 0.5, stop), daemon=True).start()
+    client = DetectionClient(path, 'test-key', slots=1, max_edge=8)
+    try:
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            client.detect(np.zeros((8, 8, 3), dtype=np.uint8), timeout=0.1)
+        assert time.monotonic() - start < 0.4
+        # The server may still be reading the frame, so the only slot stays reserved...
+        assert client._free.empty()
+        # ...until the late reply arrives
+        assert client._free.get(timeout=2) == 0
+    finally:
+        client.close()
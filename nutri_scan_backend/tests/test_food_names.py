@@ -0,0 +1,69 @@
+import pytest
+
+from config import Config
+from services.food_names import FoodNameIndex, normalize_food_name, singularize
+from services.nutrition import nutrition_service
+
+@pytest.mark.parametrize('name, expected', [
+    ('Cucumber Slices', 'cucumber'),
+    ('2 Aloo Parathas', 'potato paratha'),
+    ('200g Rice', 'rice'),
+    ('A bowl of Tomatoes', 'tomato'),
+    ('Doughnuts', 'donut'),
+    ('Hummus', 'hummus'),
+    ('Mac & Cheese', 'mac cheese'),
+])
+def test_normalize_food_name(name, expected):
+    assert normalize_food_name(name) == expected
+
+def test_nutritionally_different_foods_are_not_synonyms():
+    assert normalize_food_name('Paneer') == 'paneer'
+    assert normalize_food_name('Lamb mince') == 'lamb mince'
+
+def test_singularize_keeps_non_plurals():
+    assert singularize('berries') == 'berry'
+    assert singularize('glass') == 'glass'
+    assert singularize('couscous') == 'couscous'
+
+@pytest.fixture
+def index():
+    return FoodNameIndex(['Rice', 'Fried Rice', 'Chicken Curry', 'Apple', 'Pineapple', 'Banana'])
+
+def test_exact_match_after_normalization_scores_one(index):
+    assert index.search('2 Chicken Curries') == [(2, 1.0)]
+
+def test_fuzzy_matches_are_ranked_by_dice_score(index):
+    matches = index.search('ric', k=2)
+    assert [entry for entry, _ in matches] == [0, 1]
+    assert 0 < matches[1][1] < matches[0][1] < 1
+
+def test_top_k_is_limited(index):
+    assert len(index.search('apple pie', k=1)) == 1
+    assert index.resolve('banan')[0] == 5
+
+def test_no_shared_trigrams(index):
+    assert index.search('xyz') == []
+    assert index.resolve('xyz') is None
+
+@pytest.fixture
+def builtin_names():
+    return FoodNameIndex(['Carrot', 'Hot Dog', 'Chicken', 'Apple', 'Banana'])
+
+@pytest.mark.parametrize('name', ['Carrot Cake', 'Hot Dog Bun'])
+def test_unmatched_head_noun_is_not_confident(builtin_names, name):
+    match = builtin_names.resolve(name)
+    assert match is None or match[1] < Config.FOOD_NAME_FALLBACK_CONFIDENCE
+
+@pytest.mark.parametrize('name', ['Chickpea', 'Pineapple'])
+def test_different_food_sharing_letters_is_not_a_fallback(builtin_names, name):
+    match = builtin_names.resolve(name)
+    assert match is None or match[1] < Config.FOOD_NAME_FALLBACK_CONFIDENCE
+
+def test_typos_still_resolve(builtin_names):
+    assert builtin_names.resolve('banan')[0] == 4
+    assert builtin_names.resolve('Carots')[1] >= Config.FOOD_NAME_FALLBACK_CONFIDENCE
+
+@pytest.mark.parametrize('name', ['Carrot Cake', 'Hot Dog Bun', 'Chickpea', 'Pineapple'])
+def test_wrong_foods_are_not_answered_from_the_builtin_table(name):
+    match = nutrition_service.resolve_food(name)
+    assert match is None or match['score'] < Config.FOOD_NAME_FALLBACK_CONFIDENCE
@@ -0,0 +1,64 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+import requests
+
+from services.gemini_client import GeminiVisionClient
+
+class _FailingHandler(BaseHTTPRequestHandler):
+    seen = {}
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        _FailingHandler.seen = {'path': self.path, 'key': self.headers.get('x-goog-api-key')}
+        self.send_response(500)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def test_api_key_is_sent_in_a_header_and_not_leaked_in_errors():
+    server = HTTPServer(('127.0.0.1', 0), _FailingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = GeminiVisionClient('secret-key', 'gemini-test', f"http://127.0.0.1:{server.server_port}")
+        with pytest.raises(requests.HTTPError) as error:
+            client.generate('prompt', np.zeros((32, 32, 3), dtype=np.uint8))
+    finally:
+        server.shutdown()
+
+    assert _FailingHandler.seen['key'] == 'secret-key'
+    assert 'secret-key' not in _FailingHandler.seen['path']
+    assert 'secret-key' not in str(error.value)
+
+class _OkHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = b'{"candidates": [{"content": {"parts": [{"text": "[]"}]}}]}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_stats_count_every_concurrent_request():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = GeminiVisionClient('key', 'gemini-test', f"http://127.0.0.1:{server.server_port}")
+    image = np.zeros((32, 32, 3), dtype=np.uint8)
+    size = len(client.encode_image(image)[0])
+    try:
+        threads = [threading.Thread(target=lambda: [client.generate('prompt', image) for _ in range(5)])
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+    finally:
+        server.shutdown()
+
+    assert client.get_stats() == {'requests': 40, 'bytes_sent': 40 * size}
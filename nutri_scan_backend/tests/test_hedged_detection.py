@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+import pytest
+
+from services import food_detection
+from services.food_detection import food_detection_service
+
+IMAGE = np.zeros((64, 64, 3), dtype=np.uint8)
+GEMINI_RESULT = [{'name': 'rice', 'confidence': 0.9, 'source': 'gemini'}]
+YOLO_RESULT = [{'name': 'rice', 'confidence': 0.6, 'source': 'yolo'}]
+
+@pytest.fixture
+def backends(monkeypatch):
+    """Fake Gemini and YOLO paths taking the given number of seconds"""
+    def configure(gemini_s, yolo_s, deadline_ms):
+        monkeypatch.setattr(food_detection.Config, 'GEMINI_DEADLINE_MS', deadline_ms)
+
+        def gemini(image):
+            time.sleep(gemini_s)
+            return GEMINI_RESULT
+
+        def yolo(image):
+            time.sleep(yolo_s)
+            return YOLO_RESULT
+
+        monkeypatch.setattr(food_detection_service, 'detect_with_gemini', gemini)
+        monkeypatch.setattr(food_detection_service, '_detect_with_yolo', yolo)
+    return configure
+
+def test_gemini_latency_is_its_own_when_it_wins(backends):
+    backends(gemini_s=0.05, yolo_s=0.3, deadline_ms=1000)
+    detections, info = food_detection_service._detect_hedged(IMAGE)
+    assert detections == GEMINI_RESULT
+    assert info['mode'] == 'hedged' and info['winner'] == 'gemini'
+    # Not the time until YOLO finished
+    assert info['timings_ms']['gemini'] < 200
+    assert info['timings_ms']['yolo'] >= 300
+
+def test_yolo_wins_when_gemini_misses_the_deadline(backends):
+    backends(gemini_s=0.5, yolo_s=0.01, deadline_ms=100)
+    start = time.perf_counter()
+    detections, info = food_detection_service._detect_hedged(IMAGE)
+    assert time.perf_counter() - start < 0.4
+    assert detections == YOLO_RESULT
+    assert info['winner'] == 'yolo' and info['timings_ms']['gemini'] is None
@@ -0,0 +1,61 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.http_client import ProviderHTTPClient
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests_seen = []
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        _Handler.requests_seen.append(self.command)
+        # First request fails with 503, later ones succeed
+        status = 503 if len(_Handler.requests_seen) == 1 else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    _Handler.requests_seen = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/"
+    httpd.shutdown()
+
+def test_idempotent_request_is_retried_on_503(server):
+    client = ProviderHTTPClient('test', max_retries=2, backoff=0)
+    assert client.get(server).status_code == 200
+    assert _Handler.requests_seen == ['GET', 'GET']
+    host = client.get_stats()['hosts'][server.split('/')[2]]
+    assert host['requests'] == 2 and host['retries'] == 1 and host['errors'] == 1
+
+def test_post_is_not_retried_on_503(server):
+    client = ProviderHTTPClient('test', max_retries=2, backoff=0)
+    assert client.post(server, json={}).status_code == 503
+    assert _Handler.requests_seen == ['POST']
+
+def test_connections_are_reused(server):
+    client = ProviderHTTPClient('test', max_retries=0, backoff=0)
+    for _ in range(5):
+        client.get(server)
+    host = client.get_stats()['hosts'][server.split('/')[2]]
+    assert host['connections_opened'] == 1
+
+def test_retry_is_skipped_when_backoff_would_exceed_budget(server, monkeypatch):
+    monkeypatch.setattr('services.http_client.random.uniform', lambda low, high: 1.0)
+    client = ProviderHTTPClient('test', max_retries=2, backoff=1.0)
+    assert client.get(server, budget=0.5).status_code == 503
+    assert _Handler.requests_seen == ['GET']
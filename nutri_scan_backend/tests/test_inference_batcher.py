@@ -0,0 +1,32 @@
+from concurrent.futures import Future
+
+import pytest
+
+from services.food_detection import InferenceBatcher
+
+def test_results_are_matched_to_inputs_in_order():
+    batcher = InferenceBatcher(lambda sources: [s * 10 for s in sources], max_batch_size=8, max_wait_ms=20)
+    futures = [batcher.submit(i) for i in range(5)]
+    assert [f.result(timeout=5) for f in futures] == [0, 10, 20, 30, 40]
+    stats = batcher.get_stats()
+    assert stats['images'] == 5
+    assert stats['largest_batch'] >= 1
+
+def test_short_result_list_fails_the_leftover_futures():
+    batcher = InferenceBatcher(lambda sources: sources[:1], max_batch_size=8)
+    batch = [('a', Future()), ('b', Future()), ('c', Future())]
+    batcher._dispatch(batch)
+
+    assert batch[0][1].result(timeout=1) == 'a'
+    for _, future in batch[1:]:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=1)
+
+def test_backend_error_is_raised_to_every_caller():
+    def fail(sources):
+        raise ValueError('backend down')
+
+    batcher = InferenceBatcher(fail, max_batch_size=1)
+    with pytest.raises(ValueError):
+        batcher.predict('img', timeout=1)
+    assert batcher.get_stats()['batches'] == 0
@@ -0,0 +1,58 @@
+import random
+
+import cv2
+import numpy as np
+
+from services.meal_index import BKTree, MealHashIndex
+
+def _brute_force(values, query, max_distance):
+    distances = [((query ^ value).bit_count(), payload) for payload, value in enumerate(values)]
+    matches = [d for d in distances if d[0] <= max_distance]
+    return min(matches, key=lambda d: d[0])[0] if matches else None
+
+def test_bk_tree_matches_brute_force():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    tree = BKTree()
+    for payload, value in enumerate(values):
+        tree.add(value, payload)
+    assert tree.size == 500
+
+    queries = [values[i] ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for i in range(50)]
+    queries += [rng.getrandbits(64) for _ in range(50)]
+    for query in queries:
+        match = tree.find_nearest(query, 6)
+        expected = _brute_force(values, query, 6)
+        if expected is None:
+            assert match is None
+        else:
+            distance, payload = match
+            assert distance == expected == (query ^ values[payload]).bit_count()
+
+def test_bk_tree_empty_and_exact():
+    tree = BKTree()
+    assert tree.find_nearest(123, 6) is None
+    tree.add(123, 'a')
+    tree.add(123, 'b')
+    assert tree.find_nearest(123, 0) == (0, 'a')
+    assert tree.find_nearest(124, 0) is None
+
+def test_dhash_survives_resize_and_brightness():
+    rng = np.random.default_rng(3)
+    image = cv2.GaussianBlur(rng.integers(0, 256, (240, 320, 3), dtype=np.uint8), (31, 31), 0)
+    base = MealHashIndex.compute_hash(image)
+    resized = MealHashIndex.compute_hash(image[::2, ::2])
+    brighter = MealHashIndex.compute_hash(np.clip(image.astype(np.int16) + 20, 0, 255).astype(np.uint8))
+    assert (base ^ resized).bit_count() <= 6
+    assert (base ^ brighter).bit_count() <= 6
+    assert len(MealHashIndex.to_hex(base)) == 16
+
+def test_index_finds_added_scans_for_loaded_users_only(monkeypatch):
+    index = MealHashIndex(max_distance=4)
+    monkeypatch.setattr(index, '_load', lambda user_id: BKTree())
+    index.add('u1', 0xFF, 'ignored')  # tree not loaded yet
+    assert index.find('u1', 0xFF) is None
+    index.add('u1', 0xFF, 'log1')
+    assert index.find('u1', 0xFE) == ('log1', 1)
+    assert index.find('u2', 0xFF) is None
+    assert index.stats == {'lookups': 3, 'matches': 1}
@@ -0,0 +1,52 @@
+import pytest
+
+from services.nutrient_db import ALIGNMENT, NUTRIENT_KEYS, NutrientDatabase, write_database
+
+RECORDS = [
+    (101, 'Rice, white, cooked', {'calories': 130, 'protein': 2.7, 'carbs': 28.2}),
+    (102, 'Crème brûlée', {'calories': 330, 'fat': 24.5, 'sugar': 26}),
+    (103, 'Apple', {'calories': 52, 'fiber': 2.4, 'vitamin_c': 4.6}),
+    (104, '  APPLE ', {'calories': 999}),  # duplicate name: dropped
+    (105, '', {'calories': 1}),  # no name: dropped
+]
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / 'nutrients.db')
+    assert write_database(path, RECORDS) == 3
+    return NutrientDatabase(path)
+
+def test_lookup_by_normalized_name(database):
+    assert len(database) == 3
+    index = database.find('  rice,  WHITE, cooked')
+    assert database.name(index) == 'Rice, white, cooked'
+    assert int(database.ids[index]) == 101
+    assert database.per_100g(index)['carbs'] == pytest.approx(28.2)
+    assert database.find('rice') is None
+
+def test_first_duplicate_wins_and_unicode_survives(database):
+    assert database.lookup('apple')['calories'] == 52
+    assert database.name(database.find('crème brûlée')) == 'Crème brûlée'
+
+def test_lookup_scales_to_quantity(database):
+    result = database.lookup('Apple', quantity=150)
+    assert result['food_name'] == 'Apple' and result['quantity'] == 150
+    assert result['calories'] == 78
+    assert set(NUTRIENT_KEYS) <= set(result)
+    assert result['sodium'] == 0
+
+def test_blocks_are_aligned(database):
+    for block in database.header['blocks'].values():
+        assert block['offset'] % ALIGNMENT == 0
+
+def test_empty_database(tmp_path):
+    path = str(tmp_path / 'empty.db')
+    assert write_database(path, []) == 0
+    database = NutrientDatabase(path)
+    assert len(database) == 0 and database.find('apple') is None
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.db'
+    path.write_bytes(b'not a database')
+    with pytest.raises(ValueError):
+        NutrientDatabase(str(path))
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from services.nutrient_db import NUTRIENT_KEYS
+from services.nutrients import NutrientVector, compare_with_targets, nutrient_matrix
+from services.rda import rda_service
+
+def test_round_trip_through_dict():
+    vector = NutrientVector.from_dict({'calories': '120', 'protein': 3.456, 'fat': None, 'iron': 'n/a'})
+    data = vector.to_dict()
+    assert list(data) == list(NUTRIENT_KEYS)
+    assert data['calories'] == 120 and data['protein'] == 3.46
+    assert data['fat'] == 0 and data['iron'] == 0
+    assert vector.to_dict(('calories',), decimals=0) == {'calories': 120}
+    assert vector['protein'] == pytest.approx(3.456)
+
+def test_sum_add_and_scale():
+    items = [{'calories': 100, 'protein': 2}, {'calories': 50.5}, {}]
+    total = NutrientVector.sum(items)
+    assert total['calories'] == 150.5 and total['protein'] == 2
+    running = NutrientVector()
+    for item in items:
+        running += NutrientVector.from_dict(item)
+    assert np.array_equal(running.values, total.values)
+    assert total.scale(2)['calories'] == 301
+    assert NutrientVector.sum([])['calories'] == 0
+
+def test_nutrient_matrix_shape():
+    matrix = nutrient_matrix([{'calories': 1}, None, {'sodium': 5}])
+    assert matrix.shape == (3, len(NUTRIENT_KEYS))
+    assert matrix[1].sum() == 0
+
+def test_compare_with_targets_statuses_and_zero_targets():
+    percentages, differences, status = compare_with_targets([50, 100, 150, 10], [100, 100, 100, 0])
+    assert percentages.tolist() == [50, 100, 150, 0]
+    assert differences.tolist() == [-50, 0, 50, 10]
+    assert status.tolist() == ['low', 'balanced', 'high', 'low']
+
+def test_compare_with_targets_broadcasts_days_against_one_target_row():
+    _, _, status = compare_with_targets([[100, 200], [50, 100]], [100, 100])
+    assert status.tolist() == [['balanced', 'high'], ['low', 'balanced']]
+
+def test_compare_many_matches_compare_with_rda():
+    profile = {'gender': 'female', 'daily_requirements': {'calories': 1800}}
+    days = [
+        {'calories': 1800, 'protein': 46, 'carbs': 250, 'fat': 65},
+        {'calories': 900, 'protein': 100, 'carbs': 250, 'fat': 65},
+    ]
+    analyses = rda_service.compare_many(days, profile)
+    assert analyses == [rda_service.compare_with_rda(day, profile) for day in days]
+    assert analyses[0]['overall_status'] == 'balanced'
+    assert analyses[1]['calories'] == {
+        'consumed': 900, 'target': 1800, 'percentage': 50, 'status': 'low', 'difference': -900
+    }
+    assert [s['nutrient'] for s in analyses[1]['suggestions']['reduce']] == ['protein']
@@ -0,0 +1,42 @@
+import time
+
+from services.nutrition_cache import NutritionCache
+
+def test_hit_returns_a_copy_and_counts():
+    cache = NutritionCache()
+    assert cache.get('rice') is None
+    cache.put('rice', {'calories': 130}, 'groq')
+    entry = cache.get('rice')
+    assert entry == {'values': {'calories': 130}, 'source': 'groq'}
+    entry['source'] = 'changed'
+    assert cache.get('rice')['source'] == 'groq'
+    stats = cache.get_stats()
+    assert stats['hits'] == 2 and stats['misses'] == 1 and stats['hit_rate'] == 0.667
+
+def test_least_recently_used_entry_is_evicted():
+    cache = NutritionCache(max_entries=2)
+    cache.put('rice', {}, 'groq')
+    cache.put('dal', {}, 'groq')
+    cache.get('rice')
+    cache.put('roti', {}, 'groq')
+    assert cache.get('dal') is None
+    assert cache.get('rice') is not None and cache.get('roti') is not None
+    assert cache.get_stats()['evictions'] == 1
+
+def test_expired_entries_are_dropped(monkeypatch):
+    cache = NutritionCache(ttl_seconds=60)
+    cache.put('rice', {}, 'groq')
+    now = time.time()
+    monkeypatch.setattr('services.nutrition_cache.time.time', lambda: now + 61)
+    assert cache.peek('rice') is None
+    assert cache.get('rice') is None
+    stats = cache.get_stats()
+    assert stats['expired'] == 1 and stats['size'] == 0
+
+def test_peek_does_not_touch_counters():
+    cache = NutritionCache()
+    cache.put('rice', {'calories': 130}, 'edamam')
+    assert cache.peek('rice')['source'] == 'edamam'
+    assert cache.peek('dal') is None
+    stats = cache.get_stats()
+    assert stats['hits'] == 0 and stats['misses'] == 0
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from services import nutrition
+from services.nutrients import NUTRIENT_KEYS
+from services.nutrition import nutrition_service
+from services.nutrition_cache import NutritionCache
+from services.provider_router import ProviderRouter
+from services.single_flight import SingleFlight
+
+@pytest.fixture
+def offline(monkeypatch):
+    """No provider configured: everything is answered from local data"""
+    monkeypatch.setattr(nutrition_service, 'groq_client', None)
+    monkeypatch.setattr(nutrition_service, 'app_id', '')
+    monkeypatch.setattr(nutrition_service, 'app_key', '')
+    return nutrition_service
+
+def test_multiple_foods_totals_and_order(offline):
+    items = [{'name': 'apple', 'quantity': 150}, {'name': 'Rice', 'quantity': 200}, {'name': 'banana', 'quantity': 120}]
+    result = offline.get_multiple_foods_nutrition(items)
+
+    assert [food['food_name'] for food in result['foods']] == ['apple', 'Rice', 'banana']
+    for key in NUTRIENT_KEYS:
+        expected = sum(food.get(key, 0) for food in result['foods'])
+        assert result[key] == pytest.approx(expected, abs=0.011)
+
+def test_multiple_foods_empty(offline):
+    result = offline.get_multiple_foods_nutrition([])
+    assert result['foods'] == []
+    assert result['calories'] == 0
+
+def test_saturated_provider_is_skipped_within_budget(monkeypatch):
+    router = ProviderRouter(['edamam'], open_seconds=0)
+    router._breakers['edamam'].state = 'open'
+    monkeypatch.setattr(nutrition, 'provider_router', router)
+    monkeypatch.setattr(nutrition.Config, 'NUTRITION_LATENCY_BUDGET_MS', 100)
+    monkeypatch.setattr(nutrition_service, '_available_providers', lambda: ['edamam'])
+    limit = threading.BoundedSemaphore(1)
+    limit.acquire()
+    monkeypatch.setitem(nutrition_service._provider_limits, 'edamam', limit)
+    monkeypatch.setattr(nutrition_service, '_get_from_api', lambda *args, **kwargs: pytest.fail('provider called'))
+
+    start = time.perf_counter()
+    assert nutrition_service._fetch_per_100g('apple') == (None, None)
+    assert time.perf_counter() - start < 0.5
+    # The half-open probe was handed back rather than leaked
+    assert router._breakers['edamam'].state == 'half_open'
+    assert router._breakers['edamam'].probe_in_flight is False
+
+UNKNOWN_FOODS = [{'name': 'zzqx stew', 'quantity': 100}, {'name': 'qqvz pie', 'quantity': 50}]
+
+@pytest.fixture
+def half_open_groq(monkeypatch):
+    """Groq configured, its breaker due for a half-open probe, fresh cache and single-flight"""
+    router = ProviderRouter(['groq'], failure_threshold=1, open_seconds=0)
+    router.record('groq', 100, False)
+    flight = SingleFlight()
+    monkeypatch.setattr(nutrition, 'provider_router', router)
+    monkeypatch.setattr(nutrition, 'single_flight', flight)
+    monkeypatch.setattr(nutrition, 'nutrition_cache', NutritionCache())
+    monkeypatch.setattr(nutrition_service, 'groq_client', object())
+    return router._breakers['groq'], flight
+
+def test_batch_with_every_food_in_flight_leaves_probe_untouched(half_open_groq, monkeypatch):
+    breaker, flight = half_open_groq
+    monkeypatch.setattr(nutrition_service, '_get_batch_from_groq', lambda *args, **kwargs: pytest.fail('batch sent'))
+    claims = [flight.begin(nutrition.normalize_food_name(item['name'])) for item in UNKNOWN_FOODS]
+    assert all(claims)
+
+    assert nutrition_service._prefetch_batch(UNKNOWN_FOODS) == {}
+    assert breaker.state == 'open'
+    assert breaker.allow(time.monotonic()) is True
+
+def test_batch_probe_success_closes_breaker(half_open_groq, monkeypatch):
+    breaker, flight = half_open_groq
+    values = {key: 1.0 for key in NUTRIENT_KEYS}
+    monkeypatch.setattr(nutrition_service, '_get_batch_from_groq', lambda names, timeout=None: {0: values, 1: values})
+
+    results = nutrition_service._prefetch_batch(UNKNOWN_FOODS)
+    assert sorted(results) == [0, 1]
+    assert breaker.state == 'closed'
+    assert flight.get_stats()['in_flight'] == 0
+
+def test_batch_refused_by_breaker_releases_claims(half_open_groq, monkeypatch):
+    breaker, flight = half_open_groq
+    breaker.open_seconds = 60
+    monkeypatch.setattr(nutrition_service, '_get_batch_from_groq', lambda *args, **kwargs: pytest.fail('batch sent'))
+
+    assert nutrition_service._prefetch_batch(UNKNOWN_FOODS) == {}
+    assert flight.get_stats()['in_flight'] == 0
+
+def test_batch_waits_for_the_groq_concurrency_cap(half_open_groq, monkeypatch):
+    breaker, flight = half_open_groq
+    monkeypatch.setattr(nutrition.Config, 'NUTRITION_LATENCY_BUDGET_MS', 50)
+    limit = threading.BoundedSemaphore(1)
+    limit.acquire()
+    monkeypatch.setitem(nutrition_service._provider_limits, 'groq', limit)
+    monkeypatch.setattr(nutrition_service, '_get_batch_from_groq', lambda *args, **kwargs: pytest.fail('batch sent'))
+
+    assert nutrition_service._prefetch_batch(UNKNOWN_FOODS) == {}
+    assert flight.get_stats()['in_flight'] == 0
+    assert breaker.probe_in_flight is False
+
+def test_items_left_out_of_the_batch_miss_the_cache_once(half_open_groq, monkeypatch):
+    cache = NutritionCache()
+    monkeypatch.setattr(nutrition, 'nutrition_cache', cache)
+    values = {key: 1.0 for key in NUTRIENT_KEYS}
+    monkeypatch.setattr(nutrition_service, '_get_batch_from_groq', lambda names, timeout=None: {0: values})
+    monkeypatch.setattr(nutrition_service, '_fetch_per_100g', lambda food_name: (None, None))
+
+    result = nutrition_service.get_multiple_foods_nutrition(UNKNOWN_FOODS)
+    assert [food['food_name'] for food in result['foods']] == ['zzqx stew', 'qqvz pie']
+    assert cache.get_stats()['misses'] == len(UNKNOWN_FOODS)
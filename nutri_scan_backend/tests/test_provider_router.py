@@ -0,0 +1,85 @@
+import time
+
+from services.provider_router import CircuitBreaker, ProviderRouter
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, open_seconds=30)
+    for _ in range(2):
+        assert breaker.record(False, 0.0, 0, now=0) is None
+    assert breaker.record(False, 0.0, 0, now=0) == 'open'
+    assert breaker.allow(now=10) is False
+
+def test_breaker_opens_on_error_rate_only_with_enough_samples():
+    breaker = CircuitBreaker(failure_threshold=100, error_rate=0.5, min_samples=10)
+    assert breaker.record(False, 0.9, 5, now=0) is None
+    assert breaker.record(False, 0.6, 10, now=0) == 'open'
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=30)
+    breaker.record(False, 1.0, 1, now=0)
+    assert breaker.allow(now=30) is True
+    assert breaker.state == 'half_open'
+    assert breaker.allow(now=30) is False
+
+def test_half_open_probe_result_decides_state():
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=30)
+    breaker.record(False, 1.0, 1, now=0)
+    breaker.allow(now=30)
+    assert breaker.record(False, 1.0, 2, now=31) == 'open'
+    assert breaker.allow(now=40) is False
+    breaker.allow(now=61)
+    assert breaker.record(True, 0.5, 3, now=62) == 'closed'
+    assert breaker.allow(now=62) is True
+
+def test_released_probe_can_be_taken_again():
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=0)
+    breaker.record(False, 1.0, 1, now=0)
+    assert breaker.allow(now=1) is True
+    breaker.release()
+    assert breaker.allow(now=1) is True
+
+def test_router_ranks_by_expected_latency():
+    router = ProviderRouter(['groq', 'edamam'])
+    assert router.ranked({'groq', 'edamam'}) == ['groq', 'edamam']
+    router.record('groq', 900, True)
+    router.record('edamam', 200, True)
+    assert router.ranked({'groq', 'edamam'}) == ['edamam', 'groq']
+    assert router.ranked({'groq'}) == ['groq']
+
+def test_router_skips_provider_slower_than_remaining_budget():
+    router = ProviderRouter(['groq'])
+    for _ in range(5):
+        router.record('groq', 800, True)
+    assert router.allow('groq', 500) is False
+    assert router.allow('groq', 1000) is True
+    assert router.get_state()['skipped_budget'] == 1
+
+def test_router_records_transitions():
+    router = ProviderRouter(['groq'], failure_threshold=2, open_seconds=30)
+    router.record('groq', 100, False)
+    router.record('groq', 100, False)
+    assert router.allow('groq', 1000) is False
+    state = router.get_state()
+    assert state['providers']['groq']['state'] == 'open'
+    assert [t['state'] for t in state['transitions']] == ['open']
+    assert state['skipped_open'] == 1
+
+def test_provider_recovers_after_timeout_burst():
+    router = ProviderRouter(['groq'], failure_threshold=5, open_seconds=0)
+    for _ in range(5):
+        router.record('groq', 4003, False)
+    # The half-open probe is let through even though the median exceeds the budget
+    assert router.allow('groq', 3999.9) is True
+    assert router.allow('groq', 3999.9) is False
+    router.record('groq', 300, True)
+    assert router.get_state()['providers']['groq']['state'] == 'closed'
+
+def test_slow_provider_is_measured_again_once_samples_are_stale():
+    router = ProviderRouter(['groq'], open_seconds=0.05)
+    for _ in range(5):
+        router.record('groq', 800, True)
+    assert router.allow('groq', 500) is False
+    time.sleep(0.06)
+    assert router.allow('groq', 500) is True
+    # One call per period; the next waits for its sample or another period
+    assert router.allow('groq', 500) is False
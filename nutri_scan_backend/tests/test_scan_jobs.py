@@ -0,0 +1,89 @@
+import io
+import threading
+import time
+from datetime import datetime, timedelta
+
+import cv2
+import numpy as np
+import pytest
+
+from app import app
+from routes import food_detection as food_routes
+from services.scan_jobs import ScanJobQueue
+from utils.auth import generate_token
+
+class _FakeCollection:
+    """The few pymongo calls ScanJobQueue makes, over a dict"""
+    def __init__(self):
+        self.docs = {}
+
+    def insert_one(self, doc):
+        self.docs[doc['_id']] = dict(doc)
+
+    def find_one(self, query):
+        doc = self.docs.get(query['_id'])
+        if doc is None or any(doc.get(k) != v for k, v in query.items() if k != '_id'):
+            return None
+        return dict(doc)
+
+    def update_one(self, query, update):
+        self.docs[query['_id']].update(update['$set'])
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = ScanJobQueue(max_workers=1, max_pending=1, timeout_seconds=60)
+    collection = _FakeCollection()
+    monkeypatch.setattr(queue, '_collection', lambda: collection)
+    return queue
+
+def _wait_for(queue, job_id, status):
+    for _ in range(200):
+        job = queue.get(job_id, 'u1')
+        if job['status'] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job never reached {status}: {job}")
+
+def test_full_queue_rejects_until_a_job_finishes(queue):
+    release = threading.Event()
+    first = queue.submit('u1', release.wait, 5)
+    assert first is not None
+    assert queue.submit('u1', lambda: 'second') is None
+    release.set()
+    _wait_for(queue, first, 'done')
+    assert queue.pending == 0
+    assert queue.submit('u1', lambda: 'third') is not None
+
+def test_failing_job_is_marked_failed(queue):
+    def boom():
+        raise RuntimeError('detector crashed')
+    job = _wait_for(queue, queue.submit('u1', boom), 'failed')
+    assert job['error'] == 'detector crashed'
+    assert queue.get(job['job_id'], 'someone-else') is None
+
+def test_job_of_a_dead_worker_is_reported_lost(queue):
+    stale = datetime.utcnow() - timedelta(seconds=61)
+    queue._collection().insert_one({
+        '_id': 'orphan', 'user_id': 'u1', 'status': 'running', 'worker': 'host:1',
+        'created_at': stale, 'updated_at': stale
+    })
+    job = queue.get('orphan', 'u1')
+    assert job['status'] == 'failed' and 'lost' in job['error']
+
+def test_upload_returns_429_when_the_job_queue_is_full(monkeypatch):
+    full = ScanJobQueue(max_pending=0)
+    monkeypatch.setattr(full, '_collection', lambda: pytest.fail('nothing should be stored'))
+    monkeypatch.setattr(food_routes, 'scan_job_queue', full)
+    monkeypatch.setattr(food_routes.Config, 'ARCHIVE_UPLOADS', False)
+
+    _, png = cv2.imencode('.png', np.zeros((32, 32, 3), dtype=np.uint8))
+    with app.app_context():
+        token = generate_token('u1')
+    response = app.test_client().post(
+        '/api/food/upload?async=1',
+        data={'image': (io.BytesIO(png.tobytes()), 'meal.png')},
+        headers={'Authorization': f"Bearer {token}"},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 429
+    assert 'error' in response.get_json()
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from services.single_flight import UNRESOLVED, SingleFlight
+
+def _run_concurrently(fn, count):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fn())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+def test_unresolved_key_makes_waiters_run_one_lookup_of_their_own():
+    flight = SingleFlight()
+    gate = threading.Event()
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        gate.wait(5)
+        return ('values', 'edamam')
+
+    # A batch claims the key, then leaves it out of its reply
+    batch_call = flight.begin('rice')
+    threads, results = _run_concurrently(lambda: flight.do('rice', lookup), 3)
+    time.sleep(0.1)
+    flight.finish('rice', batch_call, UNRESOLVED)
+    time.sleep(0.1)
+    gate.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == [('values', 'edamam')] * 3
+    assert len(calls) == 1
+    assert flight.get_stats()['coalesced_local'] == 2
+
+def test_concurrent_callers_share_one_lookup():
+    flight = SingleFlight()
+    gate = threading.Event()
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        gate.wait(5)
+        return 42
+
+    threads, results = _run_concurrently(lambda: flight.do('apple', lookup), 4)
+    time.sleep(0.1)
+    gate.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == [42] * 4
+    assert len(calls) == 1
+    stats = flight.get_stats()
+    assert stats['provider_calls'] == 1 and stats['coalesced_local'] == 3
+    assert stats['provider_calls_saved'] == 3 and stats['in_flight'] == 0
+
+def test_leader_error_reaches_waiters():
+    flight = SingleFlight()
+    call = flight.begin('apple')
+    errors = []
+
+    def wait():
+        try:
+            flight.do('apple', lambda: 'unused')
+        except ValueError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    time.sleep(0.1)
+    flight.finish('apple', call, error=ValueError('provider down'))
+    thread.join(timeout=5)
+    assert [str(e) for e in errors] == ['provider down']
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight = SingleFlight()
+    assert flight.begin('apple') is not None
+    assert flight.begin('apple') is None
+    assert flight.do('rice', lambda: 'rice values') == 'rice values'
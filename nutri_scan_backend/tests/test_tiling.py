@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from services import food_detection
+from services.food_detection import food_detection_service
+
+@pytest.mark.parametrize('grid, overlap', [(1, 0.2), (2, 0.2), (3, 0.25), (2, 0.0)])
+def test_tiles_cover_the_image_with_overlap(monkeypatch, grid, overlap):
+    monkeypatch.setattr(food_detection.Config, 'TILE_GRID', grid)
+    monkeypatch.setattr(food_detection.Config, 'TILE_OVERLAP', overlap)
+    image = np.zeros((960, 1280, 3), dtype=np.uint8)
+    tiles = food_detection_service._make_tiles(image)
+    assert len(tiles) == grid * grid
+
+    covered = np.zeros(image.shape[:2], dtype=bool)
+    for x, y, tile in tiles:
+        assert tile.flags['C_CONTIGUOUS']
+        assert x + tile.shape[1] <= 1280 and y + tile.shape[0] <= 960
+        covered[y:y + tile.shape[0], x:x + tile.shape[1]] = True
+    assert covered.all()
+
+    if grid > 1:
+        # Neighbouring tiles share roughly `overlap` of a tile
+        (x0, _, tile), (x1, _, _) = tiles[0], tiles[1]
+        shared = x0 + tile.shape[1] - x1
+        assert shared == pytest.approx(overlap * tile.shape[1], abs=2)
+
+def _detection(name, confidence, bbox):
+    return {'name': name, 'confidence': confidence, 'bbox': bbox}
+
+def test_merge_keeps_highest_confidence_of_overlapping_same_class_boxes():
+    merged = food_detection_service._merge_detections([
+        _detection('rice', 0.6, [0, 0, 100, 100]),
+        _detection('rice', 0.9, [5, 5, 105, 105]),
+        _detection('curry', 0.5, [0, 0, 100, 100]),
+    ])
+    assert [(d['name'], d['confidence']) for d in merged] == [('rice', 0.9), ('curry', 0.5)]
+
+def test_merge_drops_item_cut_at_a_tile_edge():
+    # A tile saw only the left part of the plate the full pass found whole
+    merged = food_detection_service._merge_detections([
+        _detection('naan', 0.9, [0, 0, 200, 100]),
+        _detection('naan', 0.7, [0, 0, 60, 100]),
+    ])
+    assert len(merged) == 1 and merged[0]['confidence'] == 0.9
+
+def test_merge_keeps_separate_items_of_the_same_class():
+    merged = food_detection_service._merge_detections([
+        _detection('idli', 0.8, [0, 0, 50, 50]),
+        _detection('idli', 0.7, [100, 0, 150, 50]),
+    ])
+    assert len(merged) == 2
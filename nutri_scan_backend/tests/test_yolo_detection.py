@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from services import food_detection
+from services.food_detection import FoodDetectionService
+
+NAMES = {0: 'person', 1: 'banana', 2: 'apple', 3: 'dining table', 4: 'pizza', 5: 'sandwich'}
+IMAGE = np.zeros((64, 64, 3), dtype=np.uint8)
+
+class _Boxes:
+    def __init__(self, rows):
+        rows = list(rows)
+        self.cls = np.array([r[0] for r in rows], dtype=np.float32)
+        self.conf = np.array([r[1] for r in rows], dtype=np.float32)
+        self.xyxy = np.array([r[2] for r in rows], dtype=np.float32).reshape(-1, 4)
+
+    def __len__(self):
+        return len(self.cls)
+
+class _Result:
+    """The parts of an ultralytics Results object _parse_yolo_result reads"""
+    def __init__(self, *rows):
+        self.boxes = _Boxes(rows)
+        self.names = NAMES
+
+@pytest.fixture
+def service():
+    service = FoodDetectionService()
+    service._food_lut = service._food_class_lut(NAMES)
+    return service
+
+def test_lut_drops_non_food_classes(service):
+    result = _Result(
+        (0, 0.95, [0, 0, 10, 10]),
+        (1, 0.876, [1, 2, 3, 4]),
+        (3, 0.9, [0, 0, 64, 64]),
+        (4, 0.61, [5, 5, 20, 20]),
+        (42, 0.99, [0, 0, 1, 1]),  # class id beyond the model's names
+    )
+    detections = service._parse_yolo_result(result)
+    assert [(d['name'], d['confidence']) for d in detections] == [('banana', 0.88), ('pizza', 0.61)]
+    assert detections[0]['bbox'] == [1, 2, 3, 4]
+    assert all(d['source'] == 'yolo' and d['quantity'] == 100 for d in detections)
+
+def test_no_food_boxes(service):
+    assert service._parse_yolo_result(_Result()) == []
+    assert service._parse_yolo_result(_Result((0, 0.9, [0, 0, 1, 1]))) == []
+
+@pytest.fixture
+def cascade(service, monkeypatch):
+    """Nano and large models answering with fixed results"""
+    monkeypatch.setattr(food_detection.Config, 'TILED_INFERENCE', False)
+    monkeypatch.setattr(food_detection.Config, 'CASCADE_CONFIDENCE', 0.5)
+    service._model = object()
+    service._cascade_model = object()
+    service._cascade_food_lut = service._food_lut
+    service.cascade_model_name = 'yolov8m.pt'
+    large = _Result((2, 0.9, [0, 0, 30, 30]))
+    monkeypatch.setattr(service.cascade_batcher, 'predict', lambda image: large)
+
+    def configure(nano_result):
+        monkeypatch.setattr(service.batcher, 'predict', lambda image: nano_result)
+        return service
+    return configure
+
+def test_low_confidence_result_escalates(cascade):
+    service = cascade(_Result((1, 0.3, [0, 0, 30, 30])))
+    detections = service._detect_with_yolo_local(IMAGE)
+    assert [d['name'] for d in detections] == ['apple']
+    assert service.cascade_stats['escalations'] == 1
+
+def test_disagreeing_top_boxes_escalate(cascade):
+    service = cascade(_Result((1, 0.8, [0, 0, 30, 30]), (2, 0.75, [1, 1, 30, 30])))
+    service._detect_with_yolo_local(IMAGE)
+    assert service.cascade_stats['escalations'] == 1
+
+def test_confident_result_does_not_escalate(cascade):
+    service = cascade(_Result((1, 0.9, [0, 0, 30, 30]), (5, 0.6, [40, 40, 60, 60])))
+    detections = service._detect_with_yolo_local(IMAGE)
+    assert [d['name'] for d in detections] == ['banana', 'sandwich']
+    assert service.cascade_stats == dict(service.cascade_stats, images=1, escalations=0)